@@ -0,0 +1,208 @@
+"""
+Voice activity detection and compaction of voice notes before STT.
+
+Farmers' voice notes often carry seconds of dead air, wind noise and long
+pauses. Before speech_to_text uploads them (or runs local Whisper on them),
+the audio is decoded once to 16 kHz mono PCM, non-speech at both ends is
+cut, internal pauses longer than VAD_MAX_PAUSE are shortened, and the result
+is re-encoded as low-bitrate Opus. The compacted PCM is handed to
+audio_decode's cache, so the local Whisper fallback does not decode again.
+
+Speech is detected with webrtcvad when it is installed, and otherwise with
+an energy detector: frame energy in the voice band (which leaves out most
+wind rumble and DC offset), against a threshold set just above the clip's own
+noise floor.
+
+Each request logs, and records as the "audio_removed" stage, the seconds of
+audio removed. Without ffmpeg, or when nothing is gained, the original bytes
+go to STT unchanged.
+
+Environment:
+    AUDIO_COMPACT        set to 0 to disable (default: on)
+    VAD_PADDING          seconds of audio kept around speech (default: 0.2)
+    VAD_MAX_PAUSE        internal pauses longer than this are shortened (default: 0.6)
+    VAD_AGGRESSIVENESS   webrtcvad mode, 0-3 (default: 2)
+    AUDIO_BITRATE        Opus bitrate of the re-encoded audio (default: 24k)
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+import metrics
+from audio_decode import SAMPLE_RATE, decode_pcm, remember_pcm
+
+FRAME_SECONDS = 0.03
+# Energy detector: only this band (Hz) counts, leaving out wind rumble and hiss
+VOICE_BAND = (150, 4000)
+# Energy detector: speech must be this far above the noise floor (dB)
+NOISE_MARGIN_DB = 10.0
+# Frames quieter than this (dBFS) are never speech
+SILENCE_DB = -60.0
+
+
+class CompactAudio(NamedTuple):
+    data: bytes
+    original_seconds: float
+    kept_seconds: float
+
+    @property
+    def removed_seconds(self):
+        return self.original_seconds - self.kept_seconds
+
+
+def enabled():
+    return os.getenv("AUDIO_COMPACT", "1").lower() not in ("0", "false", "no", "off")
+
+
+def _webrtc_speech_frames(pcm, frame):
+    import numpy as np
+    import webrtcvad
+
+    vad = webrtcvad.Vad(int(os.getenv("VAD_AGGRESSIVENESS", "2")))
+    samples = (np.clip(pcm, -1, 1) * 32767).astype("<i2")
+    return np.array(
+        [
+            vad.is_speech(samples[i : i + frame].tobytes(), SAMPLE_RATE)
+            for i in range(0, len(samples) - frame + 1, frame)
+        ],
+        dtype=bool,
+    )
+
+
+def _energy_speech_frames(pcm, frame):
+    import numpy as np
+
+    frames = pcm[: len(pcm) // frame * frame].reshape(-1, frame)
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame, 1 / SAMPLE_RATE)
+    band = (freqs >= VOICE_BAND[0]) & (freqs <= VOICE_BAND[1])
+    energy = 10 * np.log10(spectrum[:, band].sum(axis=1) / frame**2 + 1e-12)
+    # In a noisy clip the margin can reach the speech itself, so the threshold
+    # never rises above halfway between the noise floor and the loud frames
+    floor, loud = np.percentile(energy, [10, 90])
+    threshold = min(floor + NOISE_MARGIN_DB, (floor + loud) / 2)
+    return energy > max(threshold, SILENCE_DB)
+
+
+def speech_frames(pcm, frame=int(SAMPLE_RATE * FRAME_SECONDS)):
+    """Boolean speech flag per frame of `frame` samples"""
+    try:
+        return _webrtc_speech_frames(pcm, frame)
+    except ImportError:
+        return _energy_speech_frames(pcm, frame)
+
+
+def true_runs(mask):
+    """(start, end) index pairs of the True runs in `mask`"""
+    import numpy as np
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def keep_ranges(pcm, padding=None, max_pause=None):
+    """Sample ranges to keep: speech plus padding, with long pauses shortened"""
+    import numpy as np
+
+    padding = float(os.getenv("VAD_PADDING", "0.2")) if padding is None else padding
+    max_pause = (
+        float(os.getenv("VAD_MAX_PAUSE", "0.6")) if max_pause is None else max_pause
+    )
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    speech = speech_frames(pcm, frame)
+    if not speech.any():
+        return []
+
+    # Widen every speech run by the padding so word edges are not clipped
+    pad = int(round(padding / FRAME_SECONDS))
+    if pad:
+        speech = np.convolve(speech, np.ones(2 * pad + 1), mode="same") > 0
+
+    ranges = []
+    half_pause = int(max_pause * SAMPLE_RATE / 2)
+    for start, end in true_runs(speech):
+        start, end = start * frame, min(end * frame, len(pcm))
+        if ranges and start - ranges[-1][1] <= 2 * half_pause:
+            ranges[-1] = (ranges[-1][0], end)
+            continue
+        if ranges:
+            # Keep max_pause of the gap: its first and last halves
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + half_pause)
+            start -= half_pause
+        ranges.append((start, end))
+    return ranges
+
+
+def encode_opus(pcm, bitrate=None):
+    """Ogg/Opus bytes for 16 kHz mono float32 PCM (requires ffmpeg with libopus)"""
+    import numpy as np
+
+    samples = (np.clip(pcm, -1, 1) * 32767).astype("<i2")
+    cmd = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-f",
+        "s16le",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-ac",
+        "1",
+        "-i",
+        "pipe:0",
+        "-c:a",
+        "libopus",
+        "-b:a",
+        bitrate or os.getenv("AUDIO_BITRATE", "24k"),
+        "-application",
+        "voip",
+        "-f",
+        "ogg",
+        "pipe:1",
+    ]
+    return subprocess.run(
+        cmd, input=samples.tobytes(), capture_output=True, check=True
+    ).stdout
+
+
+def compact(audio_data):
+    """
+    CompactAudio for encoded voice-note bytes. Falls back to the original
+    bytes (nothing removed) when compaction is disabled, no speech is found
+    or the re-encoded audio would not be an improvement.
+    """
+    import numpy as np
+
+    if not enabled():
+        return CompactAudio(audio_data, 0.0, 0.0)
+
+    start = time.perf_counter()
+    pcm = decode_pcm(audio_data)
+    original_seconds = len(pcm) / SAMPLE_RATE
+    unchanged = CompactAudio(audio_data, original_seconds, original_seconds)
+
+    ranges = keep_ranges(pcm)
+    if not ranges:
+        print("🔇 No speech detected; sending the audio unchanged", file=sys.stderr)
+        return unchanged
+
+    kept = np.concatenate([pcm[a:b] for a, b in ranges])
+    encoded = encode_opus(kept)
+    kept_seconds = len(kept) / SAMPLE_RATE
+    if len(encoded) >= len(audio_data) and kept_seconds >= original_seconds - 0.5:
+        return unchanged
+
+    remember_pcm(encoded, kept)
+    result = CompactAudio(encoded, original_seconds, kept_seconds)
+    metrics.observe("audio_compact", time.perf_counter() - start)
+    metrics.observe("audio_removed", result.removed_seconds)
+    print(
+        f"✂️ Audio compacted: {original_seconds:.1f}s -> {kept_seconds:.1f}s "
+        f"({result.removed_seconds:.1f}s removed), "
+        f"{len(audio_data) // 1024}KB -> {len(encoded) // 1024}KB",
+        file=sys.stderr,
+    )
+    return result
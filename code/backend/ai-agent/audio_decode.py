@@ -0,0 +1,129 @@
+"""
+Decode uploaded audio to the 16 kHz mono float32 PCM Whisper works on.
+
+The encoded bytes are piped through ffmpeg in memory, the same conversion
+whisper.load_audio does on a file path, so the local Whisper fallback needs
+no temporary file. Containers that need a seekable input (e.g. MP4 with the
+index at the end) are retried through a memfd, which is still in memory.
+
+The last few decodes are kept, so every stage of a request that needs PCM
+shares one decoded array. Audio that was re-encoded from PCM already in hand
+(audio_compact) is registered with remember_pcm rather than decoded again.
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+SAMPLE_RATE = 16000
+
+_decoded = OrderedDict()
+_decoded_lock = threading.Lock()
+_DECODED_SIZE = 2
+
+
+def _ffmpeg(input_path, sample_rate, **run_args):
+    cmd = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-threads",
+        "0",
+        "-i",
+        input_path,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sample_rate),
+        "pipe:1",
+    ]
+    return subprocess.run(cmd, capture_output=True, check=True, **run_args).stdout
+
+
+def _decode(audio_data, sample_rate):
+    try:
+        return _ffmpeg("pipe:0", sample_rate, input=audio_data)
+    except subprocess.CalledProcessError:
+        if not hasattr(os, "memfd_create"):
+            raise
+
+    # Seekable retry without touching disk
+    fd = os.memfd_create("bridge-audio")
+    try:
+        with memoryview(audio_data) as view:
+            written = 0
+            while written < len(view):
+                written += os.write(fd, view[written:])
+        return _ffmpeg(
+            f"/proc/self/fd/{fd}",
+            sample_rate,
+            stdin=subprocess.DEVNULL,
+            pass_fds=(fd,),
+        )
+    finally:
+        os.close(fd)
+
+
+# (magic bytes, offset, upload filename) for the containers browsers and
+# phones record voice notes in
+_SIGNATURES = (
+    (b"OggS", 0, "audio.ogg"),
+    (b"\x1aE\xdf\xa3", 0, "audio.webm"),
+    (b"RIFF", 0, "audio.wav"),
+    (b"ID3", 0, "audio.mp3"),
+    (b"\xff\xfb", 0, "audio.mp3"),
+    (b"ftyp", 4, "audio.m4a"),
+)
+
+
+def guess_filename(audio_data):
+    """Upload filename whose extension matches the container of `audio_data`"""
+    for magic, offset, filename in _SIGNATURES:
+        if audio_data[offset : offset + len(magic)] == magic:
+            return filename
+    return "audio.webm"
+
+
+def _key(audio_data, sample_rate):
+    return (hashlib.blake2b(audio_data, digest_size=16).digest(), sample_rate)
+
+
+def _store(key, pcm):
+    with _decoded_lock:
+        _decoded[key] = pcm
+        while len(_decoded) > _DECODED_SIZE:
+            _decoded.popitem(last=False)
+
+
+def remember_pcm(audio_data, pcm, sample_rate=SAMPLE_RATE):
+    """Record `pcm` as the decoding of `audio_data` without running ffmpeg"""
+    _store(_key(audio_data, sample_rate), pcm)
+
+
+def decode_pcm(audio_data, sample_rate=SAMPLE_RATE):
+    """float32 mono PCM in [-1, 1] for encoded audio bytes (requires ffmpeg)"""
+    import numpy as np
+
+    key = _key(audio_data, sample_rate)
+    with _decoded_lock:
+        pcm = _decoded.get(key)
+        if pcm is not None:
+            _decoded.move_to_end(key)
+            return pcm
+
+    start = time.perf_counter()
+    raw = _decode(audio_data, sample_rate)
+    pcm = np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+    metrics.observe("audio_decode", time.perf_counter() - start)
+
+    _store(key, pcm)
+    return pcm
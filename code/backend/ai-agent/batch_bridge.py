@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Batch/offline runner for the bridge pipeline.
+
+Reads a JSONL file of {"text", "image_path", "audio_path"} records (an
+optional "id" is carried through), runs each through the same
+speech_to_text / generate_malayalam_response / text_to_speech path as the
+CLI, and appends one result line per record to the output JSONL as soon as
+it finishes. Output lines carry the input line number as "index", and that
+file doubles as the checkpoint: re-running with the same output skips every
+index already written, so an interrupted run resumes where it stopped. With
+--retry-failed, failed results are removed from it and run again.
+
+    python3 batch_bridge.py faq.jsonl answers.jsonl --workers 4 --rate 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from malayalam_api_bridge import process_request
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def load_completed(output_path, retry_failed=False):
+    """
+    Return the indexes already written. The checkpoint is compacted to the
+    last result per index, without the failed ones when they are to be
+    retried, so a resumed run never leaves two results for one index. A
+    partially written last line is dropped.
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb") as f:
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    lines = data[:end].splitlines()
+
+    latest = {}
+    for line in lines:
+        try:
+            result = json.loads(line)
+            index = result["index"]
+        except (ValueError, KeyError, TypeError):
+            continue
+        latest.pop(index, None)
+        latest[index] = (line, result.get("success"))
+    if retry_failed:
+        latest = {i: entry for i, entry in latest.items() if entry[1]}
+
+    if end < len(data) or len(latest) != len(lines):
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.writelines(line + b"\n" for line, _ in latest.values())
+        os.replace(temp_path, output_path)
+    return set(latest)
+
+
+def read_records(input_path, completed):
+    with open(input_path, "r", encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            if not line.strip() or index in completed:
+                continue
+            yield index, line
+
+
+def run_record(index, line, limiter):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {"index": index, "success": False, "error": f"Invalid record: {str(e)}"}
+
+    limiter.acquire()
+    result = process_request(
+        {
+            "text": record.get("text"),
+            "image_file": record.get("image_path"),
+            "audio_file": record.get("audio_path"),
+        }
+    )
+    result["index"] = index
+    if "id" in record:
+        result["id"] = record["id"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch AI Farming Assistant runner")
+    parser.add_argument("input", help="JSONL of {text, image_path, audio_path} records")
+    parser.add_argument("output", help="Output JSONL, also used as the checkpoint")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel requests")
+    parser.add_argument(
+        "--rate", type=float, default=0, help="Max requests per second (0: unlimited)"
+    )
+    parser.add_argument("--burst", type=int, default=1, help="Rate limiter burst size")
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Re-run records whose checkpointed result was unsuccessful",
+    )
+    args = parser.parse_args()
+
+    completed = load_completed(args.output, args.retry_failed)
+    if completed:
+        print(f"↩️ Resuming: {len(completed)} records already done", file=sys.stderr)
+
+    limiter = RateLimiter(args.rate, args.burst)
+    done = failed = 0
+    start = time.perf_counter()
+
+    with open(args.output, "a", encoding="utf-8") as out, ThreadPoolExecutor(
+        max_workers=max(1, args.workers)
+    ) as pool:
+        pending = set()
+        records = read_records(args.input, completed)
+        exhausted = False
+
+        while pending or not exhausted:
+            # Keep a bounded number of records in flight so huge inputs stream through
+            while not exhausted and len(pending) < 2 * max(1, args.workers):
+                try:
+                    index, line = next(records)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(run_record, index, line, limiter))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                done += 1
+                failed += 0 if result.get("success") else 1
+
+            elapsed = time.perf_counter() - start
+            print(
+                f"📦 {done} done ({failed} failed), {done / elapsed:.2f} queries/s",
+                file=sys.stderr,
+            )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ Processed {done} records in {elapsed:.1f}s "
+        f"({done / elapsed if elapsed else 0:.2f} queries/s, {failed} failed)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Speed and accuracy of the voice-note compaction in front of STT.
+
+Synthesises voice notes at 16 kHz: a noise floor with low-frequency wind
+rumble, and "words" (voiced harmonics under a syllable-rate envelope)
+separated by short gaps, long pauses and leading/trailing dead air. For each
+clip it reports how much audio the VAD removes against how much is known to
+be removable, how much known speech would be cut (must stay at zero), and
+the VAD time. When ffmpeg is on PATH it also reports the size of the
+re-encoded Opus upload against 16-bit WAV.
+
+    python3 benchmarks/bench_audio_compact.py --clips 20
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import audio_compact
+from audio_decode import SAMPLE_RATE
+
+PADDING = 0.2
+MAX_PAUSE = 0.6
+
+
+def synth_clip(rng, noise_db, wind):
+    """(pcm, speech mask, removable seconds) for one synthetic voice note"""
+    parts, mask = [], []
+    removable = 0.0
+
+    def silence(seconds):
+        n = int(seconds * SAMPLE_RATE)
+        parts.append(np.zeros(n, np.float32))
+        mask.append(np.zeros(n, bool))
+
+    def word(seconds):
+        n = int(seconds * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        pitch = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 8))
+        envelope = np.sin(np.pi * t / seconds) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+        parts.append((0.2 * voiced * envelope).astype(np.float32))
+        mask.append(np.ones(n, bool))
+
+    lead, tail = rng.uniform(0.5, 3.0), rng.uniform(0.5, 3.0)
+    silence(lead)
+    for _ in range(rng.integers(2, 5)):
+        for _ in range(rng.integers(3, 8)):
+            word(rng.uniform(0.2, 0.6))
+            gap = rng.uniform(0.05, 0.25)
+            silence(gap)
+        pause = rng.uniform(1.0, 4.0)
+        silence(pause)
+        # What a perfect detector with the default padding and pause removes
+        removable += max(0.0, gap + pause - 2 * PADDING - MAX_PAUSE)
+    silence(tail)
+    removable += lead + tail - 2 * PADDING
+
+    pcm = np.concatenate(parts)
+    noise = rng.normal(0, 10 ** (noise_db / 20), len(pcm))
+    if wind:
+        t = np.arange(len(pcm)) / SAMPLE_RATE
+        noise += (
+            0.05 * np.sin(2 * np.pi * 3 * t) * rng.normal(0, 1, len(pcm)).cumsum() / 400
+        )
+    return (pcm + noise).astype(np.float32), np.concatenate(mask), removable
+
+
+def run(clips, noise_db, wind, rng):
+    removed, ideal, speech_cut, vad_ms, sizes = [], [], [], [], []
+    for _ in range(clips):
+        pcm, mask, removable = synth_clip(rng, noise_db, wind)
+        start = time.perf_counter()
+        ranges = audio_compact.keep_ranges(pcm, PADDING, MAX_PAUSE)
+        vad_ms.append((time.perf_counter() - start) * 1000)
+
+        kept = np.zeros(len(pcm), bool)
+        for a, b in ranges:
+            kept[a:b] = True
+        removed.append((len(pcm) - kept.sum()) / SAMPLE_RATE)
+        ideal.append(removable)
+        speech_cut.append((mask & ~kept).sum() / SAMPLE_RATE)
+
+        if shutil.which("ffmpeg") and ranges:
+            compacted = np.concatenate([pcm[a:b] for a, b in ranges])
+            sizes.append((len(pcm) * 2, len(audio_compact.encode_opus(compacted))))
+
+    label = f"noise {noise_db:.0f}dB{' + wind' if wind else ''}"
+    print(
+        f"{label:>18} {statistics.mean(removed):>8.1f}s {statistics.mean(ideal):>8.1f}s "
+        f"{max(speech_cut):>9.2f}s {statistics.median(vad_ms):>7.1f}ms",
+        end="",
+    )
+    if sizes:
+        wav, opus = map(sum, zip(*sizes))
+        print(f" {wav / len(sizes) / 1024:>7.0f}KB -> {opus / len(sizes) / 1024:.0f}KB")
+    else:
+        print("  (no ffmpeg: encoding not measured)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio compaction benchmark")
+    parser.add_argument("--clips", type=int, default=20, help="Clips per condition")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        import webrtcvad  # noqa: F401
+
+        print("VAD: webrtcvad")
+    except ImportError:
+        print("VAD: energy detector (webrtcvad not installed)")
+
+    rng = np.random.default_rng(args.seed)
+    print(
+        f"{'condition':>18} {'removed':>9} {'ideal':>9} {'speech cut':>10} "
+        f"{'vad p50':>9} {'upload'}"
+    )
+    for noise_db, wind in ((-60, False), (-45, False), (-35, False), (-45, True)):
+        run(args.clips, noise_db, wind, rng)
+
+
+if __name__ == "__main__":
+    main()
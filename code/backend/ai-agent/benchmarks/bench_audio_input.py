@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Disk I/O and latency of handing audio to the bridge: temp files vs memory.
+
+"files" reproduces the old path: the caller writes the upload to a file, the
+bridge reads it, copies it into a NamedTemporaryFile and reopens that for the
+upload. "stdin" is the new path: the caller pipes the bytes to the bridge
+(--audio-stdin) and they are uploaded straight from memory. Each run spawns a
+fresh interpreter like the Node route does; the child reports the bytes it
+wrote from /proc/self/io.
+
+Point --dir at a disk-backed directory; /tmp is often tmpfs, which hides the
+cost being measured.
+
+    python3 benchmarks/bench_audio_input.py --size-kb 500 --runs 20 --dir /var/tmp
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD_FILES = """
+import json, os, sys, tempfile
+with open(sys.argv[1], "rb") as f:
+    data = f.read()
+with tempfile.NamedTemporaryFile(suffix=".webm", dir=sys.argv[2], delete=False) as t:
+    t.write(data)
+with open(t.name, "rb") as f:
+    upload = f.read()
+os.unlink(t.name)
+io = dict(l.split(": ") for l in open("/proc/self/io").read().splitlines())
+print(json.dumps({"bytes": len(upload), "wchar": int(io["wchar"])}))
+"""
+
+CHILD_STDIN = """
+import json, sys
+upload = sys.stdin.buffer.read()
+io = dict(l.split(": ") for l in open("/proc/self/io").read().splitlines())
+print(json.dumps({"bytes": len(upload), "wchar": int(io["wchar"])}))
+"""
+
+
+def filesystem_type(path):
+    path = os.path.realpath(path)
+    best = ("", "unknown")
+    with open("/proc/mounts") as f:
+        for line in f:
+            mount_point, fs_type = line.split()[1:3]
+            if path.startswith(mount_point) and len(mount_point) > len(best[0]):
+                best = (mount_point, fs_type)
+    return best[1]
+
+
+def run_files(audio, directory, fsync):
+    start = time.perf_counter()
+    path = os.path.join(directory, f"audio_{time.time_ns()}.webm")
+    with open(path, "wb") as f:
+        f.write(audio)
+        if fsync:
+            os.fsync(f.fileno())
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD_FILES, path, directory],
+        capture_output=True,
+        check=True,
+    )
+    os.unlink(path)
+    elapsed = time.perf_counter() - start
+    report = json.loads(proc.stdout)
+    # The caller's write counts too
+    return elapsed, report["wchar"] + len(audio)
+
+
+def run_stdin(audio, directory, fsync):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD_STDIN],
+        input=audio,
+        capture_output=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(proc.stdout)["wchar"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio hand-off benchmark")
+    parser.add_argument("--size-kb", type=int, default=500, help="Upload size")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--dir", default=".", help="Directory for the temp files")
+    parser.add_argument(
+        "--fsync", action="store_true", help="fsync the caller's file write"
+    )
+    args = parser.parse_args()
+
+    audio = os.urandom(args.size_kb * 1024)
+    print(f"Temp dir {os.path.realpath(args.dir)} is {filesystem_type(args.dir)}")
+
+    for name, fn in (("files", run_files), ("stdin", run_stdin)):
+        samples = [fn(audio, args.dir, args.fsync) for _ in range(args.runs)]
+        times = [s for s, _ in samples]
+        written = statistics.median(w for _, w in samples)
+        print(
+            f"{name:>6}: median {statistics.median(times) * 1000:.1f}ms, "
+            f"{written / 1024:.0f}KB written per request ({args.runs} runs)"
+        )
+
+
+if __name__ == "__main__":
+    main()
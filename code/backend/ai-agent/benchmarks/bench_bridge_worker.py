@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compare /chat latency for spawn-per-request against a resident bridge worker.
+
+Both modes send the same text query through malayalam_api_bridge.py, so the
+real Gemini/gTTS calls are made and a configured .env is required.
+
+    python3 benchmarks/bench_bridge_worker.py --requests 20 --text "best fertilizer for paddy"
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BRIDGE = Path(__file__).resolve().parent.parent / "malayalam_api_bridge.py"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarise(name, samples):
+    print(
+        f"{name:>8}: n={len(samples)} "
+        f"p50={percentile(samples, 50) * 1000:.0f}ms "
+        f"p99={percentile(samples, 99) * 1000:.0f}ms "
+        f"mean={statistics.mean(samples) * 1000:.0f}ms"
+    )
+
+
+def bench_spawn(text, requests):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(BRIDGE), "--text", text],
+            cwd=BRIDGE.parent,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_worker(text, requests):
+    proc = subprocess.Popen(
+        [sys.executable, str(BRIDGE), "--worker"],
+        cwd=BRIDGE.parent,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+    )
+    samples = []
+    try:
+        for i in range(requests):
+            start = time.perf_counter()
+            proc.stdin.write(json.dumps({"id": i, "text": text}) + "\n")
+            proc.stdin.flush()
+            proc.stdout.readline()
+            samples.append(time.perf_counter() - start)
+    finally:
+        proc.stdin.close()
+        proc.wait(timeout=30)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bridge worker latency benchmark")
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--text", type=str, default="best fertilizer for paddy")
+    args = parser.parse_args()
+
+    summarise("spawn", bench_spawn(args.text, args.requests))
+    # The first worker request also pays the one-off interpreter start-up
+    worker = bench_worker(args.text, args.requests + 1)
+    print(f"  worker start-up + first request: {worker[0] * 1000:.0f}ms")
+    summarise("worker", worker[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Latency and hit rate of the FAQ answer tier on a sample query set.
+
+QUERIES are paraphrases (not copies) of knowledge base questions in
+Malayalam, Hindi and English, plus questions the knowledge base does not
+cover, which must fall through to Gemini. They were written alongside the
+knowledge base, so they flatter it. HELD_OUT was written afterwards, from
+how farmers describe symptoms rather than from the entries' wording, and
+its uncovered half is near misses: the same crop, pest or input words as an
+entry but a different question. Thresholds are tuned on HELD_OUT.
+
+For a grid of confidence thresholds and margins it reports, per set, the
+hit rate (covered queries answered), precision (answers that were the right
+entry) and false answers on uncovered queries, using the same rules as
+lookup(). It also times full and incremental index builds, mapping the
+index, and lookups.
+
+    python3 benchmarks/bench_faq_index.py --number 200
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import faq_index
+
+KB_PATH = Path(__file__).resolve().parent.parent / "knowledge_base" / "faq.json"
+
+# (query, language, expected entry id or None when not covered)
+QUERIES = (
+    ("what fertilizer dose is recommended for paddy", "en", "paddy_fertiliser"),
+    ("how much urea per hectare for rice", "en", "paddy_fertiliser"),
+    ("നെല്ലിന് യൂറിയ എത്ര കിലോ വേണം", "ml", "paddy_fertiliser"),
+    ("धान के खेत में कितना यूरिया डालें", "hi", "paddy_fertiliser"),
+    ("soil is too acidic, how much lime", "en", "soil_acidity_lime"),
+    ("വയലിൽ കുമ്മായം എത്ര ഇടണം", "ml", "soil_acidity_lime"),
+    ("अम्लीय मिट्टी में चूना कितना", "hi", "soil_acidity_lime"),
+    ("how to collect soil sample for test", "en", "soil_testing"),
+    ("മണ്ണ് പരിശോധനയ്ക്ക് സാമ്പിൾ എടുക്കുന്നത് എങ്ങനെ", "ml", "soil_testing"),
+    ("मिट्टी परीक्षण के लिए नमूना", "hi", "soil_testing"),
+    ("stem borer attack in rice, what to do", "en", "paddy_stem_borer"),
+    ("നെല്ലിൽ തണ്ടുതുരപ്പൻ ശല്യം", "ml", "paddy_stem_borer"),
+    ("धान में तना छेदक का इलाज", "hi", "paddy_stem_borer"),
+    ("leaf folder in my rice field", "en", "paddy_leaf_folder"),
+    ("ഓലചുരുട്ടി പുഴു നെല്ലിൽ", "ml", "paddy_leaf_folder"),
+    ("धान में पत्ती लपेटक", "hi", "paddy_leaf_folder"),
+    ("brown planthopper control", "en", "brown_planthopper"),
+    ("നെല്ലിൽ മുഞ്ഞ കണ്ടാൽ എന്ത് ചെയ്യണം", "ml", "brown_planthopper"),
+    ("भूरा फुदका नियंत्रण", "hi", "brown_planthopper"),
+    ("blast disease on rice leaves", "en", "paddy_blast"),
+    ("നെല്ലിലെ ബ്ലാസ്റ്റ് രോഗത്തിന് പ്രതിവിധി", "ml", "paddy_blast"),
+    ("धान में झोंका रोग", "hi", "paddy_blast"),
+    ("rhinoceros beetle damaging coconut palms", "en", "coconut_rhinoceros_beetle"),
+    ("കൊമ്പൻ ചെല്ലി തെങ്ങ്", "ml", "coconut_rhinoceros_beetle"),
+    ("नारियल में गैंडा भृंग", "hi", "coconut_rhinoceros_beetle"),
+    ("neem oil spray preparation", "en", "neem_oil_spray"),
+    ("വേപ്പെണ്ണ എമൽഷൻ ഉണ്ടാക്കുന്നത്", "ml", "neem_oil_spray"),
+    ("नीम तेल घोल बनाने का तरीका", "hi", "neem_oil_spray"),
+    ("vermicompost making steps", "en", "vermicompost"),
+    ("മണ്ണിര കമ്പോസ്റ്റ് നിർമ്മാണ രീതി", "ml", "vermicompost"),
+    ("केंचुआ खाद बनाने की विधि", "hi", "vermicompost"),
+    ("pseudostem weevil in banana", "en", "banana_pseudostem_weevil"),
+    ("വാഴയിൽ തടതുരപ്പൻ", "ml", "banana_pseudostem_weevil"),
+    ("केले में तना घुन", "hi", "banana_pseudostem_weevil"),
+    ("kisan call centre number", "en", "kisan_helpline"),
+    ("കിസാൻ കോൾ സെന്റർ ഫോൺ നമ്പർ", "ml", "kisan_helpline"),
+    ("किसान हेल्पलाइन नंबर", "hi", "kisan_helpline"),
+    # Not covered by the knowledge base
+    ("what is the price of tomato today", "en", None),
+    ("will it rain in kochi tomorrow", "en", None),
+    ("how to grow tomatoes in pots", "en", None),
+    ("which mango variety fruits earliest", "en", None),
+    ("how do I apply for a crop loan", "en", None),
+    ("കുരുമുളകിന് ദ്രുതവാട്ടം", "ml", None),
+    ("ഇന്ന് റബ്ബറിന്റെ വില എത്ര", "ml", None),
+    ("തക്കാളി എങ്ങനെ നടാം", "ml", None),
+    ("गेहूं की बुवाई कब करें", "hi", None),
+    ("आज प्याज का भाव क्या है", "hi", None),
+    ("टमाटर में फल छेदक", "hi", None),
+)
+
+# Written after the knowledge base, without its wording; near misses last
+HELD_OUT = (
+    (
+        "my paddy crop is 30 days old, which fertilizer and how much",
+        "en",
+        "paddy_fertiliser",
+    ),
+    ("rice field fertilizer schedule", "en", "paddy_fertiliser"),
+    ("potash dose for rice", "en", "paddy_fertiliser"),
+    ("നെല്ലിന് ഏത് വളം ഇടണം", "ml", "paddy_fertiliser"),
+    ("धान की फसल में खाद की मात्रा", "hi", "paddy_fertiliser"),
+    ("my soil is sour, should I add lime", "en", "soil_acidity_lime"),
+    ("dolomite or lime for acidic soil", "en", "soil_acidity_lime"),
+    ("മണ്ണിന്റെ അമ്ലത കുറയ്ക്കാൻ എന്ത് ചെയ്യണം", "ml", "soil_acidity_lime"),
+    ("where to send soil for testing in kerala", "en", "soil_testing"),
+    ("soil test lab near me", "en", "soil_testing"),
+    ("മണ്ണ് പരിശോധന എവിടെ ചെയ്യാം", "ml", "soil_testing"),
+    ("central shoot of rice plant dried up", "en", "paddy_stem_borer"),
+    ("white ears in paddy after flowering", "en", "paddy_stem_borer"),
+    ("rice leaves rolled and scraped", "en", "paddy_leaf_folder"),
+    ("hopper burn in rice field", "en", "brown_planthopper"),
+    ("planthoppers at the base of rice plants", "en", "brown_planthopper"),
+    ("diamond shaped spots on paddy leaves", "en", "paddy_blast"),
+    ("neck of rice panicle turned black and broke", "en", "paddy_blast"),
+    ("beetle making holes in coconut tree top", "en", "coconut_rhinoceros_beetle"),
+    ("തെങ്ങിന്റെ കൂമ്പ് ചെല്ലി തിന്നുന്നു", "ml", "coconut_rhinoceros_beetle"),
+    ("how to mix neem oil with soap for spraying", "en", "neem_oil_spray"),
+    ("വേപ്പെണ്ണ എത്ര വെള്ളത്തിൽ ചേർക്കണം", "ml", "neem_oil_spray"),
+    ("compost with earthworms at home", "en", "vermicompost"),
+    ("banana stem has holes and jelly coming out", "en", "banana_pseudostem_weevil"),
+    ("വാഴയുടെ തട ഒടിഞ്ഞു വീഴുന്നു", "ml", "banana_pseudostem_weevil"),
+    ("phone number to call for crop advice", "en", "kisan_helpline"),
+    ("किसान कॉल सेंटर का नंबर क्या है", "hi", "kisan_helpline"),
+    ("what fertilizer for banana", "en", None),
+    ("soil pH for tea", "en", None),
+    ("paddy", "en", None),
+    ("pH", "en", None),
+    ("paddy pest", "en", None),
+    ("fertilizer for coconut palms", "en", None),
+    ("stem borer in sugarcane", "en", None),
+    ("leaf spot on banana leaves", "en", None),
+    ("how to make compost from coconut husk", "en", None),
+    ("neem cake for nematodes", "en", None),
+    ("price of urea fertilizer", "en", None),
+    ("best rice variety for kerala", "en", None),
+    ("subsidy for soil testing kit", "en", None),
+    ("വാഴയ്ക്ക് വളം", "ml", None),
+    ("തെങ്ങിന് വളപ്രയോഗം", "ml", None),
+    ("केले में खाद", "hi", None),
+    ("आलू में झुलसा रोग", "hi", None),
+    ("pest in my field", "en", None),
+    ("rice", "en", None),
+    ("control beetle in brinjal", "en", None),
+    ("kisan credit card loan", "en", None),
+)
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9)
+MARGINS = (0.0, 0.1, 0.15, 0.2)
+
+
+def quality(index, name, queries):
+    covered = sum(1 for *_, expected in queries if expected)
+    uncovered = len(queries) - covered
+
+    print(
+        f"\n{name}: {covered} covered, {uncovered} uncovered\n"
+        f"{'threshold':>9} {'margin':>6} {'hit rate':>9} {'precision':>10} "
+        f"{'false hits':>11}"
+    )
+    for threshold in THRESHOLDS:
+        for margin in MARGINS:
+            answered = right = false_hits = 0
+            for query, lang, expected in queries:
+                match = faq_index.choose(index, query, lang, threshold, margin)
+                if match is None:
+                    continue
+                if expected is None:
+                    false_hits += 1
+                    continue
+                answered += 1
+                right += match.entry_id == expected
+            current = (
+                threshold == faq_index.min_confidence()
+                and margin == faq_index.min_margin()
+            )
+            print(
+                f"{threshold:>9.1f} {margin:>6.2f} {answered / covered:>9.0%} "
+                f"{(right / answered if answered else 1):>10.0%} "
+                f"{false_hits:>5}/{uncovered}{'  <- default' if current else ''}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAQ tier benchmark")
+    parser.add_argument("--number", type=int, default=200, help="Lookups per query")
+    args = parser.parse_args()
+
+    index_dir = Path(tempfile.mkdtemp(prefix="faq_bench_"))
+    try:
+        stats = faq_index.build_index(KB_PATH, index_dir)
+        print(
+            f"Full build: {stats['seconds'] * 1000:.1f}ms for {stats['entries']} entries, "
+            f"{stats['terms']} terms, {stats['bytes'] / 1024:.1f}KB"
+        )
+        stats = faq_index.build_index(KB_PATH, index_dir)
+        print(
+            f"Incremental build (no entries changed): {stats['seconds'] * 1000:.1f}ms, "
+            f"{stats['tokenised']} tokenised"
+        )
+
+        start = time.perf_counter()
+        index = faq_index.open_index(KB_PATH, index_dir)
+        print(f"Map index: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        samples = []
+        for query, lang, _ in QUERIES:
+            start = time.perf_counter()
+            for _ in range(args.number):
+                index.search(query, lang, limit=1)
+            samples.append((time.perf_counter() - start) / args.number)
+        samples.sort()
+        print(
+            f"Lookup: p50 {statistics.median(samples) * 1e6:.0f}us  "
+            f"p95 {samples[int(0.95 * (len(samples) - 1))] * 1e6:.0f}us  "
+            f"max {samples[-1] * 1e6:.0f}us"
+        )
+
+        quality(index, "Paraphrases (written with the knowledge base)", QUERIES)
+        quality(index, "Held out (tuning set)", HELD_OUT)
+        index.close()
+    finally:
+        shutil.rmtree(index_dir)
+
+
+if __name__ == "__main__":
+    main()
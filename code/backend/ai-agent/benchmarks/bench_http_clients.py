@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Per-request connection overhead: fresh clients vs the shared http_clients pool.
+
+Starts a local stub server that answers like the OpenAI transcription and
+gTTS endpoints, then times the same calls made the old way (a new OpenAI
+client / gTTS session per request) and through http_clients. The stub can
+delay every new connection by --handshake-ms to stand in for the TCP/TLS
+round trips to the real hosts, and counts the connections each mode opens.
+
+    python3 benchmarks/bench_http_clients.py --requests 50 --handshake-ms 60
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+AUDIO = base64.b64encode(b"ID3" + b"\x00" * 512).decode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+        time.sleep(self.server.handshake_s)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.endswith("/audio/transcriptions"):
+            body = json.dumps({"text": "stub transcript"}).encode()
+            content_type = "application/json"
+        else:
+            body = f')]}}\'\n[["wrb.fr","jQ1olc","[\\"{AUDIO}\\"]"]]\n'.encode()
+            content_type = "application/json+protobuf"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(handshake_ms):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.handshake_s = handshake_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def fresh_openai(base_url):
+    import openai
+
+    client = openai.OpenAI(api_key="stub", base_url=base_url + "/v1")
+    try:
+        return client.audio.transcriptions.create(
+            model="whisper-1", file=("audio.webm", b"\x00" * 1024)
+        )
+    finally:
+        client.close()
+
+
+def pooled_openai(base_url):
+    import http_clients
+
+    return http_clients.get_openai_client("stub").audio.transcriptions.create(
+        model="whisper-1", file=("audio.webm", b"\x00" * 1024)
+    )
+
+
+def fresh_gtts(base_url):
+    import gtts.tts
+    from gtts import gTTS
+
+    gtts.tts._translate_url = lambda tld, path: f"{base_url}/{path}"
+    return b"".join(gTTS(text="stub sentence", lang="en").stream())
+
+
+def pooled_gtts(base_url):
+    import http_clients
+
+    return b"".join(
+        http_clients.get_gtts_class()(text="stub sentence", lang="en").stream()
+    )
+
+
+def run(server, name, fn, base_url, count):
+    fn(base_url)  # first call pays for imports and the first connection
+    server.connections = 0
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        fn(base_url)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(
+        f"{name:>14}: p50 {statistics.median(samples) * 1000:6.1f}ms  "
+        f"p95 {samples[int(len(samples) * 0.95) - 1] * 1000:6.1f}ms  "
+        f"{server.connections} connections for {count} requests"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared HTTP client benchmark")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=60,
+        help="Delay added to every new connection (stands in for TCP/TLS setup)",
+    )
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args.handshake_ms)
+    os.environ["OPENAI_BASE_URL"] = base_url + "/v1"
+    os.environ["GTTS_BASE_URL"] = base_url
+
+    run(server, "openai fresh", fresh_openai, base_url, args.requests)
+    run(server, "openai pooled", pooled_openai, base_url, args.requests)
+    run(server, "gtts fresh", fresh_gtts, base_url, args.requests)
+    run(server, "gtts pooled", pooled_gtts, base_url, args.requests)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
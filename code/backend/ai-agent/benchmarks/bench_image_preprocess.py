@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Payload size and latency of raw vs preprocessed image uploads.
+
+For each image, compares the data URL the bridge used to send (the whole file
+base64-encoded) with the one prepare_image produces, and how long
+preprocessing takes. With --live it also times a real Gemini call for both
+payloads (a configured .env is required).
+
+    python3 benchmarks/bench_image_preprocess.py leaf1.jpg leaf2.png --live
+"""
+
+import argparse
+import base64
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import image_preprocess
+
+
+def raw_data_url(path):
+    with open(path, "rb") as f:
+        return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode()
+
+
+def prepared_data_url(path):
+    # Bypass the per-file memo so every run measures a full decode
+    image_preprocess._prepared.clear()
+    return image_preprocess.prepare_image(path).data_url()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def gemini_latency(query, path, url, runs):
+    import llm_pipeline
+
+    samples = []
+    for _ in range(runs):
+        llm_input = llm_pipeline._build_input(query, path, url)
+        _, elapsed = timed(llm_pipeline.get_structured_llm().invoke, llm_input)
+        samples.append(elapsed)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image preprocessing benchmark")
+    parser.add_argument("images", nargs="+", help="Image files to measure")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--live", action="store_true", help="Also time Gemini calls")
+    parser.add_argument("--query", type=str, default="What is wrong with this leaf?")
+    args = parser.parse_args()
+
+    for path in args.images:
+        raw_url = raw_data_url(path)
+        samples = [timed(prepared_data_url, path) for _ in range(args.runs)]
+        prepared_url = samples[-1][0]
+        preprocess_ms = statistics.median(s for _, s in samples) * 1000
+
+        print(f"{Path(path).name}:")
+        print(
+            f"  payload   raw {len(raw_url) / 1024:.0f}KB -> "
+            f"prepared {len(prepared_url) / 1024:.0f}KB "
+            f"({len(prepared_url) / len(raw_url):.1%})"
+        )
+        print(f"  preprocessing {preprocess_ms:.0f}ms (median of {args.runs})")
+
+        if args.live:
+            raw_s = gemini_latency(args.query, path, raw_url, args.runs)
+            prepared_s = gemini_latency(args.query, path, prepared_url, args.runs)
+            print(
+                f"  gemini    raw {raw_s * 1000:.0f}ms -> "
+                f"prepared {(prepared_s * 1000 + preprocess_ms):.0f}ms "
+                f"including preprocessing"
+            )
+
+
+if __name__ == "__main__":
+    main()
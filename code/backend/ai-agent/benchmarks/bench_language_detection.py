@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Language detection cost per request: langdetect vs the script classifier.
+
+Times, on long Malayalam, Hindi, English and mixed responses:
+
+- langdetect.detect, which the LLM and fallback paths used to run
+  (its first call also loads the language profiles, reported separately);
+- the old per-character TTS scan over literal Malayalam/Hindi strings;
+- script_classifier.classify.
+
+    python3 benchmarks/bench_language_detection.py --repeat 40 --number 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import script_classifier
+
+SAMPLES = {
+    "ml": "നിങ്ങളുടെ ചോദ്യം മനസ്സിലായി! നെല്ലിന് നൈട്രജൻ, ഫോസ്ഫറസ്, പൊട്ടാഷ് എന്നിവ സമീകൃതമായി നൽകുക. ",
+    "hi": "आपका सवाल समझ आया! धान के लिए नाइट्रोजन, फास्फोरस और पोटाश का संतुलित मिश्रण दें। ",
+    "en": "Great question! For paddy, apply a balanced mix of nitrogen, phosphorus and potash. ",
+    "mixed": "Paddy-ക്ക് urea 25 kg per acre, പിന്നെ potash ചേർക്കുക. ",
+}
+
+MALAYALAM_CHARS = "ഇഎഒഔകഖഗഘചഛജഝടഠഡഢണതഥദധനപഫബഭമയരറലളഴവശഷസഹാിീുൂൃെേൈൊോൗ്"
+HINDI_CHARS = "अआइईउऊएऐओऔकखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसह"
+
+
+def old_tts_scan(text):
+    if any(char in text for char in MALAYALAM_CHARS):
+        return "ml"
+    elif any(char in text for char in HINDI_CHARS):
+        return "hi"
+    return "en"
+
+
+def per_call_us(fn, text, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn(text)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Language detection benchmark")
+    parser.add_argument(
+        "--repeat", type=int, default=40, help="Copies of each sample per response"
+    )
+    parser.add_argument("--number", type=int, default=200, help="Calls per timing")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    from langdetect import DetectorFactory, detect
+
+    DetectorFactory.seed = 0
+    detect("warm up")
+    print(
+        f"langdetect import + first call: {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+
+    print(
+        f"{'text':>6} {'chars':>6} {'langdetect':>12} {'old scan':>10} {'classifier':>11}"
+    )
+    for name, sample in SAMPLES.items():
+        text = sample * args.repeat
+        # langdetect is far slower; fewer calls keep the run short
+        langdetect_us = per_call_us(detect, text, max(1, args.number // 20))
+        scan_us = per_call_us(old_tts_scan, text, args.number)
+        classifier_us = per_call_us(script_classifier.classify, text, args.number)
+        result = script_classifier.classify(text)
+        print(
+            f"{name:>6} {len(text):>6} {langdetect_us:>10.0f}us {scan_us:>8.1f}us "
+            f"{classifier_us:>9.1f}us  -> {result.lang} "
+            f"({result.source}, {result.confidence:.2f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
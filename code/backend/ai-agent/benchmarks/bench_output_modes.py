@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Memory and latency of the bridge's JSON output against binary frames.
+
+For replies carrying a range of MP3 sizes it measures, on the Python side,
+the time and peak allocation (tracemalloc) to turn a result into output
+bytes: base64 plus json.dumps for JSON, bridge_frames.encode_reply for
+frames. When node is on PATH it also measures the Node side, the way the
+/chat route reads a one-shot bridge. A child process writes each reply to a
+pipe (python3 this-script --emit MODE). Node collects stdout, parses it with
+JSON.parse or parseBridgeFrames, and rebuilds the base64 the HTTP client
+gets. It reports wall time from spawn to parsed reply, the parse time after
+the pipe closes, and peak RSS and heap growth.
+
+    python3 benchmarks/bench_output_modes.py --sizes 64 512 2048 --runs 20
+"""
+
+import argparse
+import base64
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bridge_frames
+
+FRAMES_JS = (
+    Path(__file__).resolve().parents[2]
+    / "node-server"
+    / "server"
+    / "utils"
+    / "bridgeFrames.js"
+)
+
+NODE_SCRIPT = r"""
+import { spawn } from 'child_process';
+import { parseBridgeFrames, toJsonReply } from '%(frames_js)s';
+
+const [python, script, mode, kb, runs] = process.argv.slice(1);
+const once = () => new Promise((resolve) => {
+  const started = process.hrtime.bigint();
+  const baseHeap = process.memoryUsage().heapUsed;
+  let peakRss = 0, peakHeap = 0;
+  const sample = () => {
+    const m = process.memoryUsage();
+    peakRss = Math.max(peakRss, m.rss);
+    peakHeap = Math.max(peakHeap, m.heapUsed - baseHeap);
+  };
+  const child = spawn(python, [script, '--emit', mode, '--audio-kb', kb]);
+  const chunks = [];
+  child.stdout.on('data', (d) => { chunks.push(d); sample(); });
+  child.on('close', () => {
+    const closed = process.hrtime.bigint();
+    const stdout = Buffer.concat(chunks);
+    let result;
+    if (mode === 'frames') {
+      result = toJsonReply(parseBridgeFrames(stdout));
+    } else {
+      result = JSON.parse(stdout.toString('utf8').trim());
+    }
+    const body = JSON.stringify(result);
+    sample();
+    const done = process.hrtime.bigint();
+    resolve({ wall: Number(done - started) / 1e6, parse: Number(done - closed) / 1e6,
+              rss: peakRss, heap: peakHeap, body: body.length });
+  });
+});
+const out = [];
+for (let i = 0; i < Number(runs); i++) { global.gc && global.gc(); out.push(await once()); }
+console.log(JSON.stringify(out));
+"""
+
+
+def sample_result(audio_kb):
+    text = "നെല്ലിന് ഹെക്ടറിന് 90 കിലോ നൈട്രജൻ മൂന്ന് തവണയായി നൽകുക. " * 40
+    return {
+        "success": True,
+        "transcribed_text": None,
+        "title": "നെല്ലിന് വളപ്രയോഗം",
+        "response_text": text,
+        "confidence": 90,
+        "input_types": ["text"],
+        "audio": os.urandom(audio_kb * 1024),
+    }
+
+
+def encode(result, mode):
+    """Output bytes for a result the way the bridge writes them"""
+    if mode == "frames":
+        return b"".join(bridge_frames.encode_reply(result))
+    result["audio_base64"] = base64.b64encode(result.pop("audio")).decode()
+    return (json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def emit(mode, audio_kb):
+    result = sample_result(audio_kb)
+    if mode == "frames":
+        bridge_frames.write_reply(sys.stdout.buffer, result)
+    else:
+        sys.stdout.buffer.write(encode(result, mode))
+        sys.stdout.flush()
+
+
+def python_side(sizes, runs):
+    print("Python: result -> output bytes")
+    print(f"{'audio':>8} {'mode':>7} {'bytes':>10} {'p50 ms':>8} {'peak alloc':>11}")
+    for kb in sizes:
+        for mode in ("json", "frames"):
+            times, size = [], 0
+            for _ in range(runs):
+                result = sample_result(kb)
+                start = time.perf_counter()
+                size = len(encode(result, mode))
+                times.append(time.perf_counter() - start)
+            result = sample_result(kb)
+            tracemalloc.start()
+            encode(result, mode)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"{kb:>6}KB {mode:>7} {size:>10} "
+                f"{statistics.median(times) * 1000:>8.2f} {peak / 1024:>9.0f}KB"
+            )
+
+
+def node_side(sizes, runs):
+    script = NODE_SCRIPT % {"frames_js": FRAMES_JS.as_posix()}
+    print("\nNode: spawn -> parsed reply -> client JSON")
+    print(
+        f"{'audio':>8} {'mode':>7} {'wall p50':>9} {'parse p50':>10} "
+        f"{'peak rss':>9} {'heap':>8}"
+    )
+    for kb in sizes:
+        for mode in ("json", "frames"):
+            out = subprocess.run(
+                [
+                    "node",
+                    "--expose-gc",
+                    "--input-type=module",
+                    "-e",
+                    script,
+                    sys.executable,
+                    __file__,
+                    mode,
+                    str(kb),
+                    str(runs),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            samples = json.loads(out.stdout)
+            print(
+                f"{kb:>6}KB {mode:>7} "
+                f"{statistics.median(s['wall'] for s in samples):>7.1f}ms "
+                f"{statistics.median(s['parse'] for s in samples):>8.2f}ms "
+                f"{max(s['rss'] for s in samples) / 2**20:>7.1f}MB "
+                f"{max(s['heap'] for s in samples) / 2**20:>6.1f}MB"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bridge output mode benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 512, 2048])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--emit", choices=("json", "frames"), help=argparse.SUPPRESS)
+    parser.add_argument("--audio-kb", type=int, default=64, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.emit:
+        emit(args.emit, args.audio_kb)
+        return
+
+    python_side(args.sizes, args.runs)
+    if shutil.which("node"):
+        node_side(args.sizes, args.runs)
+    else:
+        print("\nnode not found: Node side not measured")
+
+
+if __name__ == "__main__":
+    main()
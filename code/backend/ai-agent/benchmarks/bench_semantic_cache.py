@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Lookup latency of the semantic cache index at increasing sizes.
+
+Uses random unit vectors, so no embedding model is needed. FAISS is used
+when installed; pass --no-faiss to measure the NumPy matrix path.
+
+    python3 benchmarks/bench_semantic_cache.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from semantic_cache import VectorIndex
+
+
+def random_unit_vectors(rng, count, dim):
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic cache lookup benchmark")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--no-faiss", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = random_unit_vectors(rng, args.queries, args.dim)
+
+    for size in args.sizes:
+        index = VectorIndex(args.dim, use_faiss=not args.no_faiss)
+        backend = "faiss" if index._faiss_index is not None else "numpy"
+
+        start = time.perf_counter()
+        # Insert in batches to mirror incremental growth without exhausting memory
+        for offset in range(0, size, 50_000):
+            batch = min(50_000, size - offset)
+            index.add(random_unit_vectors(rng, batch, args.dim), [None] * batch)
+        build = time.perf_counter() - start
+
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+
+        print(
+            f"{backend:>5} {size:>9,} entries: "
+            f"insert {build:.2f}s, "
+            f"lookup p50={samples[len(samples) // 2] * 1000:.2f}ms "
+            f"p99={samples[int(0.99 * (len(samples) - 1))] * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
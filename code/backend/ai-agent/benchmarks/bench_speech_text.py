@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Throughput of the speech normaliser against the old clean_markdown_for_tts.
+
+Builds multi-KB markdown responses (headings, bullets, bold, units, ranges,
+links) in each language and measures MB/s for the old seven-regex cleaner,
+speech_text.normalise on the whole text, and SpeechNormaliser fed in
+streamed deltas of --delta characters.
+
+    python3 benchmarks/bench_speech_text.py --size-kb 8 --number 200
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from speech_text import SpeechNormaliser, normalise
+
+BLOCKS = {
+    "en": (
+        "## Fertiliser plan\n\n"
+        "Great question! Here's how you can manage **nutrients** for paddy:\n\n"
+        "* **Urea**: apply 25 kg/ha in 2 splits.\n"
+        "* *Potash*: 10-15 kg per acre, keep soil pH 6.5-7.0.\n"
+        "1. Mix 1/2 litre of [neem oil](https://example.com/neem) in 10 L water\n"
+        "2. Spray below 30°C; yields rise by about 20%.\n\n"
+    ),
+    "ml": (
+        "## വള പ്രയോഗം\n\n"
+        "നല്ല ചോദ്യം! നെല്ലിന് **വളം** ഇങ്ങനെ നൽകാം:\n\n"
+        "* **യൂറിയ**: 25 kg/ha രണ്ട് തവണയായി നൽകുക.\n"
+        "* *പൊട്ടാഷ്*: ഏക്കറിന് 10-15 kg, മണ്ണിന്റെ pH 6.5-7.0.\n"
+        "1. 1/2 ലിറ്റർ [വേപ്പെണ്ണ](https://example.com/neem) 10 L വെള്ളത്തിൽ കലർത്തുക\n"
+        "2. 30°C ന് താഴെ തളിക്കുക; വിളവ് 20% കൂടും.\n\n"
+    ),
+    "hi": (
+        "## खाद योजना\n\n"
+        "अच्छा सवाल! धान के लिए **पोषक तत्व** ऐसे दें:\n\n"
+        "* **यूरिया**: 25 kg/ha दो बार में दें।\n"
+        "* *पोटाश*: 10-15 kg प्रति एकड़, मिट्टी का pH 6.5-7.0 रखें।\n"
+        "1. 1/2 लीटर [नीम तेल](https://example.com/neem) 10 L पानी में मिलाएं\n"
+        "2. 30°C से कम पर छिड़कें; उपज 20% बढ़ती है।\n\n"
+    ),
+}
+
+
+def old_clean_markdown_for_tts(text):
+    """The previous implementation, kept for comparison"""
+    text = re.sub(r"^\s*\*\s+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"\*+([^*]+)\*+", r"\1", text)
+    text = re.sub(r"\*", "", text)
+    text = re.sub(r"`([^`]+)`", r"\1", text)
+    text = re.sub(r"_([^_]+)_", r"\1", text)
+    text = re.sub(r"\n\s*\n", "\n", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def streamed(text, lang, delta):
+    normaliser = SpeechNormaliser(lang)
+    sentences = []
+    for i in range(0, len(text), delta):
+        sentences.extend(normaliser.feed(text[i : i + delta]))
+    sentences.extend(normaliser.flush())
+    return sentences
+
+
+def throughput(fn, text, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn(text)
+    elapsed = time.perf_counter() - start
+    return len(text.encode("utf-8")) * number / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speech normaliser benchmark")
+    parser.add_argument("--size-kb", type=int, default=8, help="Response size")
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument(
+        "--delta", type=int, default=12, help="Characters per streamed delta"
+    )
+    args = parser.parse_args()
+
+    print(f"{'lang':>4} {'old regexes':>12} {'normalise':>10} {'streamed':>10}  (MB/s)")
+    for lang, block in BLOCKS.items():
+        repeat = max(1, args.size_kb * 1024 // len(block.encode("utf-8")))
+        text = block * repeat
+        old = throughput(old_clean_markdown_for_tts, text, args.number)
+        new = throughput(lambda t: normalise(t, lang), text, args.number)
+        stream = throughput(
+            lambda t: streamed(t, lang, args.delta), text, max(1, args.number // 10)
+        )
+        print(f"{lang:>4} {old:>12.1f} {new:>10.1f} {stream:>10.1f}")
+
+    print("\nSample (en):")
+    print("  old:", old_clean_markdown_for_tts(BLOCKS["en"])[:150])
+    print("  new:", normalise(BLOCKS["en"])[:150])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the bridge.
+
+Runs `python -X importtime` on the bridge and LLM pipeline modules, prints the
+slowest imports and fails (exit 1) if the total passes --budget-ms or if any
+heavy client library is imported at startup instead of on first use.
+
+    python3 benchmarks/bench_startup.py --budget-ms 800
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+AI_AGENT = Path(__file__).resolve().parent.parent
+
+# Libraries that belong on the request paths that need them, never at import
+HEAVY_MODULES = (
+    "langchain_google_genai",
+    "langchain",
+    "langdetect",
+    "openai",
+    "whisper",
+    "torch",
+    "gtts",
+    "sentence_transformers",
+    "faiss",
+)
+
+
+def run_importtime(modules):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=AI_AGENT,
+        env={**os.environ, "BRIDGE_METRICS": "off"},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"Import failed:\n{proc.stderr}")
+
+    # Lines look like "import time:       self [us] |   cumulative | name"
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        # Nested imports are indented under the module that pulled them in
+        imports.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bridge startup import benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms", type=float, default=800, help="Max median import time"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        default=["malayalam_api_bridge", "llm_pipeline"],
+        help="Modules imported at startup",
+    )
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        imports = run_importtime(args.modules)
+        totals.append(sum(self_us for _, self_us, _ in imports) / 1000)
+
+    print(f"Startup imports: median {statistics.median(totals):.0f}ms over {args.runs} runs")
+    print("Slowest imports (cumulative, last run):")
+    # Only top-level names so nested packages are not double counted
+    top_level = [i for i in imports if not i[0].startswith(" ")]
+    for name, _, cumulative_us in sorted(top_level, key=lambda i: -i[2])[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    failed = False
+    loaded = {name.strip().split(".")[0] for name, _, _ in imports}
+    heavy = sorted(loaded.intersection(HEAVY_MODULES))
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if statistics.median(totals) > args.budget_ms:
+        print(f"❌ Over the {args.budget_ms:.0f}ms import budget")
+        failed = True
+    if not failed:
+        print(f"✅ Within the {args.budget_ms:.0f}ms budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-byte and time-to-first-audio for batch vs --stream output.
+
+Runs the bridge CLI in both modes for the same text query (real Gemini/gTTS
+calls, so a configured .env is required) and reports when the first output
+line, the first audio and the complete answer arrived.
+
+    python3 benchmarks/bench_streaming.py --runs 5 --text "how do I control stem borer in paddy"
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BRIDGE = Path(__file__).resolve().parent.parent / "malayalam_api_bridge.py"
+
+
+def run_once(text, stream):
+    args = [sys.executable, str(BRIDGE), "--text", text]
+    if stream:
+        args.append("--stream")
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        args,
+        cwd=BRIDGE.parent,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+    )
+    first_byte = first_audio = None
+    for line in proc.stdout:
+        now = time.perf_counter() - start
+        if first_byte is None:
+            first_byte = now
+        if first_audio is None and '"audio_base64"' in line:
+            event = json.loads(line)
+            if event.get("audio_base64"):
+                first_audio = now
+    proc.wait()
+    total = time.perf_counter() - start
+    return first_byte or total, first_audio or total, total
+
+
+def report(name, samples):
+    ttfb, ttfa, total = zip(*samples)
+    print(
+        f"{name:>6}: TTFB {statistics.median(ttfb) * 1000:.0f}ms, "
+        f"TTFA {statistics.median(ttfa) * 1000:.0f}ms, "
+        f"total {statistics.median(total) * 1000:.0f}ms (medians of {len(samples)})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming output benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--text", type=str, default="how do I control stem borer in paddy"
+    )
+    args = parser.parse_args()
+
+    report("batch", [run_once(args.text, stream=False) for _ in range(args.runs)])
+    report("stream", [run_once(args.text, stream=True) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
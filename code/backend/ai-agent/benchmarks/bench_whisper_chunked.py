@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Wall-clock speed-up of chunked local transcription against worker count.
+
+Synthesises long voice notes whose "words" are tones: each word's pitch
+encodes its position, with short gaps between words and longer pauses
+between sentences. By default a stand-in model transcribes them: it reads
+each word's pitch back, and burns CPU in proportion to the audio length
+(--work FFTs per second of audio) the way Whisper's decoding does. So both
+the speed-up and the stitching can be checked: the stitched transcript must
+be every word, in order, exactly once. The stand-in is installed in the
+model registry before the pool forks, the same way the real model is shared.
+
+--real transcribes the same clips with the local Whisper model instead. That
+reports speed only, since tones have no words.
+
+    python3 benchmarks/bench_whisper_chunked.py --seconds 60 120 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import whisper_chunked
+import whisper_models
+from audio_compact import FRAME_SECONDS, speech_frames, true_runs
+from audio_decode import SAMPLE_RATE
+
+BASE_HZ = 200
+STEP_HZ = 4
+
+
+def synth_note(seconds, rng):
+    """(pcm, number of words) for a note of about `seconds`"""
+    parts, word = [], 0
+    total = 0
+    while total < seconds * SAMPLE_RATE:
+        for _ in range(rng.integers(4, 10)):
+            n = int(rng.uniform(0.25, 0.5) * SAMPLE_RATE)
+            t = np.arange(n) / SAMPLE_RATE
+            pitch = BASE_HZ + STEP_HZ * word
+            parts.append(0.3 * np.sin(2 * np.pi * pitch * t) * np.hanning(n))
+            parts.append(np.zeros(int(rng.uniform(0.1, 0.2) * SAMPLE_RATE)))
+            word += 1
+        parts.append(np.zeros(int(rng.uniform(0.6, 1.5) * SAMPLE_RATE)))
+        total = sum(len(p) for p in parts)
+    pcm = np.concatenate(parts) + rng.normal(0, 0.002, total)
+    return pcm.astype(np.float32), word
+
+
+class ToneModel:
+    """Stand-in for a Whisper model: reads word numbers back from tone pitch"""
+
+    def __init__(self, work):
+        self.work = work
+
+    def transcribe(self, audio, language=None, **options):
+        noise = np.random.default_rng(0).normal(size=4096)
+        for _ in range(int(len(audio) / SAMPLE_RATE * self.work)):
+            np.fft.irfft(np.fft.rfft(noise))
+
+        frame = int(SAMPLE_RATE * FRAME_SECONDS)
+        words = []
+        for start, end in true_runs(speech_frames(audio, frame)):
+            burst = audio[start * frame : end * frame]
+            spectrum = np.abs(np.fft.rfft(burst, 8 * SAMPLE_RATE))
+            pitch = np.argmax(spectrum) / 8
+            words.append(f"w{round((pitch - BASE_HZ) / STEP_HZ)}")
+        return {"text": " ".join(words), "language": language}
+
+
+def reset_pool():
+    pool, whisper_chunked._pool = whisper_chunked._pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked Whisper benchmark")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[60, 120])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--work", type=int, default=400, help="Stand-in FFTs per audio second"
+    )
+    parser.add_argument("--real", action="store_true", help="Use local Whisper")
+    args = parser.parse_args()
+
+    if not args.real:
+        whisper_models._models[whisper_models.default_model_size()] = ToneModel(
+            args.work
+        )
+    # Per-chunk logging would drown the table
+    sys.stderr = open(os.devnull, "w")
+
+    print(f"CPUs: {os.cpu_count()}  model: {'whisper' if args.real else 'stand-in'}")
+    print(f"{'note':>6} {'workers':>7} {'chunks':>6} {'wall':>8} {'speed-up':>8}  text")
+    rng = np.random.default_rng(0)
+    for seconds in args.seconds:
+        pcm, word_count = synth_note(seconds, rng)
+        expected = " ".join(f"w{i}" for i in range(word_count))
+        baseline = None
+        for count in args.workers:
+            os.environ["WHISPER_WORKERS"] = str(count)
+            reset_pool()
+            whisper_chunked.start_pool()
+
+            start = time.perf_counter()
+            result = whisper_chunked.transcribe(pcm, language="ml")
+            wall = time.perf_counter() - start
+            baseline = baseline or wall
+
+            chunks = (
+                len(whisper_chunked.plan_chunks(pcm, *whisper_chunked._settings()[:2]))
+                if count > 1
+                else 1
+            )
+            check = (
+                ""
+                if args.real
+                else ("exact" if result["text"] == expected else "MISMATCH")
+            )
+            print(
+                f"{len(pcm) / SAMPLE_RATE:>5.0f}s {count:>7} {chunks:>6} "
+                f"{wall:>7.2f}s {baseline / wall:>7.2f}x  {check}"
+            )
+    reset_pool()
+
+
+if __name__ == "__main__":
+    main()
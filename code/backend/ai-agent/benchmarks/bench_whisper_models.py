@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the local Whisper fallback.
+
+Generates short synthetic WAV clips and transcribes them twice: once loading
+the model per request (the old behaviour) and once through whisper_models,
+which keeps the model resident. Needs openai-whisper and ffmpeg installed.
+
+    python3 benchmarks/bench_whisper_models.py --clips 5 --size base --threads 4
+"""
+
+import argparse
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SAMPLE_RATE = 16000
+
+
+def write_clip(path, seconds, seed):
+    """Write a mono 16 kHz clip of gliding tones over light noise"""
+    rng = random.Random(seed)
+    base = rng.uniform(120, 260)
+    frames = bytearray()
+    for n in range(int(seconds * SAMPLE_RATE)):
+        t = n / SAMPLE_RATE
+        tone = math.sin(2 * math.pi * (base + 40 * math.sin(2 * math.pi * 0.5 * t)) * t)
+        sample = 0.4 * tone + 0.05 * rng.uniform(-1, 1)
+        frames += struct.pack("<h", int(sample * 32767))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(bytes(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Whisper registry benchmark")
+    parser.add_argument("--clips", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--size", type=str, default="base")
+    parser.add_argument("--threads", type=str, default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        os.environ["WHISPER_THREADS"] = args.threads
+
+    import whisper
+    import whisper_models
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clips = []
+        for i in range(args.clips):
+            path = os.path.join(tmp, f"clip_{i}.wav")
+            write_clip(path, args.seconds, seed=i)
+            clips.append(path)
+
+        start = time.perf_counter()
+        for path in clips:
+            model = whisper.load_model(args.size, device="cpu")
+            model.transcribe(path, language="ml", fp16=False)
+        per_request = (time.perf_counter() - start) / len(clips)
+        del model
+
+        start = time.perf_counter()
+        for path in clips:
+            whisper_models.transcribe(path, language="ml", size=args.size)
+        resident = (time.perf_counter() - start) / len(clips)
+
+    stats = whisper_models.stats()
+    print(f"load per request : {per_request * 1000:.0f} ms/clip")
+    print(f"resident model   : {resident * 1000:.0f} ms/clip (incl. one-off load)")
+    print(
+        f"  load {stats['load_s']:.2f}s once, "
+        f"transcribe {stats['transcribe_s'] / max(stats['transcriptions'], 1):.2f}s/clip"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Fault-injection harness for the provider circuit breakers and hedging.
+
+Starts a local stub server standing in for the OpenAI transcription endpoint
+and for Gemini, then sends audio requests through process_request under a
+series of scenarios: a healthy run, OpenAI down (503) or hanging, Gemini down
+or hanging, OpenAI recovering mid-run, and a slow OpenAI tail with hedging.
+Each scenario runs with the breakers on and with them effectively off
+(a failure threshold no run can reach), and reports request latency, which
+STT provider answered and how many answers were LLM fallbacks.
+
+OpenAI is reached through the real SDK (OPENAI_BASE_URL points at the stub).
+Gemini is replaced by a small client whose invoke() posts to the stub, and
+local Whisper by a fixed --local-ms delay, since neither can be pointed at a
+local server.
+
+    python3 benchmarks/fault_injection.py --requests 20 --timeout 1.5
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# name, {endpoint: fault}, hedge, fault after which request index is lifted
+SCENARIOS = (
+    ("healthy", {}, False, None),
+    ("openai down", {"openai": "down"}, False, None),
+    ("openai hang", {"openai": "hang"}, False, None),
+    ("gemini down", {"gemini": "down"}, False, None),
+    ("gemini hang", {"gemini": "hang"}, False, None),
+    ("openai recovers", {"openai": "down"}, False, 0.5),
+    ("openai slow tail", {"openai": "tail"}, False, None),
+    ("openai slow tail + hedge", {"openai": "tail"}, True, None),
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        endpoint = "openai" if self.path.endswith("/audio/transcriptions") else "gemini"
+        self.server.hits[endpoint] += 1
+        fault = self.server.faults.get(endpoint)
+
+        if fault == "down":
+            return self._reply(503, {"error": {"message": "stub outage"}})
+        if fault == "hang":
+            time.sleep(self.server.hang_s)
+        elif (
+            fault == "tail" and self.server.hits[endpoint] % self.server.tail_every == 0
+        ):
+            time.sleep(self.server.tail_s)
+        else:
+            time.sleep(self.server.latency_s)
+
+        if endpoint == "openai":
+            return self._reply(200, {"text": "stub transcript about paddy"})
+        return self._reply(
+            200, {"title": "Stub", "response": "Apply urea.", "confidence": 90}
+        )
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(args):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.faults = {}
+    server.hits = {"openai": 0, "gemini": 0}
+    server.latency_s = args.latency_ms / 1000
+    server.tail_s = args.tail_ms / 1000
+    # Every n-th call is slow, so runs are repeatable
+    server.tail_every = max(1, round(1 / args.tail_fraction))
+    server.hang_s = args.timeout * 10
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+class StubGemini:
+    """Stands in for the structured Gemini client, posting to the stub server"""
+
+    def __init__(self, base_url):
+        self.url = base_url + "/gemini"
+
+    def invoke(self, llm_input):
+        import http_clients
+        from llm_pipeline import FarmingResponse
+
+        response = http_clients.get_session().post(
+            self.url, json={"input": str(llm_input)}, timeout=http_clients.timeouts()
+        )
+        response.raise_for_status()
+        return FarmingResponse.parse_obj(response.json())
+
+
+def install_fakes(base_url, local_ms, calls):
+    import llm_pipeline
+    import malayalam_api_bridge as bridge
+
+    def local_transcribe(audio_data):
+        calls["local"] += 1
+        time.sleep(local_ms / 1000)
+        return "local transcript about paddy"
+
+    llm_pipeline.structured_llm = StubGemini(base_url)
+    bridge._local_transcribe = local_transcribe
+    bridge.text_to_speech_bytes = lambda text, lang=None: None
+
+
+def run_scenario(server, scenario, breakers, count, audio, calls):
+    import malayalam_api_bridge as bridge
+    import provider_health
+
+    name, faults, hedge, lift_after = scenario
+    provider_health.reset()
+    if not breakers:
+        for provider in ("openai_stt", "local_stt", "gemini"):
+            provider_health._breakers[provider] = provider_health.CircuitBreaker(
+                provider, failure_threshold=10**9
+            )
+    os.environ["HEDGE"] = "1" if hedge else "0"
+    server.faults = dict(faults)
+    server.hits = {"openai": 0, "gemini": 0}
+    calls["local"] = 0
+
+    latencies = []
+    fallbacks = 0
+    for i in range(count):
+        if lift_after is not None and i == int(count * lift_after):
+            server.faults = {}
+        start = time.perf_counter()
+        result = bridge.process_request({"audio_base64": audio})
+        latencies.append(time.perf_counter() - start)
+        if not result.get("success") or not result.get("confidence"):
+            fallbacks += 1
+
+    latencies.sort()
+    states = ",".join(
+        f"{provider}={s['state']}" for provider, s in provider_health.snapshot().items()
+    )
+    print(
+        f"{name:>26} {'on' if breakers else 'off':>4} "
+        f"{statistics.median(latencies) * 1000:>8.0f} "
+        f"{latencies[int(0.95 * (len(latencies) - 1))] * 1000:>8.0f} "
+        f"{sum(latencies):>7.1f}s "
+        f"{server.hits['openai']:>6} {calls['local']:>5} {fallbacks:>5}  {states}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provider fault-injection harness")
+    parser.add_argument("--requests", type=int, default=20, help="Per scenario")
+    parser.add_argument(
+        "--timeout", type=float, default=1.5, help="HTTP read timeout (s)"
+    )
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--tail-ms", type=float, default=1000)
+    parser.add_argument("--tail-fraction", type=float, default=0.2)
+    parser.add_argument("--local-ms", type=float, default=300)
+    parser.add_argument("--reset", type=float, default=3.0, help="BREAKER_RESET (s)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args)
+    os.environ.update(
+        OPENAI_BASE_URL=base_url + "/v1",
+        OPENAI_API_KEY="stub",
+        GOOGLE_API_KEY="stub",
+        HTTP_READ_TIMEOUT=str(args.timeout),
+        BREAKER_RESET=str(args.reset),
+        HEDGE_MIN_DELAY="0.1",
+        # Hedge before the p95 has enough samples, so short runs exercise it
+        HEDGE_DEFAULT_DELAY="0.25",
+        RESPONSE_CACHE="off",
+        SEMANTIC_CACHE="off",
+        COALESCE="0",
+    )
+    # Bridge and pipeline logging would drown the table
+    sys.stderr = open(os.devnull, "w")
+
+    calls = {"local": 0}
+    install_fakes(base_url, args.local_ms, calls)
+    audio = base64.b64encode(os.urandom(4096)).decode()
+
+    print(
+        f"{'scenario':>26} {'brk':>4} {'p50 ms':>8} {'p95 ms':>8} {'total':>8} "
+        f"{'openai':>6} {'local':>5} {'fallb':>5}  breakers"
+    )
+    for scenario in SCENARIOS:
+        for breakers in (False, True):
+            run_scenario(server, scenario, breakers, args.requests, audio, calls)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test of the bridge against stub providers.
+
+Starts stub_providers (Gemini, OpenAI transcription and gTTS on one local
+server, each with its own latency distribution and error rate) and points
+the real clients at them. A load generator then drives one of:
+
+    bridge  process_request in this process, the resident worker's path
+    cli     malayalam_api_bridge.py main(), one process per request as the
+            Node route spawns it (includes interpreter start-up)
+    llm     generate_malayalam_response alone
+
+at each --concurrency level, and writes a JSON report for every level:
+throughput, latency p50/p95/p99, errors and fallbacks, peak RSS, a per-stage
+breakdown from metrics (mean ms per request) and the stub calls made.
+
+With --compare BASELINE.json the report is checked against an earlier one:
+a level whose throughput drops, or whose p95 rises, by more than
+--tolerance is listed and the exit status is 1. CI can keep the previous
+commit's report as the baseline.
+
+Response, semantic and TTS caches, FAQ answers and request coalescing are
+off, so every request reaches the stubs; --keep-caches leaves them as
+configured.
+
+    python3 benchmarks/load_test.py --concurrency 1 4 16 --requests 64 \\
+        --gemini 600,0.35,0.01 --output load_report.json
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from stub_providers import PROVIDERS, QUESTIONS, Profile, StubProviders
+
+BRIDGE_SCRIPT = Path(__file__).resolve().parent.parent / "malayalam_api_bridge.py"
+
+CACHES_OFF = {
+    "RESPONSE_CACHE": "off",
+    "SEMANTIC_CACHE": "off",
+    "TTS_CACHE": "0",
+    "FAQ_TIER": "0",
+    "COALESCE": "0",
+    # Stub "audio" is random bytes, so there is nothing to decode or trim
+    "AUDIO_COMPACT": "0",
+}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler:
+    """Peak resident memory of this process while a level runs"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+
+def make_requests(count, audio_fraction, seed):
+    import random
+
+    rng = random.Random(seed)
+    audio = base64.b64encode(rng.randbytes(16 * 1024)).decode()
+    requests = []
+    for i in range(count):
+        if rng.random() < audio_fraction:
+            requests.append({"audio_base64": audio})
+        else:
+            # Numbered so no two requests share a cache key
+            requests.append({"text": f"{rng.choice(QUESTIONS)} ({i})"})
+    return requests
+
+
+def run_bridge(request):
+    import malayalam_api_bridge
+
+    result = malayalam_api_bridge.process_request(request)
+    return result.get("success", False), result.get("confidence", 0) == 0, None
+
+
+def run_llm(request):
+    import llm_pipeline
+
+    response = llm_pipeline.generate_malayalam_response(
+        request.get("text") or QUESTIONS[0]
+    )
+    return True, response.confidence == 0, None
+
+
+def run_cli(request, env):
+    args = [sys.executable, str(BRIDGE_SCRIPT)]
+    stdin = None
+    if request.get("audio_base64"):
+        args.append("--audio-stdin")
+        stdin = base64.b64decode(request["audio_base64"])
+    if request.get("text"):
+        args += ["--text", request["text"]]
+    proc = subprocess.run(
+        args, input=stdin, capture_output=True, env=env, cwd=BRIDGE_SCRIPT.parent
+    )
+    if proc.returncode != 0:
+        return False, False, None
+    result = json.loads(proc.stdout)
+    return (
+        result.get("success", False),
+        result.get("confidence", 0) == 0,
+        result.get("metrics"),
+    )
+
+
+def merge_stages(target, snapshot):
+    for name, stage in (snapshot or {}).get("stages", {}).items():
+        merged = target.setdefault(name, {"count": 0, "sum_ms": 0.0})
+        merged["count"] += stage["count"]
+        merged["sum_ms"] += stage["sum_ms"]
+
+
+def run_level(driver, requests, concurrency, stub, env):
+    import metrics
+
+    metrics.reset()
+    stub.take_counts()
+    latencies, failures, fallbacks = [], 0, 0
+    stages = {}
+    lock = threading.Lock()
+
+    def one(request):
+        nonlocal failures, fallbacks
+        start = time.perf_counter()
+        try:
+            if driver == "cli":
+                ok, fallback, snapshot = run_cli(request, env)
+            else:
+                ok, fallback, snapshot = DRIVERS[driver](request)
+        except Exception as e:
+            print(f"Request failed: {e}", file=sys.stderr)
+            ok, fallback, snapshot = False, False, None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            failures += not ok
+            fallbacks += ok and fallback
+            merge_stages(stages, snapshot)
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, requests))
+        duration = time.perf_counter() - started
+
+    if driver != "cli":
+        merge_stages(stages, metrics.snapshot())
+    latencies.sort()
+    ms = [latency * 1000 for latency in latencies]
+    peak_rss = rss.peak
+    if driver == "cli":
+        peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "errors": failures,
+        "fallbacks": fallbacks,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(requests) / duration, 3),
+        "latency_ms": {
+            "p50": round(percentile(ms, 0.50), 1),
+            "p95": round(percentile(ms, 0.95), 1),
+            "p99": round(percentile(ms, 0.99), 1),
+            "mean": round(statistics.mean(ms), 1),
+            "max": round(ms[-1], 1),
+        },
+        "rss_mb": {
+            "peak": round(peak_rss, 1),
+            "end": round(current_rss_mb(), 1),
+        },
+        "stages": {
+            name: {
+                "count": stage["count"],
+                "mean_ms_per_request": round(stage["sum_ms"] / len(requests), 1),
+            }
+            for name, stage in sorted(stages.items())
+        },
+        "stub_calls": stub.take_counts(),
+    }
+
+
+DRIVERS = {"bridge": run_bridge, "llm": run_llm}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=BRIDGE_SCRIPT.parent,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Regression descriptions for levels present in both reports"""
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+    regressions = []
+    for level in report["levels"]:
+        before = previous.get(level["concurrency"])
+        if before is None:
+            continue
+        c = level["concurrency"]
+        if level["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"c={c}: throughput {before['throughput_rps']} -> "
+                f"{level['throughput_rps']} req/s"
+            )
+        if level["latency_ms"]["p95"] > before["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(
+                f"c={c}: p95 {before['latency_ms']['p95']} -> "
+                f"{level['latency_ms']['p95']} ms"
+            )
+    return regressions
+
+
+def print_summary(report):
+    print(
+        f"{'conc':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'err':>4} {'fallb':>5} {'rss MB':>7}"
+    )
+    for level in report["levels"]:
+        latency = level["latency_ms"]
+        print(
+            f"{level['concurrency']:>5} {level['throughput_rps']:>7.2f} "
+            f"{latency['p50']:>8.0f} {latency['p95']:>8.0f} {latency['p99']:>8.0f} "
+            f"{level['errors']:>4} {level['fallbacks']:>5} "
+            f"{level['rss_mb']['peak']:>7.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline bridge load test")
+    parser.add_argument("--driver", choices=("bridge", "cli", "llm"), default="bridge")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=64, help="Per level")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests")
+    parser.add_argument("--audio-fraction", type=float, default=0.3)
+    parser.add_argument("--answer-chars", type=int, default=600)
+    for provider in PROVIDERS:
+        parser.add_argument(
+            f"--{provider}",
+            type=Profile.parse,
+            help="median_ms[,sigma[,error_rate]]",
+        )
+    parser.add_argument("--keep-caches", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_report.json")
+    parser.add_argument("--compare", help="Baseline report to check against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--verbose", action="store_true", help="Keep bridge logs")
+    args = parser.parse_args()
+
+    profiles = {p: getattr(args, p) for p in PROVIDERS if getattr(args, p)}
+    stub = StubProviders(profiles, answer_chars=args.answer_chars).start()
+    os.environ.update(stub.env(), BRIDGE_METRICS="json")
+    if not args.keep_caches:
+        os.environ.update(CACHES_OFF)
+    env = {**os.environ, "PYTHONIOENCODING": "utf-8"}
+    if not args.verbose:
+        sys.stderr = open(os.devnull, "w")
+
+    for request in make_requests(args.warmup, args.audio_fraction, args.seed + 1):
+        if args.driver == "cli":
+            run_cli(request, env)
+        else:
+            DRIVERS[args.driver](request)
+
+    levels = []
+    for concurrency in args.concurrency:
+        requests = make_requests(args.requests, args.audio_fraction, args.seed)
+        levels.append(run_level(args.driver, requests, concurrency, stub, env))
+    stub.stop()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "driver": args.driver,
+            "requests_per_level": args.requests,
+            "audio_fraction": args.audio_fraction,
+            "answer_chars": args.answer_chars,
+            "caches": "as configured" if args.keep_caches else "off",
+            "providers": {p: stub.profiles[p].as_dict() for p in PROVIDERS},
+        },
+        "levels": levels,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_summary(report)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Local stand-ins for Gemini, OpenAI transcription and gTTS.
+
+One threaded HTTP server answers all three, so the real clients (the
+langchain Gemini client on its REST transport, the OpenAI SDK and the pooled
+gTTS class) can be pointed at it through GEMINI_BASE_URL, OPENAI_BASE_URL and
+GTTS_BASE_URL, and the whole pipeline runs without network or API quota:
+
+- Gemini generateContent answers the structured-output function call with a
+  FarmingResponse. streamGenerateContent streams the same answer as JSON
+  text in pieces, the way the JSON-mode client expects.
+- OpenAI /audio/transcriptions returns one of a set of farming questions.
+- gTTS batchexecute returns base64 "audio" sized like MP3 for the text.
+
+Each provider has a Profile: log-normal latency (median and spread) and an
+error rate, answered with a 503.
+
+    stub = StubProviders({"gemini": Profile(400, 0.3, 0.01)}).start()
+    os.environ.update(stub.env())
+"""
+
+import base64
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+PROVIDERS = ("gemini", "openai", "gtts")
+
+QUESTIONS = (
+    "നെല്ലിന് എത്ര യൂറിയ ഇടണം",
+    "തെങ്ങിന് കൊമ്പൻ ചെല്ലി ശല്യം എങ്ങനെ നിയന്ത്രിക്കാം",
+    "केले में तना घुन का इलाज क्या है",
+    "how much lime should I apply to acidic paddy soil",
+    "what is the best time to sow green gram after paddy",
+    "വാഴയ്ക്ക് പൊട്ടാഷ് എപ്പോൾ കൊടുക്കണം",
+)
+
+ANSWER = (
+    "നെല്ലിന് ഹെക്ടറിന് 90 കിലോ നൈട്രജൻ മൂന്ന് തവണയായി നൽകുക. "
+    "**അടിവളമായി** 45 കിലോ ഫോസ്ഫറസ് ചേർക്കുക. "
+    "Apply 1/3 of the nitrogen at planting, 1/3 at tillering and the rest at "
+    "panicle initiation. മണ്ണ് പരിശോധനയ്ക്ക് ശേഷം അളവ് ക്രമീകരിക്കുക. "
+)
+
+# Bytes of MP3 per character of text, about 32 kbit/s at normal speaking rate
+AUDIO_BYTES_PER_CHAR = 250
+
+
+class Profile:
+    """Latency (log-normal: median ms and sigma) and error rate of one provider"""
+
+    def __init__(self, median_ms=100.0, sigma=0.25, error_rate=0.0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+
+    @classmethod
+    def parse(cls, spec):
+        """Profile from "median_ms[,sigma[,error_rate]]" """
+        return cls(*(float(part) for part in spec.split(",")))
+
+    def delay(self):
+        if self.median_ms <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median_ms / 1000), self.sigma)
+
+    def fails(self):
+        return random.random() < self.error_rate
+
+    def as_dict(self):
+        return {
+            "median_ms": self.median_ms,
+            "sigma": self.sigma,
+            "error_rate": self.error_rate,
+        }
+
+
+DEFAULT_PROFILES = {
+    "gemini": Profile(600, 0.35),
+    "openai": Profile(400, 0.3),
+    "gtts": Profile(120, 0.3),
+}
+
+
+def _answer(answer_chars):
+    text = (ANSWER * (answer_chars // len(ANSWER) + 1))[:answer_chars]
+    return {"title": "നെല്ലിന് വളപ്രയോഗം", "response": text, "confidence": 85}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if ":streamGenerateContent" in self.path:
+            provider, reply = "gemini", self._gemini_stream
+        elif ":generateContent" in self.path:
+            provider, reply = "gemini", self._gemini
+        elif self.path.endswith("/audio/transcriptions"):
+            provider, reply = "openai", self._openai
+        elif "batchexecute" in self.path:
+            provider, reply = "gtts", self._gtts
+        else:
+            return self._send(404, b"{}", "application/json")
+
+        stub = self.server.stub
+        profile = stub.profiles[provider]
+        stub.count(provider, "calls")
+        delay = profile.delay()
+        if profile.fails():
+            stub.count(provider, "errors")
+            time.sleep(delay)
+            error = {"error": {"code": 503, "message": "stub outage"}}
+            return self._send(503, json.dumps(error).encode(), "application/json")
+        reply(body, delay)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _gemini(self, body, delay):
+        time.sleep(delay)
+        answer = _answer(self.server.stub.answer_chars)
+        reply = {
+            "candidates": [
+                {
+                    "content": {
+                        "parts": [
+                            {
+                                "functionCall": {
+                                    "name": "FarmingResponse",
+                                    "args": answer,
+                                }
+                            }
+                        ],
+                        "role": "model",
+                    },
+                    "finishReason": "STOP",
+                }
+            ],
+            "usageMetadata": {
+                "promptTokenCount": len(body) // 4,
+                "candidatesTokenCount": len(answer["response"]) // 4,
+            },
+        }
+        self._send(200, json.dumps(reply).encode(), "application/json")
+
+    def _gemini_stream(self, body, delay):
+        # A third of the latency before the first piece, the rest spread over them
+        text = json.dumps(_answer(self.server.stub.answer_chars), ensure_ascii=False)
+        pieces = [text[i : i + 48] for i in range(0, len(text), 48)]
+        time.sleep(delay / 3)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, piece in enumerate(pieces):
+                chunk = {
+                    "candidates": [
+                        {"content": {"parts": [{"text": piece}], "role": "model"}}
+                    ]
+                }
+                if i == len(pieces) - 1:
+                    chunk["usageMetadata"] = {
+                        "promptTokenCount": len(body) // 4,
+                        "candidatesTokenCount": len(text) // 4,
+                    }
+                data = ("[" if i == 0 else ",") + json.dumps(chunk)
+                if i == len(pieces) - 1:
+                    data += "]"
+                self._chunk(data.encode())
+                time.sleep(2 * delay / 3 / len(pieces))
+            self._chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _openai(self, body, delay):
+        time.sleep(delay)
+        reply = {"text": random.choice(QUESTIONS)}
+        self._send(200, json.dumps(reply).encode(), "application/json")
+
+    def _gtts(self, body, delay):
+        time.sleep(delay)
+        form = parse_qs(body.decode("utf-8"))
+        text = json.loads(json.loads(form["f.req"][0])[0][0][1])[0]
+        audio = b"\xff\xf3" * (AUDIO_BYTES_PER_CHAR * len(text) // 2)
+        encoded = base64.b64encode(audio).decode()
+        rpc = [["wrb.fr", "jQ1olc", json.dumps([encoded])]]
+        line = json.dumps(rpc, separators=(",", ":"))
+        self._send(200, f")]}}'\n\n{len(line)}\n{line}\n".encode(), "text/plain")
+
+    def log_message(self, *args):
+        pass
+
+
+class StubProviders:
+    def __init__(self, profiles=None, answer_chars=600):
+        self.profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        self.answer_chars = answer_chars
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def env(self):
+        """Environment pointing the bridge's clients at the stubs"""
+        return {
+            "GEMINI_BASE_URL": self.url,
+            "OPENAI_BASE_URL": self.url + "/v1",
+            "GTTS_BASE_URL": self.url,
+            "GOOGLE_API_KEY": "stub",
+            "OPENAI_API_KEY": "stub",
+        }
+
+    def count(self, provider, kind):
+        with self._lock:
+            key = f"{provider}_{kind}"
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def take_counts(self):
+        """Calls and errors per provider since the last take"""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
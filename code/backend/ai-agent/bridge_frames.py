@@ -0,0 +1,137 @@
+"""
+Length-prefixed binary output frames for the bridge.
+
+The default output is one JSON line with the MP3 inlined as base64. That
+costs a third more bytes plus a full copy of the audio on each side, and the
+reader has to buffer the whole line before it can parse any of it. With
+--output frames (or "output": "frames" in a worker request) a reply is
+instead a sequence of frames, each a 5-byte header (one ASCII kind byte and
+the payload length as a little-endian uint32) followed by the payload:
+
+    M  metadata: the usual result as UTF-8 JSON, without "audio_base64".
+       "audio_bytes" is the audio's length (0 when there is none) and, when
+       the audio went to a shared file, "audio_path" is that file.
+    A  audio: the raw MP3 bytes. Follows M when audio_bytes is non-zero and
+       there is no audio_path.
+
+Replies are self-delimiting, so a stdio worker can send one after another.
+With BRIDGE_AUDIO_DIR set (e.g. /dev/shm) the audio is written to a file
+there instead of an A frame; the reader owns the file and deletes it.
+
+Environment:
+    BRIDGE_AUDIO_DIR  directory for shared audio files (default: unset, A frames)
+"""
+
+import base64
+import json
+import os
+import struct
+import tempfile
+
+HEADER = struct.Struct("<cI")
+METADATA = b"M"
+AUDIO = b"A"
+
+
+def _audio_of(result):
+    """Pop the raw audio out of a result, which may carry it either way"""
+    audio = result.pop("audio", None)
+    encoded = result.pop("audio_base64", None)
+    if audio is None and encoded:
+        audio = base64.b64decode(encoded)
+    return audio or b""
+
+
+def _write_shared(audio, audio_dir):
+    fd, path = tempfile.mkstemp(prefix="bridge-audio-", suffix=".mp3", dir=audio_dir)
+    with os.fdopen(fd, "wb") as f:
+        f.write(audio)
+    return path
+
+
+def encode_reply(result, audio_dir=None):
+    """
+    Frames for one result, as a list of byte strings to write in order (the
+    audio is not copied into a single buffer). `result` is consumed.
+    """
+    if result.get("audio_path"):
+        # Already in a shared file, e.g. relayed from a pool worker
+        metadata = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        return [HEADER.pack(METADATA, len(metadata)), metadata]
+
+    audio = _audio_of(result)
+    audio_dir = audio_dir or os.getenv("BRIDGE_AUDIO_DIR")
+    result["audio_bytes"] = len(audio)
+    if audio and audio_dir:
+        result["audio_path"] = _write_shared(audio, audio_dir)
+
+    metadata = json.dumps(result, ensure_ascii=False).encode("utf-8")
+    frames = [HEADER.pack(METADATA, len(metadata)), metadata]
+    if audio and not audio_dir:
+        frames += [HEADER.pack(AUDIO, len(audio)), audio]
+    return frames
+
+
+def write_reply(out, result, audio_dir=None):
+    """Write one result's frames to a binary stream and flush it"""
+    for part in encode_reply(result, audio_dir):
+        out.write(part)
+    out.flush()
+
+
+def _read_frame(stream, expected):
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise EOFError("truncated frame header")
+    kind, length = HEADER.unpack(header)
+    if kind != expected:
+        raise ValueError(f"expected a {expected!r} frame, got {kind!r}")
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError("truncated frame")
+    return payload
+
+
+def read_reply(stream):
+    """
+    The next result from a binary stream, with its audio as bytes under
+    "audio" (read from, and then deleting, any shared file). None at EOF.
+    """
+    metadata = _read_frame(stream, METADATA)
+    if metadata is None:
+        return None
+    result = json.loads(metadata)
+    if result.get("audio_path"):
+        return inline_audio(result)
+    if result.get("audio_bytes"):
+        result["audio"] = _read_frame(stream, AUDIO)
+    return result
+
+
+def inline_audio(result):
+    """Move a result's shared audio file into it as bytes under "audio", deleting the file"""
+    path = result.pop("audio_path")
+    with open(path, "rb") as f:
+        result["audio"] = f.read()
+    os.unlink(path)
+    return result
+
+
+async def read_reply_async(reader):
+    """
+    read_reply for an asyncio StreamReader, leaving any "audio_path" for the
+    caller to pass on rather than reading the file.
+    """
+
+    async def frame(expected):
+        kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+        if kind != expected:
+            raise ValueError(f"expected a {expected!r} frame, got {kind!r}")
+        return await reader.readexactly(length)
+
+    result = json.loads(await frame(METADATA))
+    if result.get("audio_bytes") and not result.get("audio_path"):
+        result["audio"] = await frame(AUDIO)
+    return result
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Worker pool manager for the bridge.
+
+Runs a fixed number of pre-warmed `malayalam_api_bridge.py --worker`
+processes behind one Unix socket that speaks the same newline-delimited JSON
+protocol as a single worker (binary "output": "frames" replies included).
+Incoming jobs wait in a bounded queue; when the queue is full, or a job
+outlives its deadline, the caller gets the usual {"success": false,
+"error": ...} reply straight away instead of piling up more processes.
+
+Each worker handles one request at a time, so identical requests are
+coalesced here, before dispatch, rather than inside the workers: requests
+with the same text, audio and image bytes and output mode that arrive while
+one of them is running share its reply (see single_flight for why). As in
+the workers, a request whose chat already has history is answered on its
+own; that can only be checked against a history store the workers share
+(CONVERSATION=sqlite, the default), so with in-memory histories chat
+requests are never coalesced. A request that got another's reply records
+it in its own chat.
+
+Sending {"op": "stats"} returns queue length, worker utilisation, wait
+times and coalesced requests for sizing the pool.
+
+Environment:
+    BRIDGE_POOL_WORKERS      number of workers (default: CPU count)
+    BRIDGE_POOL_QUEUE_DEPTH  max queued jobs (default: 2 x workers)
+    BRIDGE_POOL_DEADLINE     seconds a job may take including queueing (default: 55)
+    COALESCE                 set to 0 to disable coalescing (default: on)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+import unicodedata
+from collections import deque
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+BRIDGE_SCRIPT = script_dir / "malayalam_api_bridge.py"
+
+# Replies carry base64 audio, so lines are far larger than asyncio's 64 KiB default
+STREAM_LIMIT = 64 * 1024 * 1024
+
+BUSY_ERROR = "AI service is busy. Please try again in a moment."
+TIMEOUT_ERROR = "AI processing timed out"
+
+# Seconds between attempts to restart a worker that failed to start
+RESTART_BACKOFF = 0.5
+RESTART_BACKOFF_MAX = 30.0
+
+
+class PoolStats:
+    """Counters and wait-time samples used to size the pool"""
+
+    def __init__(self, workers, queue_depth):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.started_at = time.monotonic()
+        self.busy_seconds = 0.0
+        self.busy_workers = 0
+        self.accepted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.restart_failures = 0
+        self.wait_times = deque(maxlen=1000)
+
+    def snapshot(self, queue_length):
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        waits = sorted(self.wait_times)
+        return {
+            "workers": self.workers,
+            "busy_workers": self.busy_workers,
+            "utilisation": round(self.busy_seconds / (uptime * self.workers), 4),
+            "queue_length": queue_length,
+            "queue_depth": self.queue_depth,
+            "accepted": self.accepted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "restart_failures": self.restart_failures,
+            "wait_ms": {
+                "mean": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "p95": (
+                    round(waits[int(0.95 * (len(waits) - 1))] * 1000, 1)
+                    if waits
+                    else 0.0
+                ),
+                "max": round(waits[-1] * 1000, 1) if waits else 0.0,
+            },
+            "uptime_s": round(uptime, 1),
+        }
+
+
+class Job:
+    def __init__(self, request, deadline):
+        self.request = request
+        self.enqueued_at = time.monotonic()
+        self.deadline = deadline
+        self.future = asyncio.get_running_loop().create_future()
+        # Set once the caller has been told the job timed out, so it counts once
+        self.timed_out = False
+
+
+class Flight:
+    """Identical requests waiting on the one that was dispatched"""
+
+    def __init__(self):
+        self.future = asyncio.get_running_loop().create_future()
+        self.followers = 0
+
+
+def coalesce_key(request):
+    """
+    Key under which identical requests share one reply: the text (NFC,
+    whitespace collapsed), the audio and image bytes, has_image and the
+    output mode. Unlike the workers' answer_key this is taken before
+    transcription, so spoken questions only match identical recordings.
+    None when an attached file cannot be read, so the request runs alone.
+    """
+    text = " ".join(unicodedata.normalize("NFC", request.get("text") or "").split())
+    digest = hashlib.sha256()
+    for part in (
+        text,
+        request.get("audio_base64") or "",
+        "1" if request.get("has_image") else "0",
+        request.get("output", "json"),
+    ):
+        digest.update(part.encode("utf-8") + b"\x1f")
+    for field in ("audio_file", "image_file"):
+        path = request.get(field)
+        if path:
+            try:
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                return None
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def fresh_chat(session_id):
+    """Whether every worker would see the chat as having no history yet"""
+    if not session_id:
+        return True
+    import conversation
+
+    store = conversation.get_conversation_store()
+    if store is None:
+        return True
+    # Each worker keeps its own in-memory histories, which the pool cannot see
+    if not isinstance(store, conversation.SQLiteStore):
+        return False
+    return not conversation.load(session_id)
+
+
+def record_shared_turn(request, reply):
+    """Record a reply shared from an identical request as this request's turn"""
+    import conversation
+    from malayalam_api_bridge import attach_image
+
+    session_id = request["session_id"]
+    # The question as the worker would have recorded it
+    question, _ = attach_image(
+        request, reply.get("transcribed_text") or (request.get("text") or "").strip()
+    )
+    conversation.record_turn(
+        session_id,
+        conversation.load(session_id),
+        question,
+        reply["title"],
+        reply["response_text"],
+    )
+
+
+class Worker:
+    """One resident bridge process speaking the stdio worker protocol"""
+
+    def __init__(self, index, siblings=1):
+        self.index = index
+        # Workers in the pool, so each sizes its own process pools to its share
+        self.siblings = siblings
+        self.proc = None
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(BRIDGE_SCRIPT),
+            "--worker",
+            cwd=str(script_dir),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env={
+                **os.environ,
+                "PYTHONIOENCODING": "utf-8",
+                "BRIDGE_POOL_WORKERS": str(self.siblings),
+            },
+            limit=STREAM_LIMIT,
+        )
+        print(
+            f"👷 Bridge worker {self.index} started (pid {self.proc.pid})",
+            file=sys.stderr,
+        )
+
+    async def restart(self):
+        if self.proc and self.proc.returncode is None:
+            self.proc.kill()
+            await self.proc.wait()
+        await self.start()
+
+    async def run(self, request, timeout):
+        self.proc.stdin.write(
+            (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+        )
+        await self.proc.stdin.drain()
+        if request.get("output") == "frames":
+            from bridge_frames import read_reply_async
+
+            try:
+                return await asyncio.wait_for(
+                    read_reply_async(self.proc.stdout), timeout
+                )
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("bridge worker exited")
+        line = await asyncio.wait_for(self.proc.stdout.readline(), timeout)
+        if not line:
+            raise ConnectionError("bridge worker exited")
+        return json.loads(line)
+
+
+class BridgePool:
+    def __init__(self, workers, queue_depth, deadline, coalesce=True):
+        self.deadline = deadline
+        self.coalesce = coalesce
+        self.queue = asyncio.Queue(maxsize=queue_depth)
+        self.workers = [Worker(i, workers) for i in range(workers)]
+        self.stats = PoolStats(workers, queue_depth)
+        self._flights = {}
+
+    async def start(self):
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+        for worker in self.workers:
+            asyncio.create_task(self._dispatch(worker))
+
+    def submit(self, request):
+        """Queue a request, returning a future for its reply or None when saturated"""
+        job = self._enqueue(request)
+        return job.future if job else None
+
+    def _enqueue(self, request):
+        job = Job(request, time.monotonic() + self.deadline)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            return None
+        self.stats.accepted += 1
+        return job
+
+    def _time_out(self, job):
+        if not job.timed_out:
+            job.timed_out = True
+            self.stats.timed_out += 1
+        return {"success": False, "error": TIMEOUT_ERROR}
+
+    async def _wait(self, job):
+        """The job's reply, or a timeout reply once its deadline has passed"""
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(job.future), job.deadline - time.monotonic()
+            )
+        except asyncio.TimeoutError:
+            return self._time_out(job)
+
+    async def _dispatch(self, worker):
+        while True:
+            job = await self.queue.get()
+            result = {"success": False, "error": "Processing failed"}
+            restart = False
+            try:
+                result, restart = await self._run_job(worker, job)
+            finally:
+                # Always answer the caller, whatever happened to the worker
+                if not job.future.done():
+                    job.future.set_result(result)
+            if restart:
+                await self._restart(worker)
+
+    async def _run_job(self, worker, job):
+        """The reply to one job, and whether the worker must be restarted"""
+        started = time.monotonic()
+        self.stats.wait_times.append(started - job.enqueued_at)
+
+        remaining = job.deadline - started
+        if remaining <= 0:
+            return self._time_out(job), False
+
+        self.stats.busy_workers += 1
+        try:
+            result = await worker.run(job.request, remaining)
+            self.stats.completed += 1
+            return result, False
+        except asyncio.TimeoutError:
+            return self._time_out(job), True
+        except Exception as e:
+            print(f"Bridge worker {worker.index} error: {e}", file=sys.stderr)
+            self.stats.failed += 1
+            return {"success": False, "error": f"Processing failed: {str(e)}"}, True
+        finally:
+            self.stats.busy_workers -= 1
+            self.stats.busy_seconds += time.monotonic() - started
+
+    async def _restart(self, worker):
+        """Restart a worker, retrying with backoff so the pool keeps its slot"""
+        delay = RESTART_BACKOFF
+        while True:
+            try:
+                await worker.restart()
+                return
+            except Exception as e:
+                self.stats.restart_failures += 1
+                print(
+                    f"Bridge worker {worker.index} restart failed: {e}; "
+                    f"retrying in {delay:.1f}s",
+                    file=sys.stderr,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RESTART_BACKOFF_MAX)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                reply, output = await self._handle_line(line)
+                if output == "frames":
+                    from bridge_frames import encode_reply
+
+                    writer.writelines(encode_reply(reply))
+                else:
+                    writer.write(
+                        (json.dumps(reply, ensure_ascii=False) + "\n").encode()
+                    )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_line(self, line):
+        """The reply to one request line and the output mode it asked for"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {"success": False, "error": f"Invalid request: {str(e)}"}, "json"
+
+        output = request.get("output", "json")
+        if request.get("op") == "stats":
+            stats = self.stats.snapshot(self.queue.qsize())
+            return {"success": True, "stats": stats}, output
+
+        if self.coalesce:
+            reply = await self._run_coalesced(request)
+        else:
+            reply = await self._run(request)
+
+        if request.get("id") is not None:
+            reply["id"] = request["id"]
+        return reply, output
+
+    async def _run(self, request):
+        job = self._enqueue(request)
+        if job is None:
+            return {"success": False, "error": BUSY_ERROR}
+        # The worker only checks the deadline when it picks the job up
+        return await self._wait(job)
+
+    async def _run_coalesced(self, request):
+        """_run, sharing one reply between identical requests in flight"""
+        try:
+            if await asyncio.to_thread(fresh_chat, request.get("session_id")):
+                key = await asyncio.to_thread(coalesce_key, request)
+            else:
+                key = None
+        except Exception as e:
+            print(f"Coalescing check failed: {e}", file=sys.stderr)
+            key = None
+        if key is None:
+            return await self._run(request)
+
+        flight = self._flights.get(key)
+        if flight is None:
+            return await self._lead(key, request)
+        return await self._follow(flight, request)
+
+    async def _lead(self, key, request):
+        flight = self._flights[key] = Flight()
+        reply = {"success": False, "error": "Processing failed"}
+        try:
+            reply = await self._run(request)
+            if flight.followers and reply.get("audio_path"):
+                from bridge_frames import inline_audio
+
+                # Each caller deletes the file it is handed, so share the bytes
+                reply = await asyncio.to_thread(inline_audio, reply)
+        finally:
+            # Always answer the followers, whatever happened to this caller
+            del self._flights[key]
+            flight.future.set_result(reply)
+        return dict(reply)
+
+    async def _follow(self, flight, request):
+        flight.followers += 1
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(flight.future), self.deadline)
+        except asyncio.TimeoutError:
+            self.stats.timed_out += 1
+            return {"success": False, "error": TIMEOUT_ERROR}
+
+        self.stats.coalesced += 1
+        reply = dict(reply)
+        reply.pop("id", None)
+        if (
+            request.get("session_id")
+            and reply.get("success")
+            and not reply.get("fallback")
+        ):
+            await asyncio.to_thread(record_shared_turn, request, reply)
+        return reply
+
+
+async def serve(socket_path, workers, queue_depth, deadline, coalesce):
+    pool = BridgePool(workers, queue_depth, deadline, coalesce)
+    await pool.start()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(
+        pool.handle_client, path=socket_path, limit=STREAM_LIMIT
+    )
+    print(
+        f"🚀 Bridge pool listening on {socket_path} "
+        f"({workers} workers, queue depth {queue_depth}, deadline {deadline}s"
+        f"{'' if coalesce else ', no coalescing'})",
+        file=sys.stderr,
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    default_workers = int(os.getenv("BRIDGE_POOL_WORKERS", os.cpu_count() or 1))
+
+    parser = argparse.ArgumentParser(description="AI Farming Assistant bridge pool")
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=os.getenv("AI_BRIDGE_SOCKET", "/tmp/ai_bridge.sock"),
+        help="Unix socket path to listen on",
+    )
+    parser.add_argument("--workers", type=int, default=default_workers)
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=int(os.getenv("BRIDGE_POOL_QUEUE_DEPTH", 2 * default_workers)),
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=float(os.getenv("BRIDGE_POOL_DEADLINE", "55")),
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(
+            serve(
+                args.socket,
+                max(1, args.workers),
+                max(1, args.queue_depth),
+                args.deadline,
+                os.getenv("COALESCE", "1").lower() not in ("0", "false", "no", "off"),
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
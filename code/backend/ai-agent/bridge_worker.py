@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Resident worker mode for malayalam_api_bridge.
+
+Instead of spawning a fresh interpreter per /chat request, a worker imports
+the pipeline once and then serves newline-delimited JSON requests, either on
+stdin/stdout or on a Unix socket. Each request line carries the same fields as
+the bridge CLI flags:
+
+    {"id": "42", "text": "...", "audio_file": "...", "image_file": "...", "has_image": false}
+
+Audio can also be sent inline as "audio_base64" instead of an "audio_file"
+path, so callers need not write it to disk first. A "session_id" (the chat
+id) has the chat's earlier turns sent as context; see conversation.
+
+and gets back exactly one line holding the usual bridge result, with the
+request "id" echoed so callers can match replies. A request with
+"output": "frames" gets its reply as binary frames with the audio raw instead
+(see bridge_frames).
+
+In socket mode requests run concurrently, and identical ones (same
+normalised text, language and image, outside a chat session) share a single
+LLM + TTS computation; see single_flight. {"op": "metrics"} reports how many
+upstream calls that saved under "coalescing", and each provider's circuit
+breaker under "providers". Stdio workers take one request at a time, so
+under bridge_pool the pool manager does the coalescing instead.
+"""
+
+import json
+import os
+import socketserver
+import sys
+
+import metrics
+import provider_health
+from malayalam_api_bridge import process_request
+
+
+def warm_up():
+    """Build the Gemini client and FAQ index (and optionally local Whisper) before the first request"""
+    try:
+        import llm_pipeline
+
+        # Clients are built lazily, so build them now rather than on request one
+        llm_pipeline.get_structured_llm()
+        llm_pipeline.get_streaming_llm()
+    except Exception as e:
+        print(f"Worker warm-up failed: {e}", file=sys.stderr)
+
+    try:
+        import faq_index
+
+        # Builds or maps the FAQ index now rather than on request one
+        faq_index.get_faq_index()
+    except Exception as e:
+        print(f"FAQ index warm-up failed: {e}", file=sys.stderr)
+
+    if os.getenv("WHISPER_PRELOAD", "").lower() in ("1", "true", "yes"):
+        import whisper_chunked
+        import whisper_models
+
+        whisper_models.preload()
+        # Forked now, before the server threads start; never while serving
+        try:
+            whisper_chunked.start_pool()
+        except Exception as e:
+            print(f"Local Whisper pool failed to start: {e}", file=sys.stderr)
+
+    print("🔥 Bridge worker warmed up", file=sys.stderr)
+
+
+def coalescing_stats():
+    from single_flight import get_coalescer
+
+    coalescer = get_coalescer()
+    if coalescer is None:
+        return None
+    return {**coalescer.stats.as_dict(), "in_flight": coalescer.in_flight()}
+
+
+def handle_line(line):
+    """Decode one request line, run it and return the encoded reply bytes"""
+    request_id = None
+    output = "json"
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+        request_id = request.get("id")
+        output = request.get("output", "json")
+        if request.get("op") == "metrics":
+            result = {
+                "success": True,
+                "metrics": metrics.export(),
+                "coalescing": coalescing_stats(),
+                "providers": provider_health.snapshot(),
+            }
+        else:
+            result = process_request(request, raw_audio=output == "frames")
+    except ValueError as e:
+        result = {"success": False, "error": f"Invalid request: {str(e)}"}
+    except Exception as e:
+        print(f"Worker error: {e}", file=sys.stderr)
+        result = {"success": False, "error": f"Processing failed: {str(e)}"}
+
+    if request_id is not None:
+        result["id"] = request_id
+    if output == "frames":
+        from bridge_frames import encode_reply
+
+        return b"".join(encode_reply(result))
+    return (json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def serve_stdio():
+    """Serve requests read from stdin, writing one reply line per request to stdout"""
+    out = sys.stdout.buffer
+    # Anything else printed while handling a request must not corrupt the protocol
+    sys.stdout = sys.stderr
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        out.write(handle_line(line))
+        out.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode("utf-8")
+            if not line.strip():
+                continue
+            self.wfile.write(handle_line(line))
+            self.wfile.flush()
+
+
+class _WorkerServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve_socket(socket_path):
+    """Serve requests on a Unix socket, one thread per connection"""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    sys.stdout = sys.stderr
+    server = _WorkerServer(socket_path, _RequestHandler)
+    print(f"🚀 Bridge worker listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def serve(socket_path=None):
+    warm_up()
+    try:
+        if socket_path:
+            serve_socket(socket_path)
+        else:
+            serve_stdio()
+    finally:
+        import http_clients
+
+        http_clients.close()
+
+
+if __name__ == "__main__":
+    serve(socket_path=sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,350 @@
+"""
+Rolling conversation history for generate_malayalam_response.
+
+Each chat (session id) keeps its latest turns verbatim and folds older ones
+into a short summary, so follow-up questions ("what about for banana?") are
+answered in context while the history sent to Gemini stays within a fixed
+token budget. A folded turn becomes one summary line: the question and the
+answer's title and first sentence, both clipped. Summary lines beyond their
+share of the budget are dropped oldest first. Summarising this way costs no
+extra model call.
+
+Token counts here are estimates from character counts (Indic scripts take
+more tokens per character than English); the real prompt size is read from
+Gemini's usage metadata and recorded by llm_pipeline.
+
+Histories live in memory or in a SQLite file. The one-shot CLI bridge and
+every pool worker start with an empty memory, so SQLite is the default.
+
+Environment:
+    CONVERSATION               sqlite | memory | off (default: sqlite)
+    CONVERSATION_PATH          SQLite file (default: .cache/conversations.sqlite3)
+    CONVERSATION_TTL           seconds a silent chat is kept (default: 604800)
+    CONVERSATION_SIZE          max chats kept (default: 10000)
+    CONVERSATION_TOKEN_BUDGET  max estimated tokens of history per prompt (default: 1500)
+    CONVERSATION_RECENT_TURNS  turns kept verbatim (default: 4)
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+
+# Share of the budget the summary of older turns may take
+SUMMARY_SHARE = 0.3
+SUMMARY_CLIP_CHARS = 160
+
+_sentence_end_re = re.compile(r"(?<=[.!?।])\s+")
+
+
+def estimate_tokens(text):
+    """Rough token count: about 4 characters per token for ASCII, 2 for other scripts"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def clip(text, chars):
+    """`text` on one line in at most `chars` characters, ending in … when cut"""
+    text = " ".join((text or "").split())
+    if len(text) <= chars:
+        return text
+    # No room for any text before the ellipsis
+    if chars <= 1:
+        return ""
+    return text[: chars - 1].rstrip() + "…"
+
+
+def token_budget():
+    return int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500"))
+
+
+def recent_turns():
+    return max(1, int(os.getenv("CONVERSATION_RECENT_TURNS", "4")))
+
+
+class Conversation:
+    """History of one chat: recent turns verbatim, older ones as summary lines"""
+
+    def __init__(self, turns=None, summary=None, folded_tokens=0, turn_count=0):
+        # Each turn: {"question", "title", "answer"}
+        self.turns = list(turns or [])
+        self.summary = list(summary or [])
+        # Estimated tokens of every folded turn, had it been sent verbatim
+        self.folded_tokens = folded_tokens
+        self.turn_count = turn_count
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def as_dict(self):
+        return {
+            "turns": self.turns,
+            "summary": self.summary,
+            "folded_tokens": self.folded_tokens,
+            "turn_count": self.turn_count,
+        }
+
+    def __bool__(self):
+        return bool(self.turns or self.summary)
+
+    @staticmethod
+    def _turn_tokens(turn):
+        return estimate_tokens(turn["question"]) + estimate_tokens(turn["answer"])
+
+    def summary_text(self):
+        return "\n".join(self.summary)
+
+    def history_tokens(self):
+        """Estimated tokens of the history as it is sent"""
+        return estimate_tokens(self.summary_text()) + sum(
+            self._turn_tokens(turn) for turn in self.turns
+        )
+
+    def full_tokens(self):
+        """Estimated tokens of the whole history had every turn been sent verbatim"""
+        return self.folded_tokens + sum(self._turn_tokens(turn) for turn in self.turns)
+
+    def _fold_oldest(self):
+        turn = self.turns.pop(0)
+        first_sentence = _sentence_end_re.split(turn["answer"].strip(), 1)[0]
+        self.summary.append(
+            f"- Q: {clip(turn['question'], SUMMARY_CLIP_CHARS)} | "
+            f"A: {clip(turn['title'], 60)}: {clip(first_sentence, SUMMARY_CLIP_CHARS)}"
+        )
+        self.folded_tokens += self._turn_tokens(turn)
+
+    def add_turn(self, question, title, answer, budget=None, keep=None):
+        """Append a turn, then fold and drop older ones until the history fits"""
+        budget = token_budget() if budget is None else budget
+        keep = recent_turns() if keep is None else keep
+        self.turns.append({"question": question, "title": title, "answer": answer})
+        self.turn_count += 1
+
+        while len(self.turns) > keep:
+            self._fold_oldest()
+        # The latest turn stays verbatim even when it alone is over budget
+        while len(self.turns) > 1 and self.history_tokens() > budget:
+            self._fold_oldest()
+
+        summary_budget = int(budget * SUMMARY_SHARE)
+        while self.summary and estimate_tokens(self.summary_text()) > summary_budget:
+            self.summary.pop(0)
+
+    def recent(self, budget=None):
+        """
+        (question, answer) pairs to send verbatim. The latest answer is
+        clipped when it alone would exceed what the budget leaves, and the
+        turn is left out when no room is left for its answer at all.
+        """
+        budget = token_budget() if budget is None else budget
+        room = budget - self.history_tokens()
+        pairs = [(turn["question"], turn["answer"]) for turn in self.turns]
+        if pairs and room < 0:
+            question, answer = pairs[-1]
+            keep_tokens = max(0, estimate_tokens(answer) + room)
+            answer = clip(answer, keep_tokens * 2)
+            if answer:
+                pairs[-1] = (question, answer)
+            else:
+                pairs.pop()
+        return pairs
+
+
+class MemoryStore:
+    """In-process LRU of conversations with a TTL since the last turn"""
+
+    def __init__(self, max_sessions=10000, ttl=604800):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] < time.time():
+                self._sessions.pop(session_id, None)
+                return None
+            self._sessions.move_to_end(session_id)
+            return Conversation.from_dict(entry[1])
+
+    def put(self, session_id, conversation):
+        with self._lock:
+            self._put(session_id, conversation)
+
+    def update(self, session_id, change):
+        """Apply change(conversation) to the stored history and save it, atomically"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] < time.time():
+                conversation = Conversation()
+            else:
+                conversation = Conversation.from_dict(entry[1])
+            change(conversation)
+            self._put(session_id, conversation)
+        return conversation
+
+    def _put(self, session_id, conversation):
+        self._sessions[session_id] = (time.time() + self.ttl, conversation.as_dict())
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteStore:
+    """Conversations on disk, shared by every bridge process on the host"""
+
+    def __init__(self, path, max_sessions=10000, ttl=604800):
+        self.path = str(path)
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            " session_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS conversations_updated"
+            " ON conversations (updated_at)"
+        )
+        self._conn.commit()
+
+    def get(self, session_id):
+        with self._lock:
+            return self._get(session_id, time.time())
+
+    def put(self, session_id, conversation):
+        with self._lock:
+            self._put(session_id, conversation, time.time())
+            self._conn.commit()
+
+    def update(self, session_id, change):
+        """
+        Apply change(conversation) to the stored history and save it in one
+        write transaction, so concurrent turns of a chat, from any process,
+        each see the other's and none is lost
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                conversation = self._get(session_id, now) or Conversation()
+                change(conversation)
+                self._put(session_id, conversation, now)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return conversation
+
+    def _get(self, session_id, now):
+        row = self._conn.execute(
+            "SELECT state, updated_at FROM conversations WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None or row[1] + self.ttl < now:
+            return None
+        return Conversation.from_dict(json.loads(row[0]))
+
+    def _put(self, session_id, conversation, now):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)",
+            (
+                session_id,
+                json.dumps(conversation.as_dict(), ensure_ascii=False),
+                now,
+            ),
+        )
+        self._conn.execute(
+            "DELETE FROM conversations WHERE updated_at < ?", (now - self.ttl,)
+        )
+        self._conn.execute(
+            "DELETE FROM conversations WHERE session_id IN ("
+            " SELECT session_id FROM conversations ORDER BY updated_at DESC"
+            " LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[
+                0
+            ]
+
+
+_store = None
+_store_initialised = False
+
+
+def get_conversation_store():
+    """Return the process-wide store configured from the environment, or None when disabled"""
+    global _store, _store_initialised
+    if _store_initialised:
+        return _store
+    _store_initialised = True
+
+    backend = os.getenv("CONVERSATION", "sqlite").lower()
+    ttl = float(os.getenv("CONVERSATION_TTL", "604800"))
+    size = int(os.getenv("CONVERSATION_SIZE", "10000"))
+
+    try:
+        if backend == "memory":
+            _store = MemoryStore(max_sessions=size, ttl=ttl)
+        elif backend == "sqlite":
+            path = os.getenv(
+                "CONVERSATION_PATH",
+                str(script_dir / ".cache" / "conversations.sqlite3"),
+            )
+            _store = SQLiteStore(path, max_sessions=size, ttl=ttl)
+    except Exception as e:
+        print(f"Conversation history disabled: {e}", file=sys.stderr)
+        _store = None
+    return _store
+
+
+def load(session_id):
+    """The chat's history, or None without a session id or a store"""
+    store = get_conversation_store() if session_id else None
+    if store is None:
+        return None
+    try:
+        return store.get(session_id) or Conversation()
+    except Exception as e:
+        print(f"Conversation load failed: {e}", file=sys.stderr)
+        return Conversation()
+
+
+def record_turn(session_id, conversation, question, title, answer):
+    """
+    Add an answered turn to the chat's history and save it. `conversation`
+    is the history loaded for this turn; the turn is added to the stored
+    one, re-read when saving, so a turn saved meanwhile is kept.
+    """
+    if conversation is None:
+        return
+    try:
+        get_conversation_store().update(
+            session_id, lambda stored: stored.add_turn(question, title, answer)
+        )
+    except Exception as e:
+        print(f"Conversation save failed: {e}", file=sys.stderr)
@@ -0,0 +1,474 @@
+"""
+Local FAQ answer tier in front of the Gemini call.
+
+Most questions are standard agronomy (fertiliser doses, paddy pests, soil
+pH) that a curated knowledge base answers as well as the model does. This
+module keeps a BM25 inverted index over knowledge_base/faq.json, whose
+entries carry question variants, a title and an answer in Malayalam, Hindi
+and English. A query whose best match clears FAQ_MIN_CONFIDENCE is answered
+from the knowledge base in about a millisecond, without an API call.
+
+Tokenisation:
+- NFKC, casefold, ZWJ/ZWNJ removed and atomic Malayalam chillus spelled out,
+  so the different ways keyboards encode the same word agree
+- Latin, Devanagari and Malayalam runs are tokens; a few function words in
+  each language are dropped
+- Malayalam and Hindi add case and postposition suffixes to the stem
+  (നെല്ല് / നെല്ലിന് / നെല്ലിന്റെ), so Indic tokens are truncated to their
+  first INDIC_STEM codepoints; English gets a light suffix stripper
+
+BM25 ranks the entries; confidence is two-sided. The query side is the
+share of the query's IDF weight found in the entry, so words the knowledge
+base has never seen ("sugarcane", "tea") pull it down. The entry side is
+the largest share of one question variant's (or the title's) IDF weight
+found in the query, so a query that only names the crop does not match an
+entry about one pest of it. Confidence is their harmonic mean. A match is only answered when the
+query has at least FAQ_MIN_TERMS index terms, its confidence clears
+FAQ_MIN_CONFIDENCE and it leads the next entry by FAQ_MIN_MARGIN.
+
+The index is one binary file, memory-mapped read-only, so every worker on
+the host shares the same pages. It records a digest of the knowledge base
+and is rebuilt (under a file lock, written atomically) when that changes;
+tokenised entries are cached by content hash, so a rebuild only tokenises
+entries that were added or edited. Workers check the knowledge base for
+changes every FAQ_RELOAD_INTERVAL seconds.
+
+Environment:
+    FAQ_TIER             set to 0 to disable (default: on)
+    FAQ_KB               knowledge base JSON (default: knowledge_base/faq.json)
+    FAQ_INDEX_DIR        index directory (default: .cache/faq)
+    FAQ_MIN_CONFIDENCE   match confidence needed to answer, 0-1 (default: 0.7)
+    FAQ_MIN_MARGIN       confidence lead needed over the next entry (default: 0.15)
+    FAQ_MIN_TERMS        index terms a query needs to be answered (default: 2)
+    FAQ_RELOAD_INTERVAL  seconds between knowledge base checks (default: 30)
+"""
+
+import bisect
+import fcntl
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+script_dir = Path(__file__).resolve().parent
+
+K1 = 1.2
+B = 0.75
+INDIC_STEM = 5
+# Entries rescored with the two-sided confidence
+CANDIDATES = 8
+LANGS = ("en", "ml", "hi")
+
+INDEX_FILE = "faq.idx"
+TOKENS_FILE = "tokens.json"
+MAGIC = b"FAQIDX01"
+# magic, documents, terms, average document length, knowledge base digest
+_HEADER = struct.Struct("<8sIIf16s4x")
+# entry, language, length in terms
+_DOC = struct.Struct("<HBxI")
+
+_token_re = re.compile(r"[0-9a-z]+|[\u0900-\u0963\u0966-\u097f]+|[\u0d00-\u0d7f]+")
+_spelling = str.maketrans(
+    {
+        "\u200c": None,
+        "\u200d": None,
+        "\u0d7a": "\u0d23\u0d4d",
+        "\u0d7b": "\u0d28\u0d4d",
+        "\u0d7c": "\u0d30\u0d4d",
+        "\u0d7d": "\u0d32\u0d4d",
+        "\u0d7e": "\u0d33\u0d4d",
+        "\u0d7f": "\u0d15\u0d4d",
+    }
+)
+
+STOPWORDS = frozenset(
+    (
+        # English
+        "a an and are at be by can do does for from how i in is it my of on or "
+        "should the this to what when which with you your"
+        # Hindi
+        " और का कि की के को क्या है हैं में से पर भी तो ही"
+        # Malayalam
+        " ഒരു എന്ന എന്ത് ആണ് ഉണ്ട് ഞാൻ എന്റെ"
+    )
+    .translate(_spelling)
+    .split()
+)
+
+
+def _english_stem(token):
+    token = token.replace("iz", "is")
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Index terms for `text` in any of the three languages"""
+    text = unicodedata.normalize("NFKC", text or "").casefold().translate(_spelling)
+    terms = []
+    for token in _token_re.findall(text):
+        if token in STOPWORDS:
+            continue
+        if token[0] > "z":
+            terms.append(token[:INDIC_STEM])
+        else:
+            terms.append(_english_stem(token))
+    return terms
+
+
+def _term_hash(term):
+    return int.from_bytes(
+        hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def _entry_digest(entry):
+    raw = json.dumps(
+        [entry.get("questions"), entry.get("title")], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _document_terms(entry):
+    """Term counts per language for one knowledge base entry"""
+    counts = {}
+    for lang in LANGS:
+        questions = entry.get("questions", {}).get(lang) or []
+        title = entry.get("title", {}).get(lang) or ""
+        if questions or title:
+            counts[lang] = Counter(tokenize(" ".join(questions + [title])))
+    return counts
+
+
+def load_knowledge_base(kb_path):
+    """(entries, digest) for the knowledge base file"""
+    with open(kb_path, "rb") as f:
+        raw = f.read()
+    entries = json.loads(raw)["entries"]
+    return entries, hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def build_index(kb_path, index_dir):
+    """
+    Write the binary index for `kb_path` into `index_dir`, tokenising only
+    entries not seen by the previous build. Returns build statistics.
+    """
+    started = time.perf_counter()
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    entries, kb_digest = load_knowledge_base(kb_path)
+
+    tokens_path = index_dir / TOKENS_FILE
+    try:
+        with open(tokens_path, encoding="utf-8") as f:
+            token_cache = json.load(f)
+    except (OSError, ValueError):
+        token_cache = {}
+
+    docs = []
+    new_cache = {}
+    reused = 0
+    for entry_index, entry in enumerate(entries):
+        digest = _entry_digest(entry)
+        counts = token_cache.get(digest)
+        if counts is None:
+            counts = _document_terms(entry)
+        else:
+            reused += 1
+        new_cache[digest] = counts
+        for lang, terms in counts.items():
+            docs.append((entry_index, LANGS.index(lang), terms))
+
+    postings = {}
+    for doc_id, (_, _, terms) in enumerate(docs):
+        for term, tf in terms.items():
+            postings.setdefault(_term_hash(term), []).append((doc_id, tf))
+    hashes = sorted(postings)
+    lengths = [sum(terms.values()) for _, _, terms in docs]
+    avgdl = sum(lengths) / len(lengths) if lengths else 0.0
+
+    term_table = array("I")
+    posting_data = array("I")
+    for term_hash in hashes:
+        term_table.extend((len(posting_data) // 2, len(postings[term_hash])))
+        for doc_id, tf in postings[term_hash]:
+            posting_data.extend((doc_id, tf))
+
+    body = bytearray(_HEADER.pack(MAGIC, len(docs), len(hashes), avgdl, kb_digest))
+    for (entry_index, lang, _), length in zip(docs, lengths):
+        body += _DOC.pack(entry_index, lang, length)
+    body += array("Q", hashes).tobytes()
+    body += term_table.tobytes()
+    body += posting_data.tobytes()
+
+    # Written aside and renamed, so workers mapping the old file are unaffected
+    tmp_path = index_dir / f"{INDEX_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, index_dir / INDEX_FILE)
+    tmp_tokens = index_dir / f"{TOKENS_FILE}.{os.getpid()}.tmp"
+    with open(tmp_tokens, "w", encoding="utf-8") as f:
+        json.dump(new_cache, f, ensure_ascii=False)
+    os.replace(tmp_tokens, tokens_path)
+
+    return {
+        "entries": len(entries),
+        "documents": len(docs),
+        "terms": len(hashes),
+        "tokenised": len(entries) - reused,
+        "reused": reused,
+        "bytes": len(body),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def _index_digest(path):
+    """Knowledge base digest recorded in an index file, or None"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        magic, _, _, _, digest = _HEADER.unpack(header)
+    except (OSError, struct.error):
+        return None
+    return digest if magic == MAGIC else None
+
+
+class FaqMatch(NamedTuple):
+    entry_id: str
+    title: str
+    answer: str
+    confidence: float
+    score: float
+
+
+class FaqIndex:
+    """Read-only view of a built index, memory-mapped and shared between processes"""
+
+    def __init__(self, path, entries):
+        self.entries = entries
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.documents, terms, self.avgdl, self.kb_digest = _HEADER.unpack_from(
+            self._mm
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a FAQ index")
+
+        view = memoryview(self._mm)
+        offset = _HEADER.size
+        self._docs = [
+            _DOC.unpack_from(self._mm, offset + i * _DOC.size)
+            for i in range(self.documents)
+        ]
+        offset += self.documents * _DOC.size
+        self._hashes = view[offset : offset + terms * 8].cast("Q")
+        offset += terms * 8
+        self._terms = view[offset : offset + terms * 8].cast("I")
+        offset += terms * 8
+        self._postings = view[offset:].cast("I")
+        # (entry, language) -> one {term: idf} per question variant and title
+        self._variants = {}
+
+    def _idf(self, df):
+        return math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+
+    def _find(self, term):
+        """Position of the term in the term table, or None"""
+        term_hash = _term_hash(term)
+        i = bisect.bisect_left(self._hashes, term_hash)
+        if i == len(self._hashes) or self._hashes[i] != term_hash:
+            return None
+        return i
+
+    def _variant_weights(self, entry_index, lang):
+        key = (entry_index, lang)
+        variants = self._variants.get(key)
+        if variants is None:
+            entry = self.entries[entry_index]
+            texts = list(entry.get("questions", {}).get(lang) or [])
+            texts.append(entry.get("title", {}).get(lang) or "")
+            variants = []
+            for text in texts:
+                weights = {}
+                for term in set(tokenize(text)):
+                    i = self._find(term)
+                    df = 0 if i is None else self._terms[2 * i + 1]
+                    weights[term] = self._idf(df)
+                if weights:
+                    variants.append(weights)
+            self._variants[key] = variants
+        return variants
+
+    def entry_coverage(self, query, entry_index, lang):
+        """Largest share of one variant's IDF weight found among the query terms"""
+        best = 0.0
+        for weights in self._variant_weights(entry_index, LANGS[lang]):
+            covered = sum(idf for term, idf in weights.items() if term in query)
+            best = max(best, covered / sum(weights.values()))
+        return best
+
+    def search(self, text, lang="en", limit=3):
+        """Best matches for `text`, answered in `lang` where the entry has it"""
+        query = set(tokenize(text))
+        if not query or not self.documents:
+            return []
+
+        scores = {}
+        # IDF weight of the query terms each document contains
+        matched = {}
+        attainable = 0.0
+        for term in query:
+            i = self._find(term)
+            if i is None:
+                attainable += self._idf(0)
+                continue
+            start, df = self._terms[2 * i], self._terms[2 * i + 1]
+            idf = self._idf(df)
+            attainable += idf
+            for j in range(2 * start, 2 * (start + df), 2):
+                doc, tf = self._postings[j], self._postings[j + 1]
+                norm = K1 * (1 - B + B * self._docs[doc][2] / self.avgdl)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+                matched[doc] = matched.get(doc, 0.0) + idf
+
+        candidates = []
+        seen = set()
+        for doc, score in sorted(scores.items(), key=lambda item: -item[1]):
+            entry_index, doc_lang, _ = self._docs[doc]
+            if entry_index in seen:
+                continue
+            seen.add(entry_index)
+            query_side = matched[doc] / attainable
+            entry_side = self.entry_coverage(query, entry_index, doc_lang)
+            confidence = 2 * query_side * entry_side / (query_side + entry_side or 1)
+            candidates.append((confidence, score, entry_index, doc_lang))
+            if len(candidates) == CANDIDATES:
+                break
+
+        matches = []
+        for confidence, score, entry_index, doc_lang in sorted(
+            candidates, key=lambda c: (-c[0], -c[1])
+        )[:limit]:
+            entry = self.entries[entry_index]
+            answer_lang = lang if lang in entry["answer"] else LANGS[doc_lang]
+            matches.append(
+                FaqMatch(
+                    entry["id"],
+                    entry["title"].get(answer_lang, ""),
+                    entry["answer"][answer_lang],
+                    round(confidence, 3),
+                    round(score, 3),
+                )
+            )
+        return matches
+
+    def close(self):
+        for view in (self._hashes, self._terms, self._postings):
+            view.release()
+        self._mm.close()
+
+
+def open_index(kb_path, index_dir):
+    """Map the index for `kb_path`, building it first if it is missing or stale"""
+    entries, kb_digest = load_knowledge_base(kb_path)
+    index_dir = Path(index_dir)
+    index_path = index_dir / INDEX_FILE
+
+    if _index_digest(index_path) != kb_digest:
+        index_dir.mkdir(parents=True, exist_ok=True)
+        # One worker rebuilds; the rest wait and then map its result
+        with open(index_dir / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if _index_digest(index_path) != kb_digest:
+                stats = build_index(kb_path, index_dir)
+                print(
+                    f"📚 FAQ index built: {stats['entries']} entries, "
+                    f"{stats['terms']} terms, {stats['tokenised']} tokenised "
+                    f"in {stats['seconds'] * 1000:.0f}ms",
+                    file=sys.stderr,
+                )
+    return FaqIndex(index_path, entries)
+
+
+def min_confidence():
+    return float(os.getenv("FAQ_MIN_CONFIDENCE", "0.7"))
+
+
+def min_margin():
+    return float(os.getenv("FAQ_MIN_MARGIN", "0.15"))
+
+
+def min_terms():
+    return int(os.getenv("FAQ_MIN_TERMS", "2"))
+
+
+def choose(index, text, lang="en", threshold=None, margin=None):
+    """
+    The best match for `text` if the query is long enough, the match clears
+    `threshold` and it leads the next entry by `margin`, else None
+    """
+    threshold = min_confidence() if threshold is None else threshold
+    margin = min_margin() if margin is None else margin
+    if len(set(tokenize(text))) < min_terms():
+        return None
+    matches = index.search(text, lang, limit=2)
+    if not matches or matches[0].confidence < threshold:
+        return None
+    if len(matches) > 1 and matches[0].confidence - matches[1].confidence < margin:
+        return None
+    return matches[0]
+
+
+_index = None
+_kb_stat = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_faq_index():
+    """Return the process-wide index, reloaded when the knowledge base changes, or None when disabled"""
+    global _index, _kb_stat, _checked_at
+    if os.getenv("FAQ_TIER", "1").lower() in ("0", "false", "no", "off"):
+        return None
+
+    with _lock:
+        now = time.monotonic()
+        interval = float(os.getenv("FAQ_RELOAD_INTERVAL", "30"))
+        if _checked_at and now - _checked_at < interval:
+            return _index
+        _checked_at = now
+
+        kb_path = os.getenv("FAQ_KB", str(script_dir / "knowledge_base" / "faq.json"))
+        try:
+            stat = os.stat(kb_path)
+            kb_stat = (stat.st_mtime_ns, stat.st_size)
+            if _index is None or kb_stat != _kb_stat:
+                index = open_index(
+                    kb_path,
+                    os.getenv("FAQ_INDEX_DIR", str(script_dir / ".cache" / "faq")),
+                )
+                _index, _kb_stat = index, kb_stat
+        except Exception as e:
+            print(f"FAQ tier unavailable: {e}", file=sys.stderr)
+    return _index
+
+
+def lookup(text, lang="en"):
+    """The best match when choose() accepts it, else None"""
+    index = get_faq_index()
+    if index is None:
+        return None
+    return choose(index, text, lang)
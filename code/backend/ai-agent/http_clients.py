@@ -0,0 +1,201 @@
+"""
+Shared HTTP transport for the OpenAI, Gemini and gTTS calls.
+
+A resident worker talks to the same three hosts on every request, so each
+provider gets one long-lived client with a keep-alive connection pool instead
+of a fresh connection (and TCP/TLS handshake) per call:
+
+- OpenAI: one SDK client per API key, on a pooled httpx client (HTTP/2 when
+  the h2 package is installed)
+- REST fallbacks and gTTS: one requests.Session with a sized adapter pool
+- Gemini: the cached langchain clients in llm_pipeline, built with
+  gemini_client_options() so they share the timeout settings
+
+Environment:
+    HTTP_CONNECT_TIMEOUT  seconds to establish a connection (default: 5)
+    HTTP_READ_TIMEOUT     seconds to wait for a response (default: 60)
+    HTTP_POOL_SIZE        keep-alive connections per host (default: 10)
+    HTTP2                 use HTTP/2 for OpenAI when h2 is installed (default: 1)
+    GEMINI_TRANSPORT      grpc | rest (default: the SDK's choice)
+    GEMINI_BASE_URL       override the Gemini endpoint, e.g. for a stub server
+                          (implies the rest transport)
+    GTTS_BASE_URL         override the gTTS endpoint, e.g. for a stub server
+"""
+
+import importlib.util
+import os
+import re
+import sys
+import threading
+from urllib.parse import urlsplit
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+_lock = threading.Lock()
+_session = None
+_openai_clients = {}
+
+
+def timeouts():
+    """(connect, read) tuple in the form requests expects"""
+    return (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+def http2_enabled():
+    return os.getenv("HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+
+def get_session():
+    """The process-wide requests.Session used for REST fallbacks and gTTS"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_openai_client(api_key):
+    """One OpenAI client per API key, sharing a keep-alive connection pool"""
+    client = _openai_clients.get(api_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _openai_clients.get(api_key)
+        if client is None:
+            import openai
+
+            # Build Timeout/Limits from the SDK's own defaults so they match
+            # whichever httpx the installed SDK was built against
+            http_client = openai.DefaultHttpxClient(
+                timeout=type(openai.DEFAULT_TIMEOUT)(
+                    READ_TIMEOUT, connect=CONNECT_TIMEOUT
+                ),
+                limits=type(openai.DEFAULT_CONNECTION_LIMITS)(
+                    max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE
+                ),
+                http2=http2_enabled(),
+            )
+            client = openai.OpenAI(api_key=api_key, http_client=http_client)
+            _openai_clients[api_key] = client
+    return client
+
+
+def gemini_client_options():
+    """Keyword arguments giving ChatGoogleGenerativeAI the shared timeout settings"""
+    options = {"timeout": READ_TIMEOUT}
+    transport = os.getenv("GEMINI_TRANSPORT")
+    base_url = os.getenv("GEMINI_BASE_URL")
+    if base_url:
+        options["client_options"] = {"api_endpoint": base_url}
+        transport = transport or "rest"
+    if transport:
+        options["transport"] = transport
+    return options
+
+
+def pooled_gtts_class():
+    """gTTS subclass that sends its requests through the shared session"""
+    import urllib.request
+
+    import requests
+    from gtts import gTTS, gTTSError
+
+    base_url = os.getenv("GTTS_BASE_URL")
+    audio_pattern = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+    class PooledGTTS(gTTS):
+        def _prepare_requests(self):
+            prepared = super()._prepare_requests()
+            if base_url:
+                base = urlsplit(base_url)
+                for request in prepared:
+                    url = urlsplit(request.url)
+                    request.url = url._replace(
+                        scheme=base.scheme, netloc=base.netloc
+                    ).geturl()
+            return prepared
+
+        def stream(self):
+            # _pooled_stream copies gTTS internals (gtts is pinned for that);
+            # if a different gTTS lacks them, use its own stream instead
+            started = False
+            try:
+                for chunk in self._pooled_stream():
+                    started = True
+                    yield chunk
+            except (AttributeError, KeyError) as e:
+                if started:
+                    raise
+                print(
+                    f"Pooled gTTS failed ({e!r}), falling back to gTTS.stream",
+                    file=sys.stderr,
+                )
+                yield from gTTS.stream(self)
+
+        def _pooled_stream(self):
+            # Same as gTTS.stream, but on the shared keep-alive session rather
+            # than a new Session (and connection) for every request
+            import base64
+
+            session = get_session()
+            for prepared in self._prepare_requests():
+                try:
+                    response = session.send(
+                        prepared,
+                        proxies=urllib.request.getproxies(),
+                        timeout=timeouts(),
+                    )
+                    response.raise_for_status()
+                except requests.exceptions.HTTPError:
+                    raise gTTSError(tts=self, response=response)
+                except requests.exceptions.RequestException:
+                    raise gTTSError(tts=self)
+
+                for line in response.iter_lines(chunk_size=1024):
+                    decoded_line = line.decode("utf-8")
+                    if "jQ1olc" in decoded_line:
+                        audio_search = audio_pattern.search(decoded_line)
+                        if not audio_search:
+                            raise gTTSError(tts=self, response=response)
+                        yield base64.b64decode(audio_search.group(1).encode("ascii"))
+
+    return PooledGTTS
+
+
+_gtts_class = None
+
+
+def get_gtts_class():
+    global _gtts_class
+    if _gtts_class is None:
+        try:
+            _gtts_class = pooled_gtts_class()
+        except Exception as e:
+            from gtts import gTTS
+
+            print(f"Pooled gTTS unavailable, using gTTS: {e}", file=sys.stderr)
+            _gtts_class = gTTS
+    return _gtts_class
+
+
+def close():
+    """Close pooled connections, e.g. when a worker shuts down"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        for client in _openai_clients.values():
+            client.close()
+        _openai_clients.clear()
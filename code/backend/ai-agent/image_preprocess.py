@@ -0,0 +1,162 @@
+"""
+Image preprocessing before an upload is sent to Gemini.
+
+Phone photos arrive at full resolution (multer accepts up to 25 MB) and used
+to be base64-encoded as-is. prepare_image decodes the file once, detects its
+real format, downsizes it to IMAGE_MAX_DIM and re-encodes it as JPEG. The
+response cache and request coalescing key on a SHA-256 of the bytes sent to
+Gemini, so only the same picture reuses an answer: similar but different
+leaf photos (the same leaf before and after a lesion appears) never share a
+key.
+
+Results are memoised per (path, size, mtime), so the cache lookup and the
+Gemini payload share one decode.
+
+Without Pillow the original bytes are sent with their sniffed MIME type.
+
+Environment:
+    IMAGE_MAX_DIM       longest side after resizing, in pixels (default: 1024)
+    IMAGE_JPEG_QUALITY  JPEG quality used when re-encoding (default: 85)
+"""
+
+import base64
+import hashlib
+import io
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+MAX_DIM = int(os.getenv("IMAGE_MAX_DIM", "1024"))
+JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+
+# Leading bytes of the formats phones and browsers actually upload
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+_prepared = OrderedDict()
+_prepared_lock = threading.Lock()
+_PREPARED_SIZE = 8
+
+
+class PreparedImage:
+    """An upload ready for Gemini: payload bytes, MIME type and hash"""
+
+    __slots__ = ("data", "mime_type", "image_hash", "original_bytes", "size")
+
+    def __init__(self, data, mime_type, original_bytes, size=None):
+        self.data = data
+        self.mime_type = mime_type
+        # Exact key: only byte-identical payloads share cached answers
+        self.image_hash = "sha256:" + hashlib.sha256(data).hexdigest()
+        self.original_bytes = original_bytes
+        self.size = size
+
+    def data_url(self):
+        encoded = base64.b64encode(self.data).decode("utf-8")
+        return f"data:{self.mime_type};base64,{encoded}"
+
+
+def sniff_mime_type(data):
+    """MIME type from the file's leading bytes, defaulting to JPEG"""
+    for signature, mime_type in _SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:8] == b"ftyp" and data[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    return "image/jpeg"
+
+
+def _original(data):
+    """The upload untouched"""
+    return PreparedImage(data, sniff_mime_type(data), len(data))
+
+
+def _process(data):
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return _original(data)
+
+    image = Image.open(io.BytesIO(data))
+    source_format = image.format
+    # Let the JPEG decoder skip detail that the resize would throw away anyway
+    image.draft("RGB", (MAX_DIM, MAX_DIM))
+    # Phones store rotation in EXIF; apply it so Gemini sees the photo upright
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode not in ("RGB", "L"):
+        # JPEG has no alpha channel: flatten transparent areas onto white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    image.thumbnail((MAX_DIM, MAX_DIM), Image.Resampling.LANCZOS)
+
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    encoded = out.getvalue()
+
+    # A small JPEG can come out larger after re-encoding; keep the original then
+    if (
+        source_format == "JPEG"
+        and len(encoded) >= len(data)
+        and max(image.size) <= MAX_DIM
+    ):
+        return PreparedImage(data, "image/jpeg", len(data), image.size)
+    return PreparedImage(encoded, "image/jpeg", len(data), image.size)
+
+
+def prepare_image(image_path):
+    """Decode, resize, re-encode and hash an image file, once per file version"""
+    stat = os.stat(image_path)
+    key = (os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns)
+    with _prepared_lock:
+        prepared = _prepared.get(key)
+        if prepared is not None:
+            _prepared.move_to_end(key)
+            return prepared
+
+    with open(image_path, "rb") as f:
+        data = f.read()
+
+    start = time.perf_counter()
+    try:
+        prepared = _process(data)
+    except Exception as e:
+        # Undecodable or unsupported (e.g. HEIC without a plugin): send it untouched
+        print(f"Image preprocessing failed, sending original: {e}", file=sys.stderr)
+        prepared = _original(data)
+    elapsed = time.perf_counter() - start
+    metrics.observe("image_preprocess", elapsed)
+    metrics.inc(
+        "image_bytes_saved", max(0, prepared.original_bytes - len(prepared.data))
+    )
+    print(
+        f"🖼️ Image {prepared.original_bytes // 1024}KB -> {len(prepared.data) // 1024}KB "
+        f"({prepared.mime_type}, {elapsed * 1000:.0f}ms)",
+        file=sys.stderr,
+    )
+
+    with _prepared_lock:
+        _prepared[key] = prepared
+        while len(_prepared) > _PREPARED_SIZE:
+            _prepared.popitem(last=False)
+    return prepared
+
+
+def image_hash(image_path):
+    """Exact cache key component for an attached image, or "" when there is none"""
+    if not image_path:
+        return ""
+    return prepare_image(image_path).image_hash
@@ -1,20 +1,39 @@
+import time
+
+_import_started = time.perf_counter()
+
 import os
 import sys
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
-
-from langchain_core.messages import HumanMessage
-from langdetect import detect, DetectorFactory
-import base64
+import threading
+from pydantic import BaseModel, Field, PrivateAttr
+
 from typing import Optional
 
-load_dotenv()
+import conversation
+import metrics
+import script_classifier
+from image_preprocess import image_hash, prepare_image
+from response_cache import (
+    get_response_cache,
+    make_cache_key,
+    min_cacheable_confidence,
+)
+from semantic_cache import get_semantic_cache
+
+# langchain and the Gemini client are imported on first use: a
+# fresh process (or a cache hit) should not pay for clients it never calls.
+# Re-entrant: building the structured client builds the base client first
+_clients_lock = threading.RLock()
+_env_loaded = False
+
+
+def _load_env():
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
 
-# Seed for consistent language detection
-DetectorFactory.seed = 0
+        load_dotenv()
+        _env_loaded = True
 
 
 # Updated Pydantic model with confidence
@@ -30,6 +49,13 @@ class FarmingResponse(BaseModel):
     confidence: int = Field(
         description="Your confidence in the accuracy of this response (0-100). Base it on query clarity, your knowledge, and available context."
     )
+    # Set on the error messages that stand in for an answer; never serialised
+    _fallback: bool = PrivateAttr(default=False)
+
+
+def is_fallback(response):
+    """Whether `response` is an error message rather than an answer"""
+    return getattr(response, "_fallback", False)
 
 
 # System prompt updated for user-friendliness, language, and confidence
@@ -42,37 +68,410 @@ Rules:
 - Include a confidence score (0-100); if below 70, suggest asking for more details.
 - Focus on crops, soil, fertilizers, pests, weather, and sustainability."""
 
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.3)
 
-# Use with_structured_output for simplicity
-structured_llm = llm.with_structured_output(FarmingResponse)
+def _client(name, factory):
+    """Build a client once and keep it as a module global, so it can be swapped out"""
+    client = globals().get(name)
+    if client is None:
+        with _clients_lock:
+            client = globals().get(name)
+            if client is None:
+                with metrics.timed("client_init", client=name):
+                    client = factory()
+                globals()[name] = client
+    return client
 
 
-def generate_malayalam_response(
-    user_message: str,
-    has_image: bool = False,
-    has_audio: bool = False,
-    image_path: Optional[str] = None,
-) -> FarmingResponse:
-    """
-    Generate a structured farming response using Gemini. Supports multimodal image input.
-    Returns a Pydantic object with 'title', 'response', and 'confidence'.
-    """
+def _make_llm():
+    _load_env()
+    from http_clients import gemini_client_options
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash", temperature=0.3, **gemini_client_options()
+    )
+
+
+def get_llm():
+    return _client("llm", _make_llm)
+
+
+def get_structured_llm():
+    # Use with_structured_output for simplicity. include_raw keeps the
+    # message, and with it the usage metadata, next to the parsed object
+    return _client(
+        "structured_llm",
+        lambda: get_llm().with_structured_output(FarmingResponse, include_raw=True),
+    )
+
+
+def _make_streaming_llm():
+    _load_env()
+    from http_clients import gemini_client_options
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    # JSON-mode client for streaming: with_structured_output only yields the
+    # finished object, while raw JSON text can be parsed as it arrives
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        temperature=0.3,
+        response_mime_type="application/json",
+        **gemini_client_options(),
+    )
+
+
+def get_streaming_llm():
+    return _client("streaming_llm", _make_streaming_llm)
+
+
+def get_response_parser():
+    def make():
+        from langchain.output_parsers import PydanticOutputParser
+
+        return PydanticOutputParser(pydantic_object=FarmingResponse)
+
+    return _client("response_parser", make)
+
+
+_lazy_attributes = {
+    "llm": get_llm,
+    "structured_llm": get_structured_llm,
+    "streaming_llm": get_streaming_llm,
+    "response_parser": get_response_parser,
+}
+
+
+def __getattr__(name):
+    # llm_pipeline.llm etc. still work, but are only built when first accessed
+    if name in _lazy_attributes:
+        return _lazy_attributes[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def build_query(user_message, has_image, has_audio, image_path):
     context = ""
     if has_audio:
         context += "User sent audio. "
     if has_image and not image_path:
         context += "User has image context. "
 
-    full_query = f"{context}{user_message}"
+    return f"{context}{user_message}"
+
 
-    # Detect language
+def detect_language(full_query):
+    """Language of a query; callers that already classified it pass detected_lang"""
     try:
-        detected_lang = detect(full_query)
+        with metrics.timed("language_detection"):
+            detected_lang = script_classifier.detect(full_query)
         print(f"Detected language: {detected_lang}", file=sys.stderr)
     except Exception:
         detected_lang = "en"  # Fallback to English
         print("Language detection failed; defaulting to English.", file=sys.stderr)
+    return detected_lang
+
+
+def encode_image(image_path):
+    """Downsize and re-encode an image into the data URL sent to Gemini"""
+    return prepare_image(image_path).data_url()
+
+
+def _build_input(full_query, image_path, image_url=None, history=None):
+    """
+    Return the Gemini messages, most stable first so the provider can reuse
+    the prompt prefix between requests: the static system prompt, the
+    summary of the chat's older turns, its recent turns, and last the query
+    (a multimodal message if image_path provided).
+    """
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+    messages = [SystemMessage(content=system_prompt)]
+    if history:
+        summary = history.summary_text()
+        if summary:
+            messages.append(
+                SystemMessage(content=f"Earlier in this conversation:\n{summary}")
+            )
+        for question, answer in history.recent():
+            messages += [HumanMessage(content=question), AIMessage(content=answer)]
+
+    if not image_path:
+        messages.append(HumanMessage(content=full_query))
+        return messages
+
+    message_content = [
+        {"type": "text", "text": full_query},
+        {
+            "type": "image_url",
+            "image_url": {"url": image_url or encode_image(image_path)},
+        },
+    ]
+    messages.append(HumanMessage(content=message_content))
+    return messages
+
+
+def _lookup_caches(full_query, detected_lang, image_path):
+    """
+    Check the exact and semantic caches. Returns (cached_response, state) where
+    state carries what _store_caches needs to save a fresh answer.
+    """
+    state = {"query": full_query, "lang": detected_lang}
+
+    # Serve repeated questions from the response cache
+    cache = get_response_cache()
+    if cache is not None:
+        try:
+            state["key"] = make_cache_key(
+                full_query, detected_lang, image_hash(image_path)
+            )
+            cached = cache.get(state["key"])
+            if cached is not None:
+                print("⚡ Response cache hit", file=sys.stderr)
+                metrics.inc("cache_hits", cache="exact")
+                return FarmingResponse.parse_obj(cached), state
+        except Exception as e:
+            print(f"Response cache lookup failed: {e}", file=sys.stderr)
+            state.pop("key", None)
+
+    # Paraphrases of text-only questions can reuse a semantically close answer
+    semantic_cache = get_semantic_cache() if not image_path else None
+    if semantic_cache is not None:
+        try:
+            state["vector"] = semantic_cache.embed(full_query)
+            with metrics.timed("semantic_lookup"):
+                cached = semantic_cache.lookup(state["vector"], detected_lang)
+            if cached is not None:
+                metrics.inc("cache_hits", cache="semantic")
+                return FarmingResponse.parse_obj(cached), state
+        except Exception as e:
+            print(f"Semantic cache lookup failed: {e}", file=sys.stderr)
+            state.pop("vector", None)
+
+    metrics.inc("cache_misses")
+    return None, state
+
+
+def _store_caches(state, response):
+    # Only confident answers are reused; fallbacks carry confidence 0
+    cache = get_response_cache()
+    if response.confidence < min_cacheable_confidence():
+        if "key" in state:
+            cache.stats.skipped += 1
+        return
+
+    if "key" in state:
+        cache.set(state["key"], response.dict())
+    if "vector" in state:
+        try:
+            get_semantic_cache().insert(
+                state["vector"], state["query"], state["lang"], response.dict()
+            )
+        except Exception as e:
+            print(f"Semantic cache insert failed: {e}", file=sys.stderr)
+
+
+def _normalise_response(response):
+    """Normalize response to FarmingResponse so we can safely access attributes"""
+    if isinstance(response, dict):
+        return FarmingResponse.parse_obj(response)
+    # If it's a Pydantic BaseModel or has a dict() method, convert to dict first
+    if hasattr(response, "dict"):
+        return FarmingResponse.parse_obj(response.dict())
+    # Fallback: try to build dict from expected attributes
+    resp_dict = {}
+    for field in ("title", "response", "confidence"):
+        val = getattr(response, field, None)
+        if val is not None:
+            resp_dict[field] = val
+    return FarmingResponse.parse_obj(resp_dict)
+
+
+def _low_confidence_message(detected_lang):
+    return {
+        "ml": "ഈ ഉത്തരം പൂർണ്ണമായി ഉറപ്പില്ല; കൂടുതൽ വിശദാംശങ്ങൾ നൽകിയാൽ മെച്ചപ്പെട്ട ഉപദേശം തരാം.",
+        "hi": "यह उत्तर पूरी तरह से निश्चित नहीं है; अधिक विवरण दें तो बेहतर सलाह दे सकता हूं।",
+        "en": "I'm not fully confident in this answer; provide more details for better advice.",
+    }.get(detected_lang, "Provide more details for better advice.")
+
+
+def _parse_error_response(detected_lang):
+    # If parsing fails, provide a safe fallback structured response
+    metrics.inc("fallbacks", kind="llm_parse_error")
+    fallback_title = {"ml": "പിശക്", "hi": "त्रुटि", "en": "Error"}.get(
+        detected_lang, "Error"
+    )
+    fallback_response = {
+        "ml": "ക്ഷമിക്കണം, ലഭിച്ച პასუხം വിശകലനം ചെയ്യാൻ സാധിച്ചില്ല.",
+        "hi": "क्षमा करें, प्राप्त उत्तर का विश्लेषण नहीं किया जा सका।",
+        "en": "Sorry, the returned response could not be parsed.",
+    }.get(detected_lang, "Sorry, could not parse response.")
+    response = FarmingResponse(
+        title=fallback_title, response=fallback_response, confidence=0
+    )
+    response._fallback = True
+    return response
+
+
+def _unavailable_response(detected_lang):
+    # Structured fallback
+    metrics.inc("fallbacks", kind="llm_unavailable")
+    fallback_title = {"ml": "പിശക്", "hi": "त्रुटि", "en": "Error"}.get(
+        detected_lang, "Error"
+    )
+    fallback_response = {
+        "ml": "ക്ഷമിക്കണം, ഇപ്പോൾ സേവനം ലഭ്യമല്ല. ദയവായി പിന്നീട് ശ്രദ്ധിക്കുക.",
+        "hi": "क्षमा करें, सेवा उपलब्ध नहीं है। कृपया बाद में प्रयास करें।",
+        "en": "Sorry, service unavailable now. Please try later.",
+    }.get(detected_lang, "Sorry, try later.")
+    response = FarmingResponse(
+        title=fallback_title, response=fallback_response, confidence=0
+    )
+    response._fallback = True
+    return response
+
+
+def _faq_response(user_message, detected_lang, has_image):
+    """A knowledge base answer when the question matches an FAQ entry closely enough"""
+    # Questions about a photo need the model to look at it
+    if has_image:
+        return None
+    try:
+        import faq_index
+
+        with metrics.timed("faq_lookup"):
+            match = faq_index.lookup(user_message, detected_lang)
+    except Exception as e:
+        print(f"FAQ lookup failed: {e}", file=sys.stderr)
+        return None
+    if match is None:
+        return None
+
+    print(
+        f"📚 FAQ answer: {match.entry_id} (confidence {match.confidence:.2f})",
+        file=sys.stderr,
+    )
+    metrics.inc("faq_hits")
+    return FarmingResponse(
+        title=match.title,
+        response=match.answer,
+        confidence=round(match.confidence * 100),
+    )
+
+
+def _lookup_answers(
+    user_message, full_query, detected_lang, has_image, image_path, history
+):
+    """
+    An FAQ or cached answer for a standalone question, as (answer, cache_state)
+    like _lookup_caches. A follow-up in a chat with history is answered from
+    its context, so it neither reads nor fills the caches.
+    """
+    if history:
+        print(
+            f"🧵 Follow-up after {history.turn_count} turns: caches skipped",
+            file=sys.stderr,
+        )
+        metrics.inc("cache_bypass", reason="history")
+        return None, {}
+
+    answer = _faq_response(user_message, detected_lang, has_image)
+    if answer is not None:
+        return answer, {}
+    return _lookup_caches(full_query, detected_lang, image_path)
+
+
+def _invoke_structured(llm_input):
+    """
+    Structured Gemini call behind the "gemini" circuit breaker, which raises
+    ProviderUnavailable at once while Gemini is known to be down. With HEDGE=1
+    a duplicate request goes out when the first is slower than its p95.
+    """
+    from provider_health import get_breaker, hedged, hedging_enabled
+
+    def invoke():
+        with metrics.timed("gemini_invoke"):
+            return get_structured_llm().invoke(llm_input)
+
+    if hedging_enabled():
+        return hedged("gemini", invoke, "gemini", invoke)[1]
+    return get_breaker("gemini").call(invoke)
+
+
+def _split_raw(response):
+    """(parsed, usage_metadata) of a structured reply; swapped-in clients return the object"""
+    if isinstance(response, dict) and "parsed" in response:
+        return response["parsed"], getattr(response.get("raw"), "usage_metadata", None)
+    return response, None
+
+
+def _add_usage(total, usage):
+    """Sum the prompt tokens of streamed chunks, which each carry a share"""
+    if usage:
+        total["input_tokens"] = total.get("input_tokens", 0) + usage.get(
+            "input_tokens", 0
+        )
+        cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        total["cache_read"] = total.get("cache_read", 0) + cached
+    return total
+
+
+def _record_prompt(usage, history, seconds):
+    """
+    Log and count the prompt size (usage from _add_usage, empty when the
+    client reports none) and latency of one Gemini call, and the history
+    tokens that compacting the chat saved against sending it verbatim.
+    """
+    with_history = "yes" if history else "no"
+    metrics.observe("llm_turn", seconds, history=with_history)
+
+    message = f"🧵 Prompt took {seconds:.2f}s"
+    if usage:
+        metrics.inc("prompt_tokens", usage["input_tokens"], history=with_history)
+        metrics.inc("prompt_tokens_cached", usage["cache_read"])
+        message += f", {usage['input_tokens']} tokens ({usage['cache_read']} cached)"
+    if history:
+        sent, full = history.history_tokens(), history.full_tokens()
+        metrics.inc("history_tokens", sent)
+        metrics.inc("history_tokens_saved", full - sent)
+        message += (
+            f", history ~{sent} tokens after {history.turn_count} turns"
+            f" (~{full} verbatim)"
+        )
+    print(message, file=sys.stderr)
+
+
+def _remember(session_id, history, user_message, response):
+    conversation.record_turn(
+        session_id, history, user_message, response.title, response.response
+    )
+
+
+def generate_malayalam_response(
+    user_message: str,
+    has_image: bool = False,
+    has_audio: bool = False,
+    image_path: Optional[str] = None,
+    detected_lang: Optional[str] = None,
+    image_url: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> FarmingResponse:
+    """
+    Generate a structured farming response using Gemini. Supports multimodal image input.
+    Returns a Pydantic object with 'title', 'response', and 'confidence'.
+    detected_lang and image_url may be passed in when they were computed ahead of time.
+    With a session_id the chat's earlier turns are sent as context and this
+    turn is added to them (see conversation).
+    """
+    full_query = build_query(user_message, has_image, has_audio, image_path)
+    if detected_lang is None:
+        detected_lang = detect_language(full_query)
+
+    history = conversation.load(session_id)
+    cached, cache_state = _lookup_answers(
+        user_message, full_query, detected_lang, has_image, image_path, history
+    )
+    if cached is not None:
+        _remember(session_id, history, user_message, cached)
+        return cached
 
     # Add language instruction to query
     full_query = f"Query language: {detected_lang}. {full_query}"
@@ -80,74 +479,158 @@ def generate_malayalam_response(
     try:
         print(f"🤖 Calling Gemini API for structured output...", file=sys.stderr)
 
-        # Multimodal if image_path provided
-        if image_path:
-            with open(image_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode("utf-8")
-            message_content = [
-                {"type": "text", "text": full_query},
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{image_data}"},
-                },
-            ]
-            input_message = HumanMessage(content=message_content)
-            response = structured_llm.invoke([input_message])
-        else:
-            response = structured_llm.invoke(full_query)
+        llm_input = _build_input(full_query, image_path, image_url, history)
+        started = time.perf_counter()
+        response, usage = _split_raw(_invoke_structured(llm_input))
+        _record_prompt(_add_usage({}, usage), history, time.perf_counter() - started)
 
-        # Normalize response to FarmingResponse so we can safely access attributes
         try:
-            if isinstance(response, dict):
-                response = FarmingResponse.parse_obj(response)
-            else:
-                # If it's a Pydantic BaseModel or has a dict() method, convert to dict first
-                if hasattr(response, "dict"):
-                    response = FarmingResponse.parse_obj(response.dict())
-                else:
-                    # Fallback: try to build dict from expected attributes
-                    resp_dict = {}
-                    for field in ("title", "response", "confidence"):
-                        val = getattr(response, field, None)
-                        if val is not None:
-                            resp_dict[field] = val
-                    response = FarmingResponse.parse_obj(resp_dict)
+            with metrics.timed("response_normalisation"):
+                response = _normalise_response(response)
         except Exception:
-            # If parsing fails, provide a safe fallback structured response
-            fallback_title = {"ml": "പിശക്", "hi": "त्रुटि", "en": "Error"}.get(
-                detected_lang, "Error"
-            )
-            fallback_response = {
-                "ml": "ക്ഷമിക്കണം, ലഭിച്ച პასუხം വിശകലനം ചെയ്യാൻ സാധിച്ചില്ല.",
-                "hi": "क्षमा करें, प्राप्त उत्तर का विश्लेषण नहीं किया जा सका।",
-                "en": "Sorry, the returned response could not be parsed.",
-            }.get(detected_lang, "Sorry, could not parse response.")
-            return FarmingResponse(
-                title=fallback_title, response=fallback_response, confidence=0
-            )
+            return _parse_error_response(detected_lang)
+
+        _store_caches(cache_state, response)
+        _remember(session_id, history, user_message, response)
 
         # Post-process: If low confidence, append suggestion (in same language)
         if response.confidence < 70:
-            low_conf_msg = {
-                "ml": "ഈ ഉത്തരം പൂർണ്ണമായി ഉറപ്പില്ല; കൂടുതൽ വിശദാംശങ്ങൾ നൽകിയാൽ മെച്ചപ്പെട്ട ഉപദേശം തരാം.",
-                "hi": "यह उत्तर पूरी तरह से निश्चित नहीं है; अधिक विवरण दें तो बेहतर सलाह दे सकता हूं।",
-                "en": "I'm not fully confident in this answer; provide more details for better advice.",
-            }.get(detected_lang, "Provide more details for better advice.")
-            response.response += f"\n\n{low_conf_msg}"
+            response.response += f"\n\n{_low_confidence_message(detected_lang)}"
 
         print(f"Confidence: {response.confidence}", file=sys.stderr)
         return response
     except Exception as e:
         print(f"❌ Gemini API error: {e}", file=sys.stderr)
-        # Structured fallback
-        fallback_title = {"ml": "പിശക്", "hi": "त्रुटि", "en": "Error"}.get(
-            detected_lang, "Error"
-        )
-        fallback_response = {
-            "ml": "ക്ഷമിക്കണം, ഇപ്പോൾ സേവനം ലഭ്യമല്ല. ദയവായി പിന്നീട് ശ്രദ്ധിക്കുക.",
-            "hi": "क्षमा करें, सेवा उपलब्ध नहीं है। कृपया बाद में प्रयास करें।",
-            "en": "Sorry, service unavailable now. Please try later.",
-        }.get(detected_lang, "Sorry, try later.")
-        return FarmingResponse(
-            title=fallback_title, response=fallback_response, confidence=0
-        )
+        return _unavailable_response(detected_lang)
+
+
+def _record_stream(breaker, open_stream):
+    """Yield the chunks of open_stream(), feeding the stream's outcome to `breaker`"""
+    started = time.perf_counter()
+    try:
+        yield from open_stream()
+    except GeneratorExit:
+        # Abandoned by the caller: says nothing about Gemini's health
+        breaker.release()
+        raise
+    except BaseException:
+        breaker.record_failure()
+        raise
+    breaker.record_success(time.perf_counter() - started)
+
+
+def stream_malayalam_response(
+    user_message: str,
+    has_image: bool = False,
+    has_audio: bool = False,
+    image_path: Optional[str] = None,
+    detected_lang: Optional[str] = None,
+    image_url: Optional[str] = None,
+    session_id: Optional[str] = None,
+):
+    """
+    Streaming variant of generate_malayalam_response. Yields ("title", text)
+    once the title is complete, ("delta", text) for each new piece of the
+    response, and finally ("final", FarmingResponse) with the same
+    post-processing as the batch call. The final response text always equals
+    the concatenated deltas.
+    """
+    full_query = build_query(user_message, has_image, has_audio, image_path)
+    if detected_lang is None:
+        detected_lang = detect_language(full_query)
+
+    history = conversation.load(session_id)
+    cached, cache_state = _lookup_answers(
+        user_message, full_query, detected_lang, has_image, image_path, history
+    )
+    if cached is not None:
+        _remember(session_id, history, user_message, cached)
+        yield "title", cached.title
+        yield "delta", cached.response
+        yield "final", cached
+        return
+
+    full_query = (
+        f"Query language: {detected_lang}. {full_query}\n\n"
+        f"{get_response_parser().get_format_instructions()}"
+    )
+
+    raw = ""
+    title_sent = False
+    emitted = ""
+    try:
+        print(f"🤖 Streaming Gemini API response...", file=sys.stderr)
+
+        llm_input = _build_input(full_query, image_path, image_url, history)
+        from langchain_core.utils.json import parse_partial_json
+        from provider_health import ProviderUnavailable, get_breaker
+
+        breaker = get_breaker("gemini")
+        if not breaker.allow():
+            raise ProviderUnavailable(breaker.name)
+        stream_started = time.perf_counter()
+        first_chunk = True
+        usage = {}
+
+        for chunk in _record_stream(
+            breaker, lambda: get_streaming_llm().stream(llm_input)
+        ):
+            if first_chunk:
+                metrics.observe(
+                    "gemini_first_chunk", time.perf_counter() - stream_started
+                )
+                first_chunk = False
+            _add_usage(usage, getattr(chunk, "usage_metadata", None))
+            raw += chunk.content if isinstance(chunk.content, str) else ""
+            partial = parse_partial_json(raw) or {}
+            if not isinstance(partial, dict):
+                continue
+
+            # The title is final once the model has moved on to the response field
+            if not title_sent and "response" in partial:
+                yield "title", str(partial.get("title", ""))
+                title_sent = True
+
+            text = partial.get("response")
+            if isinstance(text, str) and len(text) > len(emitted):
+                yield "delta", text[len(emitted) :]
+                emitted = text
+
+        metrics.observe("gemini_stream", time.perf_counter() - stream_started)
+        _record_prompt(usage, history, time.perf_counter() - stream_started)
+
+        try:
+            with metrics.timed("response_normalisation"):
+                response = get_response_parser().parse(raw)
+        except Exception:
+            response = _parse_error_response(detected_lang)
+        else:
+            # Like the batch call: every parsed answer, never a fallback
+            _remember(session_id, history, user_message, response)
+    except Exception as e:
+        print(f"❌ Gemini API error: {e}", file=sys.stderr)
+        response = _unavailable_response(detected_lang)
+
+    _store_caches(cache_state, response)
+
+    if not title_sent:
+        yield "title", response.title
+    # Anything not streamed yet (or a fallback message) goes out as one last delta
+    if response.response.startswith(emitted):
+        remainder = response.response[len(emitted) :]
+    else:
+        remainder = f"\n\n{response.response}" if emitted else response.response
+        response.response = emitted + remainder
+    if remainder:
+        yield "delta", remainder
+
+    if response.confidence < 70:
+        suffix = f"\n\n{_low_confidence_message(detected_lang)}"
+        response.response += suffix
+        yield "delta", suffix
+
+    print(f"Confidence: {response.confidence}", file=sys.stderr)
+    yield "final", response
+
+
+metrics.observe("import", time.perf_counter() - _import_started, module="llm_pipeline")
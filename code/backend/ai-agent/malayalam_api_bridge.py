@@ -1,319 +1,626 @@
 #!/usr/bin/env python3
 
+import time
+
+_import_started = time.perf_counter()
+
 import sys
 import json
 import argparse
 import base64
 import io
-import tempfile
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+import metrics
+
 script_dir = Path(__file__).resolve().parent
 env_path = script_dir / ".env"
 load_dotenv(dotenv_path=env_path)
 
 load_dotenv()
 
+metrics.observe("import", time.perf_counter() - _import_started, module="bridge")
+
 
 def main():
     parser = argparse.ArgumentParser(description="AI Farming Assistant Bridge")
     parser.add_argument("--audio-file", type=str, help="Path to audio file")
+    parser.add_argument(
+        "--audio-stdin", action="store_true", help="Read the audio bytes from stdin"
+    )
+    parser.add_argument(
+        "--audio-fd",
+        type=int,
+        help="Read the audio bytes from an inherited file descriptor (pipe or memfd)",
+    )
     parser.add_argument("--text", type=str, help="Text input")
     parser.add_argument("--image-file", type=str, help="Path to image file")
     parser.add_argument(
         "--has_image", action="store_true", help="User has image context"
     )
+    parser.add_argument(
+        "--session-id",
+        type=str,
+        help="Chat id: earlier turns of the chat are sent as context",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print newline-delimited JSON events as the answer is generated",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the asyncio pipeline that overlaps STT, LLM and TTS",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Stay resident and serve newline-delimited JSON requests",
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help="Unix socket path to serve on in worker mode (default: stdin/stdout)",
+    )
+    parser.add_argument(
+        "--output",
+        choices=("json", "frames"),
+        default="json",
+        help="Reply as one JSON line (default) or as binary frames with raw audio",
+    )
 
     args = parser.parse_args()
 
-    try:
-        user_message = ""
-        has_audio_input = False
-        has_image_input = False
-        image_path = args.image_file if args.image_file else None
+    if args.worker:
+        from bridge_worker import serve
 
-        if args.audio_file:
-            try:
-                if not os.path.exists(args.audio_file):
-                    raise FileNotFoundError(f"Audio file not found: {args.audio_file}")
+        serve(socket_path=args.socket)
+        return
 
-                with open(args.audio_file, "rb") as f:
-                    audio_data = f.read()
+    request = {
+        "audio_file": args.audio_file,
+        "audio_data": read_audio_stream(args),
+        "text": args.text,
+        "image_file": args.image_file,
+        "has_image": args.has_image,
+        "session_id": args.session_id,
+    }
 
-                print(
-                    f"🎤 Processing audio file: {len(audio_data)} bytes",
-                    file=sys.stderr,
-                )
+    if args.stream:
 
-                if len(audio_data) == 0:
-                    raise Exception("Audio file is empty")
-
-                user_message = speech_to_text(audio_data)
-                if not user_message or user_message.strip() == "":
-                    print(
-                        json.dumps(
-                            {
-                                "success": False,
-                                "error": "Could not transcribe audio. Please speak clearly and try again.",
-                            }
-                        )
-                    )
-                    return
+        def emit(event):
+            if event.get("event") == "done" and metrics.MODE == "json":
+                event["metrics"] = metrics.snapshot()
+            print(json.dumps(event, ensure_ascii=False), flush=True)
 
-                has_audio_input = True
-                print(f"🔤 Transcribed: '{user_message[:50]}...'", file=sys.stderr)
+        stream_request(request, emit)
+        write_metrics()
+        return
 
-            except Exception as e:
-                print(f"Audio processing error: {e}", file=sys.stderr)
-                print(
-                    json.dumps(
-                        {
-                            "success": False,
-                            "error": f"Audio processing failed: {str(e)}",
-                        }
-                    )
-                )
-                return
+    raw_audio = args.output == "frames"
+    if args.use_async:
+        import asyncio
 
-        elif args.text:
-            user_message = args.text.strip()
-            print(f"📝 Text input received: '{user_message[:50]}...'", file=sys.stderr)
+        from pipeline_async import run_pipeline
 
-        if args.image_file:
-            try:
-                if not os.path.exists(args.image_file):
-                    raise FileNotFoundError(f"Image file not found: {args.image_file}")
+        result = asyncio.run(run_pipeline(request, raw_audio=raw_audio))
+    else:
+        result = process_request(request, raw_audio=raw_audio)
+    if metrics.MODE == "json":
+        result["metrics"] = metrics.snapshot()
+    if raw_audio:
+        from bridge_frames import write_reply
+
+        write_reply(sys.stdout.buffer, result)
+    else:
+        print(json.dumps(result, ensure_ascii=False))
+    write_metrics()
 
-                has_image_input = True
-                user_message = f"[User uploaded an image] {user_message}"
-                print(f"🖼️ Image file processed: {args.image_file}", file=sys.stderr)
 
-            except Exception as e:
-                print(f"Image processing error: {e}", file=sys.stderr)
+def write_metrics():
+    """Write Prometheus text for this run to BRIDGE_METRICS_FILE, or stderr"""
+    if metrics.MODE != "prometheus":
+        return
+    path = os.getenv("BRIDGE_METRICS_FILE")
+    if path:
+        with open(path, "w") as f:
+            f.write(metrics.export_prometheus())
+    else:
+        print(metrics.export_prometheus(), file=sys.stderr)
+
+
+def read_audio_stream(args):
+    """Audio bytes passed in memory via --audio-stdin or --audio-fd, else None"""
+    if args.audio_stdin:
+        return sys.stdin.buffer.read()
+    if args.audio_fd is not None:
+        with open(args.audio_fd, "rb") as f:
+            if f.seekable():
+                # A memfd is usually handed over with its offset at the end
+                f.seek(0)
+            return f.read()
+    return None
+
+
+def has_audio(request):
+    return bool(
+        request.get("audio_data") is not None
+        or request.get("audio_base64")
+        or request.get("audio_file")
+    )
 
-        elif args.has_image:
-            has_image_input = True
-            user_message = f"[User has an image] {user_message}"
 
-        if not user_message or user_message.strip() == "":
-            print(json.dumps({"success": False, "error": "No valid input provided"}))
-            return
+def load_audio(request):
+    """
+    The request's audio bytes: in-memory "audio_data", "audio_base64" (the
+    worker protocol) or an "audio_file" path. Raises if missing or empty.
+    """
+    if request.get("audio_data") is None and not request.get("audio_base64"):
+        return read_audio_file(request["audio_file"])
 
-        try:
-            from llm_pipeline import generate_malayalam_response
+    audio_data = request.get("audio_data")
+    if audio_data is None:
+        with metrics.timed("audio_read"):
+            audio_data = base64.b64decode(request["audio_base64"])
+    print(f"🎤 Processing audio: {len(audio_data)} bytes in memory", file=sys.stderr)
+    if len(audio_data) == 0:
+        raise Exception("Audio file is empty")
+    return audio_data
 
-            ai_response = generate_malayalam_response(
-                user_message,
-                has_image=has_image_input,
-                has_audio=has_audio_input,
-                image_path=image_path,
-            )
-            response_text = ""
-            title_text = ""
-            confidence = ai_response.confidence
-            if hasattr(ai_response, "response"):
-                response_text = str(ai_response.response)
-            if hasattr(ai_response, "title"):
-                title_text = str(ai_response.title)
 
-            if not response_text:
-                if isinstance(ai_response, str):
-                    response_text = ai_response
-                elif isinstance(ai_response, dict):
-                    response_text = str(ai_response.get("response", ""))
-                    title_text = str(ai_response.get("title", ""))
-                else:
-                    response_text = str(ai_response)
+def read_audio_file(audio_file):
+    """Read the uploaded audio, raising if it is missing or empty"""
+    if not os.path.exists(audio_file):
+        raise FileNotFoundError(f"Audio file not found: {audio_file}")
 
-            preview = (
-                response_text[:50] + "..." if len(response_text) > 50 else response_text
-            )
-            print(f"🤖 LLM response: '{preview}'", file=sys.stderr)
+    with metrics.timed("audio_read"), open(audio_file, "rb") as f:
+        audio_data = f.read()
+
+    print(
+        f"🎤 Processing audio file: {len(audio_data)} bytes",
+        file=sys.stderr,
+    )
+
+    if len(audio_data) == 0:
+        raise Exception("Audio file is empty")
+    return audio_data
+
+
+def transcription_error(user_message):
+    """Bridge error result when a transcript came back empty, else None"""
+    if not user_message or user_message.strip() == "":
+        return {
+            "success": False,
+            "error": "Could not transcribe audio. Please speak clearly and try again.",
+        }
+    print(f"🔤 Transcribed: '{user_message[:50]}...'", file=sys.stderr)
+    return None
+
+
+def attach_image(request, user_message):
+    """Tag the message with the request's image context. Returns (user_message, has_image)"""
+    image_file = request.get("image_file")
+    if image_file:
+        try:
+            if not os.path.exists(image_file):
+                raise FileNotFoundError(f"Image file not found: {image_file}")
+
+            print(f"🖼️ Image file processed: {image_file}", file=sys.stderr)
+            return f"[User uploaded an image] {user_message}", True
 
         except Exception as e:
-            print(f"LLM error: {e}", file=sys.stderr)
-            response_text = get_fallback_response(user_message)
-            title_text = "Farming Help"
-            confidence = 0
-            print(f"Fallback response: '{response_text[:50]}...'", file=sys.stderr)
+            print(f"Image processing error: {e}", file=sys.stderr)
+
+    elif request.get("has_image"):
+        return f"[User has an image] {user_message}", True
 
-        audio_base64 = None
+    return user_message, False
+
+
+def build_inputs(request, user_message, has_audio_input):
+    """
+    Finish input handling once the text is known. Returns (inputs, error)
+    where error is a bridge error result or None.
+    """
+    from script_classifier import classify
+
+    # Classified once, before the English image marker is prepended, and
+    # passed on to the LLM, TTS and fallback paths
+    language = classify(user_message) if user_message.strip() else None
+    user_message, has_image_input = attach_image(request, user_message)
+
+    if not user_message or user_message.strip() == "":
+        return None, {"success": False, "error": "No valid input provided"}
+
+    if language is not None:
+        print(
+            f"Detected language: {language.lang} "
+            f"({language.source}, {language.confidence:.2f})",
+            file=sys.stderr,
+        )
+    return {
+        "user_message": user_message,
+        "lang": language.lang if language is not None else None,
+        "has_audio": has_audio_input,
+        "has_image": has_image_input,
+        "image_path": request.get("image_file") or None,
+        "session_id": request.get("session_id") or None,
+        "input_types": {
+            "audio": has_audio_input,
+            "text": bool(request.get("text")),
+            "image": has_image_input,
+        },
+    }, None
+
+
+def prepare_input(request):
+    """
+    Resolve the request's audio, text and image fields into the user message.
+    Returns (inputs, error) where error is a bridge error result or None.
+    """
+    text = request.get("text")
+
+    user_message = ""
+    has_audio_input = False
+
+    if has_audio(request):
         try:
-            audio_base64 = text_to_speech(response_text)
-            if audio_base64:
-                print(
-                    f"🎵 Generated TTS audio: {len(audio_base64)} chars",
-                    file=sys.stderr,
-                )
+            audio_data = load_audio(request)
+            user_message = speech_to_text(audio_data)
+            error = transcription_error(user_message)
+            if error:
+                return None, error
+            has_audio_input = True
+
         except Exception as e:
-            print(f"TTS error: {e}", file=sys.stderr)
+            print(f"Audio processing error: {e}", file=sys.stderr)
+            return None, {
+                "success": False,
+                "error": f"Audio processing failed: {str(e)}",
+            }
+
+    elif text:
+        user_message = text.strip()
+        print(f"📝 Text input received: '{user_message[:50]}...'", file=sys.stderr)
+
+    return build_inputs(request, user_message, has_audio_input)
+
+
+def process_request(request, raw_audio=False):
+    """
+    Run a single bridge request and return the JSON-serialisable result.
+    `request` carries the same fields as the CLI flags: audio_file, text,
+    image_file and has_image. With raw_audio the speech is returned as bytes
+    under "audio" instead of base64 under "audio_base64" (see bridge_frames).
+    """
+    with metrics.timed("request"):
+        return _process_request(request, raw_audio)
+
+
+def answer_key(inputs):
+    """
+    Key under which identical in-flight requests share one answer: the
+    query text exactly as asked (NFC, whitespace collapsed), its language and
+    the attached image's hash. Unlike the cache key nothing else is folded
+    together, since a wrong merge gives a user someone else's answer. None
+    when the image cannot be hashed, or when the request's chat already has
+    history, which shapes the answer, so the request is answered on its own.
+    A chat's first turn is keyed like a request without one.
+    """
+    import hashlib
+    import unicodedata
+
+    import conversation
+    from llm_pipeline import build_query
+
+    if conversation.load(inputs["session_id"]):
+        return None
+
+    try:
+        from image_preprocess import image_hash
 
+        attached = image_hash(inputs["image_path"])
+    except Exception as e:
+        print(f"Image hash failed, not coalescing: {e}", file=sys.stderr)
+        return None
+    query = build_query(
+        inputs["user_message"],
+        inputs["has_image"],
+        inputs["has_audio"],
+        inputs["image_path"],
+    )
+    text = " ".join(unicodedata.normalize("NFC", query).split())
+    raw = "\x1f".join((text, inputs["lang"] or "", attached))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def answer(inputs):
+    """LLM response (or fallback) and its speech for prepared inputs"""
+    user_message = inputs["user_message"]
+
+    fallback = False
+    try:
+        from llm_pipeline import generate_malayalam_response, is_fallback
+
+        ai_response = generate_malayalam_response(
+            user_message,
+            has_image=inputs["has_image"],
+            has_audio=inputs["has_audio"],
+            image_path=inputs["image_path"],
+            detected_lang=inputs["lang"],
+            session_id=inputs["session_id"],
+        )
+        response_text = ""
+        title_text = ""
+        confidence = ai_response.confidence
+        fallback = is_fallback(ai_response)
+        if hasattr(ai_response, "response"):
+            response_text = str(ai_response.response)
+        if hasattr(ai_response, "title"):
+            title_text = str(ai_response.title)
+
+        if not response_text:
+            if isinstance(ai_response, str):
+                response_text = ai_response
+            elif isinstance(ai_response, dict):
+                response_text = str(ai_response.get("response", ""))
+                title_text = str(ai_response.get("title", ""))
+            else:
+                response_text = str(ai_response)
+
+        preview = (
+            response_text[:50] + "..." if len(response_text) > 50 else response_text
+        )
+        print(f"🤖 LLM response: '{preview}'", file=sys.stderr)
+
+    except Exception as e:
+        print(f"LLM error: {e}", file=sys.stderr)
+        metrics.inc("fallbacks", kind="llm_bridge")
+        response_text = get_fallback_response(user_message, inputs["lang"])
+        title_text = "Farming Help"
+        confidence = 0
+        fallback = True
+        print(f"Fallback response: '{response_text[:50]}...'", file=sys.stderr)
+
+    audio = None
+    try:
+        audio = text_to_speech_bytes(response_text, inputs["lang"])
+        if audio:
+            print(f"🎵 Generated TTS audio: {len(audio)} bytes", file=sys.stderr)
+    except Exception as e:
+        print(f"TTS error: {e}", file=sys.stderr)
+
+    return {
+        "title": title_text,
+        "response_text": response_text,
+        "audio": audio,
+        "confidence": confidence,
+        "fallback": fallback,
+    }
+
+
+def coalesced_answer(inputs):
+    """
+    answer(), shared with identical requests already in flight in this
+    process. A request that got another's answer records it in its own chat,
+    as the pipeline does for the request that computed it.
+    """
+    from single_flight import get_coalescer
+
+    coalescer = get_coalescer()
+    key = answer_key(inputs) if coalescer is not None else None
+    if key is None:
+        return answer(inputs)
+
+    computed = []
+
+    def compute():
+        computed.append(True)
+        return answer(inputs)
+
+    reply = coalescer.do(key, compute)
+    if not computed and inputs["session_id"] and not reply["fallback"]:
+        import conversation
+
+        session_id = inputs["session_id"]
+        conversation.record_turn(
+            session_id,
+            conversation.load(session_id),
+            inputs["user_message"],
+            reply["title"],
+            reply["response_text"],
+        )
+    return reply
+
+
+def _process_request(request, raw_audio=False):
+    try:
+        inputs, error = prepare_input(request)
+        if error:
+            return error
+
+        reply = coalesced_answer(inputs)
+        audio = reply["audio"]
         result = {
             "success": True,
-            "transcribed_text": user_message if has_audio_input else None,
-            "title": title_text,
-            "response_text": response_text,
-            "audio_base64": audio_base64,
-            "confidence": confidence,
-            "input_types": {
-                "audio": has_audio_input,
-                "text": bool(args.text),
-                "image": has_image_input,
-            },
+            "transcribed_text": inputs["user_message"] if inputs["has_audio"] else None,
+            "title": reply["title"],
+            "response_text": reply["response_text"],
+            "confidence": reply["confidence"],
+            "fallback": reply["fallback"],
+            "input_types": inputs["input_types"],
         }
-
-        print(json.dumps(result, ensure_ascii=False))
+        if raw_audio:
+            result["audio"] = audio
+        else:
+            result["audio_base64"] = base64.b64encode(audio).decode() if audio else None
+        return result
 
     except Exception as e:
         print(f"Bridge error: {e}", file=sys.stderr)
-        print(json.dumps({"success": False, "error": f"Processing failed: {str(e)}"}))
+        return {"success": False, "error": f"Processing failed: {str(e)}"}
 
 
-def speech_to_text(audio_data):
+def stream_request(request, emit):
+    """
+    Streaming variant of process_request. Calls emit(event) for each
+    newline-delimited JSON event as soon as it is ready: "transcript",
+    "title", "delta" pieces of the response text, one "audio" event per
+    synthesised sentence (in order), then "done" with the full result minus
+    audio. Input errors are reported as a single "error" event.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from speech_text import SpeechNormaliser
 
     try:
-        try:
-            import openai
-        except ImportError:
-            print(
-                "OpenAI not installed. Install with: pip install openai",
-                file=sys.stderr,
-            )
-            return None
+        inputs, error = prepare_input(request)
+        if error:
+            emit({"event": "error", **error})
+            return
 
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            print("OPENAI_API_KEY not found in environment variables", file=sys.stderr)
-            return None
-        openai.api_key = api_key
+        user_message = inputs["user_message"]
+        if inputs["has_audio"]:
+            emit({"event": "transcript", "text": user_message})
+
+        # One TTS thread keeps sentence order while the LLM keeps streaming
+        tts_pool = ThreadPoolExecutor(max_workers=1)
+        audio_jobs = []
+        sent_audio = 0
+        speech = None
+        tts_lang = None
+
+        def queue_audio(delta="", final=False):
+            nonlocal speech, tts_lang
+            if speech is None:
+                if not delta.strip():
+                    return
+                tts_lang = detect_tts_language(delta, inputs["lang"])
+                speech = SpeechNormaliser(tts_lang)
+            sentences = speech.flush() if final else speech.feed(delta)
+            if sentences:
+                audio_jobs.append(
+                    tts_pool.submit(synthesize_chunk, " ".join(sentences), tts_lang)
+                )
 
-        try:
-            client = openai.OpenAI(api_key=api_key)
-        except AttributeError:
-            # Fallback for older OpenAI versions
-            client = None
-        # Save audio data to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as temp_file:
-            temp_file.write(audio_data)
-            temp_file_path = temp_file.name
+        def flush_audio(wait=False):
+            nonlocal sent_audio
+            while sent_audio < len(audio_jobs):
+                job = audio_jobs[sent_audio]
+                if not wait and not job.done():
+                    break
+                audio = job.result()
+                if audio:
+                    emit(
+                        {
+                            "event": "audio",
+                            "index": sent_audio,
+                            "audio_base64": base64.b64encode(audio).decode(),
+                        }
+                    )
+                sent_audio += 1
 
+        title_text = ""
+        response_text = ""
+        confidence = 0
         try:
+            from llm_pipeline import stream_malayalam_response
 
-            with open(temp_file_path, "rb") as audio_file:
-                if client:  # New API version
-                    transcript = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        temperature=0,
-                        prompt="This is a farming conversation in Malayalam, Hindi, or English about agriculture, crops, soil, fertilizers, or pest control.",
-                    )
-                    return transcript.text.strip()
-                else:  # Old API version or SDK missing helper
-                    # Prefer SDK method if available, otherwise call the REST endpoint directly, do not change it!
-                    prompt_text = "This is a farming conversation in Malayalam, Hindi, or English about agriculture, crops, soil, fertilizers, or pest control."
-                    # Use getattr to safely retrieve the Audio attribute to avoid static analysis errors, better in this case!, do not use openai.Audio, will give errors!
-                    audio_module = getattr(openai, "Audio", None)
-                    if audio_module and hasattr(audio_module, "transcribe"):
-                        transcribe_fn = getattr(audio_module, "transcribe")
-                        transcript = transcribe_fn(
-                            "whisper-1", audio_file, temperature=0, prompt=prompt_text
-                        )
-                        # Some SDKs return an object with .text, some return a dict
-                        if hasattr(transcript, "text"):
-                            return transcript.text.strip()
-                        elif isinstance(transcript, dict) and "text" in transcript:
-                            return transcript["text"].strip()
-                        else:
-                            return str(transcript).strip()
-                    else:
-                        # Fallback: call the HTTP API directly (works regardless of installed SDK)
-                        try:
-                            import requests
-                        except ImportError:
-                            raise Exception(
-                                "requests not installed; install with: pip install requests"
-                            )
-                        audio_file.seek(0)
-                        headers = {"Authorization": f"Bearer {api_key}"}
-                        files = {
-                            "file": (
-                                "audio.webm",
-                                audio_file,
-                                "application/octet-stream",
-                            )
-                        }
-                        data = {
-                            "model": "whisper-1",
-                            "temperature": 0,
-                            "prompt": prompt_text,
-                        }
-                        resp = requests.post(
-                            "https://api.openai.com/v1/audio/transcriptions",
-                            headers=headers,
-                            files=files,
-                            data=data,
-                        )
-                        resp.raise_for_status()
-                        j = resp.json()
-                        return j.get("text", "").strip()
-        finally:
-
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            for kind, value in stream_malayalam_response(
+                user_message,
+                has_image=inputs["has_image"],
+                has_audio=inputs["has_audio"],
+                image_path=inputs["image_path"],
+                detected_lang=inputs["lang"],
+                session_id=inputs["session_id"],
+            ):
+                if kind == "title":
+                    title_text = value
+                    emit({"event": "title", "title": value})
+                elif kind == "delta":
+                    response_text += value
+                    emit({"event": "delta", "text": value})
+                    queue_audio(value)
+                elif kind == "final":
+                    title_text = value.title
+                    response_text = value.response
+                    confidence = value.confidence
+                flush_audio()
+        except Exception as e:
+            print(f"LLM error: {e}", file=sys.stderr)
+            metrics.inc("fallbacks", kind="llm_bridge")
+            if not response_text:
+                title_text = "Farming Help"
+                response_text = get_fallback_response(user_message, inputs["lang"])
+                emit({"event": "title", "title": title_text})
+                emit({"event": "delta", "text": response_text})
+                queue_audio(response_text)
+
+        queue_audio(final=True)
+        flush_audio(wait=True)
+        tts_pool.shutdown()
+
+        emit(
+            {
+                "event": "done",
+                "success": True,
+                "transcribed_text": user_message if inputs["has_audio"] else None,
+                "title": title_text,
+                "response_text": response_text,
+                "confidence": confidence,
+                "input_types": inputs["input_types"],
+            }
+        )
+
+    except Exception as e:
+        print(f"Bridge error: {e}", file=sys.stderr)
+        emit(
+            {"event": "error", "success": False, "error": f"Processing failed: {str(e)}"}
+        )
+
+
+def speech_to_text(audio_data):
+    """
+    Transcribe with OpenAI Whisper, falling back to the local Whisper model.
+    Silence and long pauses are cut from the voice note first. A provider
+    whose circuit is open is skipped; with HEDGE=1 local Whisper also starts
+    when OpenAI takes longer than its recent p95.
+    """
+    from provider_health import get_breaker, hedged, hedging_enabled
+
+    audio_data = compact_audio(audio_data)
+    if hedging_enabled():
+        try:
+            provider, text = hedged(
+                "openai_stt",
+                lambda: _transcribe_with("openai", _openai_transcribe, audio_data),
+                "local_stt",
+                lambda: _transcribe_with("local", _local_transcribe, audio_data),
+            )
+            if provider == "local_stt":
+                metrics.inc("fallbacks", kind="stt_local")
+            return text
+        except Exception as e:
+            print(f"Speech-to-text failed: {e}", file=sys.stderr)
+            return None
 
+    try:
+        return get_breaker("openai_stt").call(
+            lambda: _transcribe_with("openai", _openai_transcribe, audio_data)
+        )
     except ImportError:
         print("OpenAI not installed. Install with: pip install openai", file=sys.stderr)
         return None
     except Exception as e:
         print(f"OpenAI Whisper failed: {e}, trying local Whisper...", file=sys.stderr)
+        metrics.inc("fallbacks", kind="stt_local")
         try:
-            import whisper
-
-            # Save audio to temp file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-
-            try:
-                # Load model (downloads on first use)
-                model = whisper.load_model("base")
-                result = model.transcribe(temp_file_path, language="ml")
-                # Normalize different possible return formats into a single string.
-                text_val = ""
-                if isinstance(result, dict):
-                    if "text" in result:
-                        text_field = result["text"]
-                        if isinstance(text_field, list):
-                            # Join list parts into a single string
-                            text_val = " ".join(
-                                part if isinstance(part, str) else str(part)
-                                for part in text_field
-                            )
-                        elif isinstance(text_field, str):
-                            text_val = text_field
-                        else:
-                            text_val = str(text_field)
-                    elif "segments" in result and isinstance(result["segments"], list):
-                        # Some transcribers return segments with text fields
-                        parts = []
-                        for seg in result["segments"]:
-                            t = seg.get("text", "")
-                            if isinstance(t, str):
-                                parts.append(t)
-                            else:
-                                parts.append(str(t))
-                        text_val = " ".join(parts)
-                    else:
-                        text_val = str(result)
-                else:
-                    # Fallback when result is not a dict
-                    text_val = str(result)
-                return text_val.strip()
-            finally:
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            return get_breaker("local_stt").call(
+                lambda: _transcribe_with("local", _local_transcribe, audio_data)
+            )
         except ImportError:
             print(
                 "Local Whisper not available. Install with: pip install openai-whisper",
@@ -323,66 +630,218 @@ def speech_to_text(audio_data):
         except Exception as e:
             print(f"Local Whisper error: {e}", file=sys.stderr)
             return None
-        return None
 
 
-def clean_markdown_for_tts(text):
-    """Remove markdown formatting for clean TTS speech"""
-    import re
+def compact_audio(audio_data):
+    """Voice note with silence and long pauses removed, or unchanged on failure"""
+    try:
+        import audio_compact
 
-    # Remove bullet point asterisks
-    text = re.sub(r"^\s*\*\s+", "", text, flags=re.MULTILINE)
+        return audio_compact.compact(audio_data).data
+    except ImportError as e:
+        print(f"Audio compaction unavailable: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"Audio compaction skipped: {e}", file=sys.stderr)
+    return audio_data
 
-    # Remove bold/italic asterisks
-    text = re.sub(r"\*+([^*]+)\*+", r"\1", text)
 
-    # Remove remaining standalone asterisks
-    text = re.sub(r"\*", "", text)
+def _transcribe_with(provider, transcribe, audio_data):
+    with metrics.timed("stt", provider=provider):
+        return transcribe(audio_data)
 
-    # Remove other markdown symbols
-    text = re.sub(r"`([^`]+)`", r"\1", text)  # Remove code backticks
-    text = re.sub(r"_([^_]+)_", r"\1", text)  # Remove underscores
 
-    # Clean up multiple spaces/newlines
-    text = re.sub(r"\n\s*\n", "\n", text)  # Remove empty lines
-    text = re.sub(r"\s+", " ", text)  # Normalize spaces
+def _openai_transcribe(audio_data):
+    try:
+        import openai
+    except ImportError:
+        print(
+            "OpenAI not installed. Install with: pip install openai",
+            file=sys.stderr,
+        )
+        return None
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("OPENAI_API_KEY not found in environment variables", file=sys.stderr)
+        return None
+    openai.api_key = api_key
 
-    return text.strip()
+    try:
+        import http_clients
+
+        client = http_clients.get_openai_client(api_key)
+    except AttributeError:
+        # Fallback for older OpenAI versions
+        client = None
+    from audio_decode import guess_filename
+
+    # The upload is sent straight from memory; the name tells the API the format
+    filename = guess_filename(audio_data)
+    if client:  # New API version
+        transcript = client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(filename, audio_data),
+            temperature=0,
+            prompt="This is a farming conversation in Malayalam, Hindi, or English about agriculture, crops, soil, fertilizers, or pest control.",
+        )
+        return transcript.text.strip()
+    else:  # Old API version or SDK missing helper
+        # Prefer SDK method if available, otherwise call the REST endpoint directly, do not change it!
+        prompt_text = "This is a farming conversation in Malayalam, Hindi, or English about agriculture, crops, soil, fertilizers, or pest control."
+        # Use getattr to safely retrieve the Audio attribute to avoid static analysis errors, better in this case!, do not use openai.Audio, will give errors!
+        audio_module = getattr(openai, "Audio", None)
+        if audio_module and hasattr(audio_module, "transcribe"):
+            transcribe_fn = getattr(audio_module, "transcribe")
+            audio_file = io.BytesIO(audio_data)
+            audio_file.name = filename
+            transcript = transcribe_fn(
+                "whisper-1", audio_file, temperature=0, prompt=prompt_text
+            )
+            # Some SDKs return an object with .text, some return a dict
+            if hasattr(transcript, "text"):
+                return transcript.text.strip()
+            elif isinstance(transcript, dict) and "text" in transcript:
+                return transcript["text"].strip()
+            else:
+                return str(transcript).strip()
+        else:
+            # Fallback: call the HTTP API directly (works regardless of installed SDK)
+            try:
+                import requests
+            except ImportError:
+                raise Exception(
+                    "requests not installed; install with: pip install requests"
+                )
+            headers = {"Authorization": f"Bearer {api_key}"}
+            files = {
+                "file": (
+                    filename,
+                    audio_data,
+                    "application/octet-stream",
+                )
+            }
+            data = {
+                "model": "whisper-1",
+                "temperature": 0,
+                "prompt": prompt_text,
+            }
+            import http_clients
+
+            resp = http_clients.get_session().post(
+                "https://api.openai.com/v1/audio/transcriptions",
+                headers=headers,
+                files=files,
+                data=data,
+                timeout=http_clients.timeouts(),
+            )
+            resp.raise_for_status()
+            j = resp.json()
+            return j.get("text", "").strip()
 
 
-def text_to_speech(text):
+def _local_transcribe(audio_data):
+    import whisper_chunked
+    import whisper_models
+    from audio_decode import decode_pcm
 
-    try:
-        from gtts import gTTS
-        import re
-
-        clean_text = clean_markdown_for_tts(text)
-        text_lower = text.lower()
-        malayalam_chars = "ഇഎഒഔകഖഗഘചഛജഝടഠഡഢണതഥദധനപഫബഭമയരറലളഴവശഷസഹാിീുൂൃെേൈൊോൗ്"
-        hindi_chars = "अआइईउऊएऐओऔकखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसहািীুূৃেৈোৌং্"
-
-        if any(char in text for char in malayalam_chars):
-            lang = "ml"  # Malayalam
-        elif any(char in text for char in hindi_chars):
-            lang = "hi"
+    # Decoded in memory once; long notes are split across the Whisper pool
+    pcm = decode_pcm(audio_data)
+    result = whisper_chunked.transcribe(
+        pcm, language=whisper_models.default_language()
+    )
+    # Normalize different possible return formats into a single string.
+    text_val = ""
+    if isinstance(result, dict):
+        if "text" in result:
+            text_field = result["text"]
+            if isinstance(text_field, list):
+                # Join list parts into a single string
+                text_val = " ".join(
+                    part if isinstance(part, str) else str(part)
+                    for part in text_field
+                )
+            elif isinstance(text_field, str):
+                text_val = text_field
+            else:
+                text_val = str(text_field)
+        elif "segments" in result and isinstance(result["segments"], list):
+            # Some transcribers return segments with text fields
+            parts = []
+            for seg in result["segments"]:
+                t = seg.get("text", "")
+                if isinstance(t, str):
+                    parts.append(t)
+                else:
+                    parts.append(str(t))
+            text_val = " ".join(parts)
         else:
-            lang = "en"  # English
+            text_val = str(result)
+    else:
+        # Fallback when result is not a dict
+        text_val = str(result)
+    return text_val.strip()
 
-        print(f"🔊 Generating TTS in language: {lang}", file=sys.stderr)
 
-        tts = gTTS(
-            text=clean_text,
-            lang=lang,
-            slow=False,
-            tld="co.in" if lang in ["hi", "ml"] else "com",
-        )
+def clean_markdown_for_tts(text, lang="en"):
+    """Turn markdown response text into speech text (see speech_text)"""
+    from speech_text import normalise
+
+    return normalise(text, lang)
 
+
+def detect_tts_language(text, lang=None):
+    """gTTS language: the request's language if a voice exists for it, else the text's script"""
+    from script_classifier import supported_language
+
+    return supported_language(lang, text)
+
+
+def synthesize_speech(clean_text, lang):
+    """Return MP3 bytes for already-cleaned text, reusing cached sentences"""
+    from http_clients import get_gtts_class
+
+    gTTS = get_gtts_class()
+    tld = "co.in" if lang in ["hi", "ml"] else "com"
+
+    def synthesize(segment):
+        tts = gTTS(text=segment, lang=lang, slow=False, tld=tld)
         audio_buffer = io.BytesIO()
         tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
+        return audio_buffer.getvalue()
 
-        audio_data = audio_buffer.read()
-        return base64.b64encode(audio_data).decode()
+    from tts_cache import get_tts_cache
+
+    cache = get_tts_cache()
+    if cache is not None:
+        return cache.synthesize(clean_text, lang, tld, synthesize)
+    return synthesize(clean_text)
+
+
+def synthesize_chunk(speech_text, lang):
+    """MP3 bytes for normalised sentences of a streamed response, or None on failure"""
+    try:
+        with metrics.timed("tts"):
+            return synthesize_speech(speech_text, lang)
+    except Exception as e:
+        print(f"TTS error: {e}", file=sys.stderr)
+        return None
+
+
+def text_to_speech(text, lang=None):
+    audio_data = text_to_speech_bytes(text, lang)
+    return base64.b64encode(audio_data).decode() if audio_data else None
+
+
+def text_to_speech_bytes(text, lang=None):
+    """MP3 bytes for a markdown response, or None on failure"""
+    try:
+        lang = detect_tts_language(text, lang)
+        clean_text = clean_markdown_for_tts(text, lang)
+
+        print(f"🔊 Generating TTS in language: {lang}", file=sys.stderr)
+
+        with metrics.timed("tts"):
+            return synthesize_speech(clean_text, lang)
 
     except ImportError:
         print("gTTS not installed. Install with: pip install gtts", file=sys.stderr)
@@ -421,14 +880,12 @@ def text_to_speech(text):
 #         return "I'm your AI farming assistant! I can help with crops, soil management, fertilizers, pest control, weather planning, and sustainable farming practices. Please share your specific farming question."
 
 
-def get_fallback_response(user_message: str) -> str:
+def get_fallback_response(user_message: str, detected_lang=None) -> str:
     # Updated for better user-friendliness and language
-    try:
-        from langdetect import detect
+    if detected_lang is None:
+        from script_classifier import detect
 
         detected_lang = detect(user_message)
-    except:
-        detected_lang = "en"
 
     if detected_lang == "ml":
         return "നിങ്ങളുടെ ചോദ്യം മനസ്സിലായി! കൃഷി, വിളകൾ, മണ്ണ്, വളങ്ങൾ എന്നിവയെക്കുറിച്ച് സഹായിക്കാം. കൂടുതൽ വിവരങ്ങൾ നൽകൂ."
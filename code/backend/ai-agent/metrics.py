@@ -0,0 +1,180 @@
+"""
+Lightweight instrumentation for the bridge and LLM pipeline.
+
+Stages are timed into fixed-bucket histograms and fallbacks/errors are
+counted, all in-process. Export is either Prometheus text or a JSON
+snapshot. With BRIDGE_METRICS unset every call returns immediately, so the
+instrumentation can stay in hot paths.
+
+    with metrics.timed("stt", provider="openai"):
+        ...
+    metrics.inc("fallbacks", kind="stt_local")
+
+Environment:
+    BRIDGE_METRICS       off | json | prometheus (default: off)
+    BRIDGE_METRICS_FILE  where CLI runs write Prometheus text (default: stderr)
+"""
+
+import os
+import threading
+import time
+
+MODE = os.getenv("BRIDGE_METRICS", "off").lower()
+ENABLED = MODE in ("json", "prometheus")
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+
+
+def observe(stage, seconds, **labels):
+    """Record one duration for `stage`"""
+    if not ENABLED:
+        return
+    key = (stage, _label_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram()
+        histogram.observe(seconds)
+
+
+def inc(name, amount=1, **labels):
+    """Increment a counter such as "fallbacks" or "errors" """
+    if not ENABLED:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+class _Timer:
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            inc("errors", stage=self.stage)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(stage, **labels):
+    """Context manager timing a stage; exceptions also count as stage errors"""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(stage, labels)
+
+
+def snapshot():
+    """JSON-serialisable view of every histogram and counter"""
+    with _lock:
+        stages = {}
+        for (stage, labels), h in _histograms.items():
+            name = stage + "".join(f"{{{k}={v}}}" for k, v in labels)
+            stages[name] = {
+                "count": h.count,
+                "sum_ms": round(h.sum * 1000, 1),
+                "mean_ms": round(h.sum / h.count * 1000, 1) if h.count else 0.0,
+            }
+        counters = {
+            name + "".join(f"{{{k}={v}}}" for k, v in labels): value
+            for (name, labels), value in _counters.items()
+        }
+    return {"stages": stages, "counters": counters}
+
+
+def _prom_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def export_prometheus():
+    """Prometheus text exposition of every histogram and counter"""
+    lines = [
+        "# HELP bridge_stage_seconds Time spent in each bridge stage",
+        "# TYPE bridge_stage_seconds histogram",
+    ]
+    with _lock:
+        for (stage, labels), h in sorted(_histograms.items()):
+            base = (("stage", stage),) + labels
+            cumulative = 0
+            for bound, count in zip(BUCKETS, h.counts):
+                cumulative += count
+                lines.append(
+                    f"bridge_stage_seconds_bucket{_prom_labels(base, [('le', bound)])} "
+                    f"{cumulative}"
+                )
+            lines.append(
+                f"bridge_stage_seconds_bucket{_prom_labels(base, [('le', '+Inf')])} "
+                f"{h.count}"
+            )
+            lines.append(f"bridge_stage_seconds_sum{_prom_labels(base)} {h.sum:.6f}")
+            lines.append(f"bridge_stage_seconds_count{_prom_labels(base)} {h.count}")
+
+        names = sorted({name for name, _ in _counters})
+        for name in names:
+            lines.append(f"# TYPE bridge_{name}_total counter")
+            for (counter, labels), value in sorted(_counters.items()):
+                if counter == name:
+                    lines.append(f"bridge_{name}_total{_prom_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def export():
+    """Export in the configured format: a dict for json, text for prometheus"""
+    if MODE == "prometheus":
+        return export_prometheus()
+    return snapshot()
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
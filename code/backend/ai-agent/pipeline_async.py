@@ -0,0 +1,245 @@
+"""
+Asyncio version of the bridge pipeline.
+
+process_request runs every step back to back. run_pipeline returns the same
+result but overlaps the independent work:
+
+- the attached image is read and encoded while the audio is read and
+  transcribed, and while the language of a text query is detected;
+- Gemini is streamed, and each run of complete sentences goes to TTS as soon
+  as it arrives, so early sentences are synthesised while later ones are
+  still being generated.
+
+Blocking SDK calls run in the default thread pool executor. Every stage is
+timed and the wall-clock breakdown is returned as "timings_ms".
+"""
+
+import asyncio
+import base64
+import functools
+import os
+import sys
+import time
+
+import malayalam_api_bridge as bridge
+from speech_text import SpeechNormaliser
+
+# Concurrent gTTS requests per pipeline run
+TTS_CONCURRENCY = int(os.getenv("PIPELINE_TTS_CONCURRENCY", "3"))
+
+
+class StageTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    def record(self, stage, seconds):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    async def run(self, stage, fn, *args, **kwargs):
+        """Run a blocking call in the executor and record how long it took"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(
+                None, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def as_ms(self):
+        return {stage: round(s * 1000, 1) for stage, s in self.timings.items()}
+
+
+async def run_pipeline(request, raw_audio=False):
+    """Async counterpart of process_request with a per-stage "timings_ms" breakdown"""
+    timer = StageTimer()
+    try:
+        result = await _run(request, timer, raw_audio)
+    except Exception as e:
+        print(f"Bridge error: {e}", file=sys.stderr)
+        result = {"success": False, "error": f"Processing failed: {str(e)}"}
+
+    timer.record("total", time.perf_counter() - timer.started)
+    result["timings_ms"] = timer.as_ms()
+    print(
+        "⏱️ Stage timings: "
+        + ", ".join(f"{k}={v:.0f}ms" for k, v in result["timings_ms"].items()),
+        file=sys.stderr,
+    )
+    return result
+
+
+async def _run(request, timer, raw_audio=False):
+    from llm_pipeline import build_query, detect_language, encode_image
+
+    # The image does not depend on the transcript, so start on it straight away
+    image_file = request.get("image_file")
+    image_task = None
+    if image_file and os.path.exists(image_file):
+        image_task = asyncio.ensure_future(
+            timer.run("image_encode", encode_image, image_file)
+        )
+
+    user_message = ""
+    has_audio_input = False
+    if bridge.has_audio(request):
+        try:
+            audio_data = await timer.run("audio_read", bridge.load_audio, request)
+            user_message = await timer.run("stt", bridge.speech_to_text, audio_data)
+            error = bridge.transcription_error(user_message)
+            if error:
+                return error
+            has_audio_input = True
+        except Exception as e:
+            print(f"Audio processing error: {e}", file=sys.stderr)
+            return {"success": False, "error": f"Audio processing failed: {str(e)}"}
+    elif request.get("text"):
+        user_message = request["text"].strip()
+        print(f"📝 Text input received: '{user_message[:50]}...'", file=sys.stderr)
+
+    inputs, error = bridge.build_inputs(request, user_message, has_audio_input)
+    if error:
+        return error
+
+    full_query = build_query(
+        inputs["user_message"],
+        inputs["has_image"],
+        inputs["has_audio"],
+        inputs["image_path"],
+    )
+    detected_lang = inputs["lang"]
+    if detected_lang is None:
+        detected_lang = await timer.run(
+            "language_detection", detect_language, full_query
+        )
+
+    image_url = None
+    if image_task is not None:
+        try:
+            image_url = await image_task
+        except Exception as e:
+            print(f"Image encoding error: {e}", file=sys.stderr)
+
+    title_text, response_text, confidence, audio_data = await _generate_and_speak(
+        inputs, detected_lang, image_url, timer
+    )
+
+    result = {
+        "success": True,
+        "transcribed_text": inputs["user_message"] if has_audio_input else None,
+        "title": title_text,
+        "response_text": response_text,
+        "confidence": confidence,
+        "input_types": inputs["input_types"],
+    }
+    if raw_audio:
+        result["audio"] = audio_data
+    else:
+        result["audio_base64"] = (
+            base64.b64encode(audio_data).decode() if audio_data else None
+        )
+    return result
+
+
+async def _generate_and_speak(inputs, detected_lang, image_url, timer):
+    """Stream the Gemini answer and synthesise sentences while it is still arriving"""
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def produce():
+        try:
+            from llm_pipeline import stream_malayalam_response
+
+            for event in stream_malayalam_response(
+                inputs["user_message"],
+                has_image=inputs["has_image"],
+                has_audio=inputs["has_audio"],
+                image_path=inputs["image_path"],
+                detected_lang=detected_lang,
+                image_url=image_url,
+                session_id=inputs["session_id"],
+            ):
+                loop.call_soon_threadsafe(events.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(events.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    tts_slots = asyncio.Semaphore(TTS_CONCURRENCY)
+    tts_tasks = []
+    tts_window = []
+    tts_lang = None
+    speech = None
+
+    async def speak(chunk):
+        async with tts_slots:
+            start = time.perf_counter()
+            try:
+                return await loop.run_in_executor(
+                    None, bridge.synthesize_chunk, chunk, tts_lang
+                )
+            finally:
+                end = time.perf_counter()
+                timer.record("tts_busy", end - start)
+                tts_window.append((start, end))
+
+    def queue_audio(delta="", final=False):
+        nonlocal tts_lang, speech
+        if speech is None:
+            if not delta.strip():
+                return
+            tts_lang = bridge.detect_tts_language(delta, detected_lang)
+            speech = SpeechNormaliser(tts_lang)
+        sentences = speech.flush() if final else speech.feed(delta)
+        if sentences:
+            tts_tasks.append(asyncio.ensure_future(speak(" ".join(sentences))))
+
+    title_text = ""
+    response_text = ""
+    confidence = 0
+
+    llm_start = time.perf_counter()
+    producer = loop.run_in_executor(None, produce)
+    while True:
+        event = await events.get()
+        if event is None:
+            break
+        kind, value = event
+        if kind == "title":
+            title_text = value
+        elif kind == "delta":
+            if not response_text:
+                timer.record("llm_first_token", time.perf_counter() - llm_start)
+            response_text += value
+            queue_audio(value)
+        elif kind == "final":
+            title_text = value.title
+            response_text = value.response
+            confidence = value.confidence
+        elif kind == "error":
+            print(f"LLM error: {value}", file=sys.stderr)
+            if not response_text:
+                title_text = "Farming Help"
+                response_text = bridge.get_fallback_response(
+                    inputs["user_message"], detected_lang
+                )
+                queue_audio(response_text)
+    await producer
+    llm_end = time.perf_counter()
+    timer.record("llm", llm_end - llm_start)
+
+    queue_audio(final=True)
+    segments = await asyncio.gather(*tts_tasks)
+    if tts_window:
+        timer.record(
+            "tts", max(end for _, end in tts_window) - min(s for s, _ in tts_window)
+        )
+        # TTS time left on the critical path after the LLM finished
+        timer.record(
+            "tts_after_llm",
+            max(0.0, max(end for _, end in tts_window) - llm_end),
+        )
+
+    audio_data = b"".join(segment for segment in segments if segment)
+    return title_text, response_text, confidence, audio_data
@@ -0,0 +1,349 @@
+"""
+Provider health: circuit breakers and hedged requests for STT and LLM calls.
+
+Every remote provider (OpenAI Whisper, local Whisper, Gemini) gets a circuit
+breaker. After BREAKER_FAILURES consecutive failures the breaker opens and
+calls are refused immediately, so during an outage requests go straight to
+the fallback instead of each waiting out the full timeout. After
+BREAKER_RESET seconds one request is let through as a half-open probe: if it
+succeeds the breaker closes, otherwise it stays open for another period.
+
+    breaker = get_breaker("gemini")
+    result = breaker.call(lambda: llm.invoke(prompt))   # ProviderUnavailable when open
+
+Hedging is optional (HEDGE=1). hedged() starts the primary call and, if it
+has not answered after the primary's recent p95 latency, starts the backup
+too and returns whichever succeeds first. The slower call is left to finish
+in the background; its outcome still feeds its breaker. Each provider has
+its own bounded set of threads, so hung calls to one provider cannot hold
+up another's backup, and past HEDGE_DEADLINE the caller stops waiting and
+the calls still running count as failures.
+
+Environment:
+    BREAKER_FAILURES     consecutive failures that open a breaker (default: 3)
+    BREAKER_RESET        seconds before an open breaker lets a probe through (default: 30)
+    HEDGE                set to 1 to hedge slow calls (default: off)
+    HEDGE_MIN_DELAY      lower bound on the hedge delay in seconds (default: 0.5)
+    HEDGE_DEFAULT_DELAY  hedge delay until enough latencies are seen (default: 5)
+    HEDGE_DEADLINE       seconds before a hedged call gives up (default: 60)
+    HEDGE_WORKERS        threads per provider for hedged calls (default: 8)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURES", "3"))
+RESET_TIMEOUT = float(os.getenv("BREAKER_RESET", "30"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "5"))
+HEDGE_DEADLINE = float(os.getenv("HEDGE_DEADLINE", "60"))
+HEDGE_WORKERS = int(os.getenv("HEDGE_WORKERS", "8"))
+
+# Successful calls needed before the p95 is trusted as a hedge delay
+MIN_LATENCY_SAMPLES = 20
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider whose breaker is open"""
+
+    def __init__(self, provider):
+        super().__init__(f"{provider} circuit is open")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    def __init__(
+        self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.latencies = deque(maxlen=200)
+
+        self.calls = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self):
+        """Whether a call may go out now; a half-open breaker admits one probe at a time"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return self._reject()
+                self.state = HALF_OPEN
+                print(
+                    f"🩺 {self.name}: probing after {self.reset_timeout:.0f}s open",
+                    file=sys.stderr,
+                )
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    return self._reject()
+                self._probing = True
+            self.calls += 1
+            return True
+
+    def _reject(self):
+        self.rejected += 1
+        metrics.inc("breaker_rejections", provider=self.name)
+        return False
+
+    def release(self):
+        """Forget an admitted call that ended without a verdict"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                print(f"✅ {self.name}: circuit closed", file=sys.stderr)
+            self.state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                    metrics.inc("breaker_trips", provider=self.name)
+                    print(
+                        f"🔌 {self.name}: circuit open after {self.failures} failure(s)",
+                        file=sys.stderr,
+                    )
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def call(self, fn):
+        """Run fn() through the breaker, recording its outcome"""
+        if not self.allow():
+            raise ProviderUnavailable(self.name)
+        return self._run(fn)
+
+    def _run(self, fn):
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except BaseException:
+            self.record_failure()
+            raise
+        self.record_success(time.perf_counter() - started)
+        return result
+
+    def p95(self):
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def hedge_delay(self):
+        p95 = self.p95()
+        return HEDGE_DEFAULT_DELAY if p95 is None else max(HEDGE_MIN_DELAY, p95)
+
+    def snapshot(self):
+        p95 = self.p95()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "trips": self.trips,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """The process-wide breaker for provider `name`"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def snapshot():
+    return {name: breaker.snapshot() for name, breaker in list(_breakers.items())}
+
+
+def reset():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def hedging_enabled():
+    return os.getenv("HEDGE", "0").lower() in ("1", "true", "yes", "on")
+
+
+class _Attempt:
+    """One call to a provider whose outcome is recorded on its breaker exactly once"""
+
+    def __init__(self, provider, breaker, fn):
+        self.provider = provider
+        self.breaker = breaker
+        self.fn = fn
+        self._lock = threading.Lock()
+        self._settled = False
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            result = self.fn()
+        except BaseException:
+            self._settle(self.breaker.record_failure)
+            raise
+        self._settle(lambda: self.breaker.record_success(time.perf_counter() - started))
+        return result
+
+    def abandon(self):
+        """Past the deadline: a failure now, whatever it does later"""
+        self._settle(self.breaker.record_failure)
+
+    def _settle(self, record):
+        with self._lock:
+            if self._settled:
+                return
+            self._settled = True
+        record()
+
+
+class _ProviderExecutor:
+    """
+    Threads for one provider's hedged calls. A call that hangs keeps its
+    thread, so when all of them are taken new calls are refused rather
+    than queued: one provider's outage cannot delay another's backup.
+    """
+
+    def __init__(self, name, size):
+        self._pool = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix=f"hedge-{name}"
+        )
+        self._slots = threading.BoundedSemaphore(size)
+
+    def submit(self, fn):
+        """A future for fn(), or None when every thread is busy"""
+        if not self._slots.acquire(blocking=False):
+            return None
+        future = self._pool.submit(fn)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+_executors = {}
+
+
+def _get_executor(provider):
+    executor = _executors.get(provider)
+    if executor is None:
+        with _breakers_lock:
+            executor = _executors.get(provider)
+            if executor is None:
+                executor = _executors[provider] = _ProviderExecutor(
+                    provider, HEDGE_WORKERS
+                )
+    return executor
+
+
+def hedged(primary, primary_fn, backup, backup_fn, deadline=None):
+    """
+    Call primary_fn through the `primary` breaker and, if it is slower than
+    its p95 or fails, backup_fn through the `backup` breaker. The two may
+    name the same provider to hedge with a duplicate request. Returns
+    (provider, result) for the first call to succeed; raises the last error
+    when neither does, and TimeoutError when neither answers within
+    `deadline` seconds (HEDGE_DEADLINE), counting both as failures.
+    """
+    deadline = HEDGE_DEADLINE if deadline is None else deadline
+    give_up_at = time.monotonic() + deadline
+    primary_breaker = get_breaker(primary)
+    backup_breaker = get_breaker(backup)
+
+    # future -> attempt; the primary's future is remembered to spot hedge wins
+    pending = {}
+    errors = []
+
+    def start(provider, breaker, fn):
+        if not breaker.allow():
+            return None
+        attempt = _Attempt(provider, breaker, fn)
+        future = _get_executor(provider).submit(attempt.run)
+        if future is None:
+            breaker.release()
+            metrics.inc("hedge_saturated", provider=provider)
+            print(f"🚧 {provider}: every hedge thread is busy", file=sys.stderr)
+            errors.append(ProviderUnavailable(provider))
+            return None
+        pending[future] = attempt
+        return future
+
+    primary_future = start(primary, primary_breaker, primary_fn)
+    backup_started = False
+
+    def start_backup():
+        nonlocal backup_started
+        backup_started = True
+        start(backup, backup_breaker, backup_fn)
+
+    if not pending:
+        start_backup()
+    delay = primary_breaker.hedge_delay()
+    hedge_at = time.monotonic() + delay
+
+    while pending:
+        now = time.monotonic()
+        if now >= give_up_at:
+            for attempt in pending.values():
+                attempt.abandon()
+            metrics.inc("hedge_deadlines", provider=primary)
+            raise TimeoutError(f"{primary} gave no answer within {deadline:.0f}s")
+        wake_at = give_up_at if backup_started else min(hedge_at, give_up_at)
+        done, _ = wait(
+            pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED
+        )
+        if not done:
+            if not backup_started and time.monotonic() >= hedge_at:
+                print(
+                    f"🏃 {primary} slower than {delay:.2f}s, hedging with {backup}",
+                    file=sys.stderr,
+                )
+                metrics.inc("hedges", provider=backup)
+                start_backup()
+            continue
+        for future in done:
+            attempt = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            if future is not primary_future and primary_future in pending:
+                metrics.inc("hedge_wins", provider=backup)
+            return attempt.provider, result
+        if not backup_started:
+            start_backup()
+
+    if errors:
+        raise errors[-1]
+    raise ProviderUnavailable(primary)
@@ -0,0 +1,205 @@
+"""
+Response cache for generate_malayalam_response.
+
+Entries are keyed on a normalised form of the query, the detected language
+and a hash of the attached image, and hold the FarmingResponse fields as a
+dict. Two backends are available: an in-process LRU and a SQLite file that
+every worker on the host can share. Both expire entries after a TTL and
+evict the least recently used ones beyond a size limit.
+
+Environment:
+    RESPONSE_CACHE                 memory | sqlite | off (default: memory)
+    RESPONSE_CACHE_PATH            SQLite file (default: .cache/responses.sqlite3)
+    RESPONSE_CACHE_TTL             seconds an entry stays valid (default: 86400)
+    RESPONSE_CACHE_SIZE            max entries (default: 1000)
+    RESPONSE_CACHE_MIN_CONFIDENCE  responses below this are not cached (default: 70)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+
+_whitespace_re = re.compile(r"\s+")
+
+
+def _is_punctuation(ch):
+    # Punctuation and symbols only: Indic vowel signs and virama are combining
+    # marks (Mn/Mc), not \w, yet they tell "काट" from "कीट"
+    return unicodedata.category(ch)[0] in "PS"
+
+
+def normalise_query(text):
+    """Casefold, drop punctuation and collapse whitespace so trivial variants share a key"""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = "".join(" " if _is_punctuation(ch) else ch for ch in text)
+    return _whitespace_re.sub(" ", text).strip()
+
+
+def make_cache_key(query, lang, image_hash=""):
+    raw = "\x1f".join((normalise_query(query), lang or "", image_hash or ""))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+        }
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries=1000, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self.stats.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache shared by every worker process that opens the same file"""
+
+    def __init__(self, path, max_entries=1000, ttl=86400):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.stats.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.stats.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + self.ttl, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            evicted = self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            self.stats.stores += 1
+            self.stats.evictions += max(evicted, 0)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+_cache = None
+_cache_initialised = False
+
+
+def get_response_cache():
+    """Return the process-wide cache configured from the environment, or None when disabled"""
+    global _cache, _cache_initialised
+    if _cache_initialised:
+        return _cache
+    _cache_initialised = True
+
+    backend = os.getenv("RESPONSE_CACHE", "memory").lower()
+    ttl = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+    size = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+
+    try:
+        if backend == "memory":
+            _cache = MemoryCache(max_entries=size, ttl=ttl)
+        elif backend == "sqlite":
+            path = os.getenv(
+                "RESPONSE_CACHE_PATH", str(script_dir / ".cache" / "responses.sqlite3")
+            )
+            _cache = SQLiteCache(path, max_entries=size, ttl=ttl)
+    except Exception as e:
+        print(f"Response cache disabled: {e}", file=sys.stderr)
+        _cache = None
+    return _cache
+
+
+def min_cacheable_confidence():
+    return int(os.getenv("RESPONSE_CACHE_MIN_CONFIDENCE", "70"))
@@ -0,0 +1,111 @@
+"""
+Fast language classification from the scripts a text is written in.
+
+The assistant serves Malayalam, Hindi and English, which use three different
+scripts, so counting letters per Unicode block decides almost every request
+without a statistical model:
+
+    Malayalam   U+0D00-U+0D7F
+    Devanagari  U+0900-U+097F  (reported as "hi")
+    Latin       ASCII letters  (reported as "en")
+
+The share of the dominant script is the confidence. Only mixed-script text
+below AMBIGUOUS_BELOW goes to langdetect, which is slow to import and
+non-deterministic on short input.
+
+Counting is done on the UTF-8 bytes: every codepoint of an Indic block is
+encoded behind one of two lead byte pairs, so counting those pairs counts the
+block's codepoints with bytes.count, which beats a per-character Python loop
+by an order of magnitude on long responses.
+"""
+
+import string
+import sys
+from typing import NamedTuple
+
+import metrics
+
+# Dominant-script share below which the statistical detector is consulted
+AMBIGUOUS_BELOW = 0.6
+
+# langdetect cost grows with length; a prefix is enough to decide
+STATISTICAL_SAMPLE = 1000
+
+# Languages the TTS voices and fallback messages exist for
+SUPPORTED = ("ml", "hi", "en")
+
+
+def _lead_bytes(first, last):
+    return tuple(sorted({chr(cp).encode("utf-8")[:2] for cp in range(first, last + 1)}))
+
+
+_MALAYALAM = _lead_bytes(0x0D00, 0x0D7F)
+_DEVANAGARI = _lead_bytes(0x0900, 0x097F)
+_ASCII_LETTERS = string.ascii_letters.encode("ascii")
+
+
+class Classification(NamedTuple):
+    lang: str
+    confidence: float
+    # "script", "statistical" or "default" (no letters to go on)
+    source: str
+
+
+def script_counts(text):
+    """(malayalam, devanagari, latin) letter counts for `text`"""
+    if text.isascii():
+        data = text.encode("ascii")
+        return 0, 0, len(data) - len(data.translate(None, _ASCII_LETTERS))
+
+    data = text.encode("utf-8")
+    malayalam = sum(data.count(lead) for lead in _MALAYALAM)
+    devanagari = sum(data.count(lead) for lead in _DEVANAGARI)
+    latin = len(data) - len(data.translate(None, _ASCII_LETTERS))
+    return malayalam, devanagari, latin
+
+
+def _statistical(text):
+    from langdetect import DetectorFactory, detect_langs
+
+    # Seed for consistent language detection
+    DetectorFactory.seed = 0
+    best = detect_langs(text[:STATISTICAL_SAMPLE])[0]
+    return best.lang, best.prob
+
+
+def classify(text, statistical=True):
+    """
+    Classify `text` as "ml", "hi" or "en" by script. Ambiguous mixed-script
+    text is passed to langdetect when `statistical` is set, which may return
+    any language code it knows.
+    """
+    counts = script_counts(text or "")
+    total = sum(counts)
+    if total == 0:
+        result = Classification("en", 0.0, "default")
+    else:
+        dominant = max(range(3), key=counts.__getitem__)
+        confidence = round(counts[dominant] / total, 3)
+        result = Classification(SUPPORTED[dominant], confidence, "script")
+
+    if statistical and total and result.confidence < AMBIGUOUS_BELOW:
+        try:
+            lang, prob = _statistical(text)
+            result = Classification(lang, round(prob, 3), "statistical")
+        except Exception as e:
+            print(f"Statistical language detection failed: {e}", file=sys.stderr)
+
+    metrics.inc("language_detections", source=result.source)
+    return result
+
+
+def detect(text, statistical=True):
+    """Language code for `text`; see classify"""
+    return classify(text, statistical).lang
+
+
+def supported_language(lang, text):
+    """`lang` if TTS and fallbacks support it, else the script of `text`"""
+    if lang in SUPPORTED:
+        return lang
+    return classify(text, statistical=False).lang
@@ -0,0 +1,316 @@
+"""
+Semantic near-duplicate cache for generate_malayalam_response.
+
+Paraphrases and transliteration variants miss the exact-match response
+cache, so this optional stage embeds the query with a local CPU model and
+looks for a previously answered query whose cosine similarity clears a
+threshold. Vectors live in a NumPy matrix (or a FAISS inner-product index
+when faiss is installed) and are appended to disk as they are inserted, so
+other workers and restarts pick them up without a rebuild.
+
+Environment:
+    SEMANTIC_CACHE            set to 1 to enable (default: off)
+    SEMANTIC_CACHE_DIR        index directory (default: .cache/semantic)
+    SEMANTIC_CACHE_MODEL      sentence-transformers model
+                              (default: paraphrase-multilingual-MiniLM-L12-v2)
+    SEMANTIC_CACHE_THRESHOLD  minimum cosine similarity for a hit (default: 0.92)
+    SEMANTIC_CACHE_TTL        seconds an entry stays valid (default: 86400)
+    SEMANTIC_CACHE_SIZE       max entries kept (default: 5000)
+"""
+
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+
+
+class VectorIndex:
+    """
+    Append-only inner-product index over L2-normalised float32 vectors.
+    Uses FAISS when available and a NumPy matrix otherwise.
+    """
+
+    def __init__(self, dim, use_faiss=True):
+        import numpy as np
+
+        self.dim = dim
+        self.records = []
+        self._np = np
+        self._faiss_index = None
+        self._matrix = np.empty((1024, dim), dtype=np.float32)
+        self._size = 0
+
+        if use_faiss:
+            try:
+                import faiss
+
+                self._faiss_index = faiss.IndexFlatIP(dim)
+            except ImportError:
+                pass
+
+    def __len__(self):
+        return self._size
+
+    def add(self, vectors, records):
+        vectors = self._np.ascontiguousarray(vectors, dtype=self._np.float32).reshape(
+            -1, self.dim
+        )
+        if self._faiss_index is not None:
+            self._faiss_index.add(vectors)
+        else:
+            needed = self._size + len(vectors)
+            if needed > len(self._matrix):
+                grown = self._np.empty(
+                    (max(needed, 2 * len(self._matrix)), self.dim),
+                    dtype=self._np.float32,
+                )
+                grown[: self._size] = self._matrix[: self._size]
+                self._matrix = grown
+            self._matrix[self._size : needed] = vectors
+        self._size += len(vectors)
+        self.records.extend(records)
+
+    def search(self, vector, k=1):
+        """Return up to k (score, record) pairs, nearest first"""
+        if self._size == 0:
+            return []
+        k = min(k, self._size)
+        vector = self._np.asarray(vector, dtype=self._np.float32).reshape(1, self.dim)
+        if self._faiss_index is not None:
+            scores, ids = self._faiss_index.search(vector, k)
+            return [(float(s), self.records[int(i)]) for s, i in zip(scores[0], ids[0])]
+        scores = self._matrix[: self._size] @ vector[0]
+        best = self._np.argsort(-scores)[:k]
+        return [(float(scores[i]), self.records[int(i)]) for i in best]
+
+
+class SemanticCache:
+    """
+    One index per language, so a closer query in another language cannot
+    hide a same-language hit. Entries expire after `ttl` seconds; once the
+    shared log holds more than max_entries (plus some slack) it is rewritten
+    with the newest live ones, and every worker reloads it.
+    """
+
+    # Nearest candidates checked per lookup, so an expired entry does not hide a live one
+    CANDIDATES = 4
+    # Grow this far past max_entries before compacting, so inserts rarely rewrite
+    COMPACT_SLACK = 1.25
+
+    def __init__(
+        self, directory, embedder, dim, threshold=0.92, ttl=86400, max_entries=5000
+    ):
+        self.directory = Path(directory)
+        self.embedder = embedder
+        self.dim = dim
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.compactions = 0
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / VECTORS_FILE
+        self._records_path = self.directory / RECORDS_FILE
+        self._reset()
+        with self._file_lock(fcntl.LOCK_SH):
+            self._sync()
+
+    def __len__(self):
+        return sum(len(index) for index in self.indexes.values())
+
+    def embed(self, text):
+        return self.embedder(text)
+
+    def _reset(self):
+        self.indexes = {}
+        self._entries = 0
+        self._records_offset = 0
+        self._records_inode = None
+
+    @contextmanager
+    def _file_lock(self, mode):
+        # Appends and compactions take it exclusively, reads shared, so a
+        # reader never sees vectors and records out of step
+        with open(self.directory / ".lock", "a") as lock:
+            fcntl.flock(lock, mode)
+            yield
+
+    def _sync(self):
+        """
+        Load records appended to disk by this or any other worker since the
+        last sync. After a compaction (a new file) everything is reloaded.
+        """
+        try:
+            stat = os.stat(self._records_path)
+        except FileNotFoundError:
+            self._reset()
+            return
+        if stat.st_ino != self._records_inode or stat.st_size < self._records_offset:
+            self._reset()
+            self._records_inode = stat.st_ino
+
+        with open(self._records_path, "rb") as f:
+            f.seek(self._records_offset)
+            tail = f.read()
+        complete = tail[: tail.rfind(b"\n") + 1]
+        if not complete:
+            return
+
+        import numpy as np
+
+        records = [json.loads(line) for line in complete.splitlines() if line]
+        vectors = np.fromfile(
+            self._vectors_path,
+            dtype=np.float32,
+            count=len(records) * self.dim,
+            offset=self._entries * self.dim * 4,
+        ).reshape(-1, self.dim)
+        by_lang = {}
+        for i, record in enumerate(records):
+            by_lang.setdefault(record["lang"], []).append(i)
+        for lang, rows in by_lang.items():
+            index = self.indexes.get(lang)
+            if index is None:
+                index = self.indexes[lang] = VectorIndex(self.dim)
+            index.add(vectors[rows], [records[i] for i in rows])
+        self._entries += len(records)
+        self._records_offset += len(complete)
+
+    def lookup(self, vector, lang):
+        """Return the cached response dict for the nearest live query in `lang`, if close enough"""
+        with self._lock:
+            with self._file_lock(fcntl.LOCK_SH):
+                self._sync()
+            index = self.indexes.get(lang)
+            candidates = index.search(vector, self.CANDIDATES) if index else []
+        oldest = time.time() - self.ttl
+        for score, record in candidates:
+            if score < self.threshold:
+                break
+            if record["ts"] >= oldest:
+                self.hits += 1
+                print(
+                    f"🧠 Semantic cache hit (similarity {score:.3f})", file=sys.stderr
+                )
+                return record["response"]
+        self.misses += 1
+        return None
+
+    def insert(self, vector, query, lang, response):
+        import numpy as np
+
+        record = {"query": query, "lang": lang, "response": response, "ts": time.time()}
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            with self._file_lock(fcntl.LOCK_EX):
+                self._sync()
+                with open(self._vectors_path, "ab") as f:
+                    f.write(vector.tobytes())
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                with open(self._records_path, "ab") as f:
+                    f.write(line)
+                self._sync()
+                if self._entries > self.max_entries * self.COMPACT_SLACK:
+                    self._compact()
+
+    def _compact(self):
+        """Rewrite the log with the newest max_entries live entries (file lock held)"""
+        import numpy as np
+
+        with open(self._records_path, "rb") as f:
+            lines = [line for line in f.read().splitlines() if line]
+        records = [json.loads(line) for line in lines]
+        vectors = np.fromfile(
+            self._vectors_path, dtype=np.float32, count=len(records) * self.dim
+        ).reshape(-1, self.dim)
+
+        oldest = time.time() - self.ttl
+        live = [i for i, record in enumerate(records) if record["ts"] >= oldest]
+        keep = sorted(live, key=lambda i: records[i]["ts"])[-self.max_entries :]
+
+        vectors_tmp = self._vectors_path.with_suffix(".tmp")
+        records_tmp = self._records_path.with_suffix(".tmp")
+        vectors[keep].tofile(vectors_tmp)
+        with open(records_tmp, "wb") as f:
+            f.writelines(lines[i] + b"\n" for i in keep)
+        os.replace(vectors_tmp, self._vectors_path)
+        os.replace(records_tmp, self._records_path)
+
+        self.compactions += 1
+        print(
+            f"🧠 Semantic cache compacted: {len(records)} -> {len(keep)} entries",
+            file=sys.stderr,
+        )
+        self._sync()
+
+    def stats(self):
+        return {
+            "entries": len(self),
+            "languages": {lang: len(index) for lang, index in self.indexes.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "compactions": self.compactions,
+        }
+
+
+def sentence_transformer_embedder(model_name):
+    """Build an embedding function backed by a local sentence-transformers model on CPU"""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(text):
+        return model.encode(text, normalize_embeddings=True)
+
+    return embed, model.get_sentence_embedding_dimension()
+
+
+_cache = None
+_cache_initialised = False
+
+
+def get_semantic_cache():
+    """Return the process-wide semantic cache, or None when disabled or unavailable"""
+    global _cache, _cache_initialised
+    if _cache_initialised:
+        return _cache
+    _cache_initialised = True
+
+    if os.getenv("SEMANTIC_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+
+    try:
+        start = time.perf_counter()
+        embedder, dim = sentence_transformer_embedder(
+            os.getenv("SEMANTIC_CACHE_MODEL", DEFAULT_MODEL)
+        )
+        _cache = SemanticCache(
+            os.getenv("SEMANTIC_CACHE_DIR", str(script_dir / ".cache" / "semantic")),
+            embedder,
+            dim,
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+            ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "5000")),
+        )
+        print(
+            f"🧠 Semantic cache ready: {len(_cache)} entries "
+            f"in {time.perf_counter() - start:.2f}s",
+            file=sys.stderr,
+        )
+    except Exception as e:
+        print(f"Semantic cache disabled: {e}", file=sys.stderr)
+        _cache = None
+    return _cache
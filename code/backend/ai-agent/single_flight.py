@@ -0,0 +1,145 @@
+"""
+In-flight request coalescing for the resident bridge worker.
+
+During pest outbreaks many farmers ask the same question, or forward the same
+photo, within seconds of each other. The response cache only helps once the
+first answer is stored; until then every copy pays for its own Gemini call
+and gTTS synthesis. SingleFlight lets concurrent requests with the same key
+share one in-progress computation:
+
+    result = coalescer.do(key, lambda: answer(inputs))
+
+The first caller for a key (the leader) runs the function; callers arriving
+while it runs wait for its result, or get its exception re-raised. A waiter
+gives up after COALESCE_WAIT seconds and computes its own answer, so a stuck
+leader never holds other requests for longer than that.
+
+This only applies where one process serves requests concurrently (the
+worker's socket mode). Pool workers serve stdio one request at a time, so
+bridge_pool coalesces identical requests itself before dispatching them.
+
+Environment:
+    COALESCE       set to 0 to disable (default: on)
+    COALESCE_WAIT  seconds a waiter waits for the leader (default: 30)
+"""
+
+import os
+import sys
+import threading
+
+import metrics
+
+
+class CoalesceStats:
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self.shared_errors = 0
+        self.wait_timeouts = 0
+
+    def as_dict(self):
+        requests = self.leaders + self.coalesced + self.wait_timeouts
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "shared_errors": self.shared_errors,
+            "wait_timeouts": self.wait_timeouts,
+            # Each coalesced request skipped one LLM call and one TTS synthesis
+            "upstream_calls_saved": self.coalesced,
+            "coalesce_rate": round(self.coalesced / requests, 4) if requests else 0.0,
+        }
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its outcome"""
+
+    def __init__(self, wait=30.0):
+        self.wait = wait
+        self.stats = CoalesceStats()
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def do(self, key, fn):
+        """Return fn(), or the result of an identical call already running"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats.leaders += 1
+            else:
+                flight.waiters += 1
+
+        if leader:
+            return self._lead(key, flight, fn)
+
+        if not flight.done.wait(self.wait):
+            with self._lock:
+                flight.waiters -= 1
+                self.stats.wait_timeouts += 1
+            metrics.inc("coalesce", outcome="wait_timeout")
+            print(
+                f"⏳ Coalesced request waited {self.wait:.0f}s, computing its own answer",
+                file=sys.stderr,
+            )
+            return fn()
+
+        if flight.error is not None:
+            with self._lock:
+                self.stats.shared_errors += 1
+            metrics.inc("coalesce", outcome="shared_error")
+            raise flight.error
+
+        with self._lock:
+            self.stats.coalesced += 1
+        metrics.inc("coalesce", outcome="coalesced")
+        return flight.result
+
+    def _lead(self, key, flight, fn):
+        metrics.inc("coalesce", outcome="leader")
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            # Unregister before waking waiters so a later request starts afresh
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            if flight.waiters:
+                print(
+                    f"🔗 Shared one answer with {flight.waiters} identical request(s)",
+                    file=sys.stderr,
+                )
+
+
+_coalescer = None
+_coalescer_initialised = False
+_init_lock = threading.Lock()
+
+
+def get_coalescer():
+    """Return the process-wide SingleFlight configured from the environment, or None when disabled"""
+    global _coalescer, _coalescer_initialised
+    with _init_lock:
+        if not _coalescer_initialised:
+            _coalescer_initialised = True
+            if os.getenv("COALESCE", "1").lower() not in ("0", "false", "no", "off"):
+                _coalescer = SingleFlight(float(os.getenv("COALESCE_WAIT", "30")))
+    return _coalescer
@@ -0,0 +1,257 @@
+"""
+Markdown-to-speech text normalisation for TTS.
+
+Gemini answers in markdown, which gTTS reads literally ("asterisk",
+"hash") or badly ("kg/ha", "10-15"). Precompiled rules make one pass over each
+line, a line-start match for list markers and a single tokenizer for
+everything inline, rewriting each token as it goes:
+
+- headings, bullets and numbered-list markers are dropped, and each line
+  ends as its own sentence
+- [link text](url) keeps the text; bare URLs, emphasis markers, backticks and
+  emoji are dropped
+- numbers with units, ranges, percentages and simple fractions are expanded
+  from per-language tables (ml, hi, en)
+
+SpeechNormaliser works incrementally on streamed text: feed() returns the
+sentences completed so far, flush() the rest, so TTS can start on the first
+sentence while the answer is still arriving.
+
+    normaliser = SpeechNormaliser("ml")
+    for delta in deltas:
+        for sentence in normaliser.feed(delta):
+            speak(sentence)
+    for sentence in normaliser.flush():
+        speak(sentence)
+"""
+
+import re
+
+# Unit -> (spoken, spoken after "per"); English needs the singular after "per"
+UNITS = {
+    "en": {
+        "kg": ("kilograms", "kilogram"),
+        "g": ("grams", "gram"),
+        "mg": ("milligrams", "milligram"),
+        "t": ("tonnes", "tonne"),
+        "q": ("quintals", "quintal"),
+        "l": ("litres", "litre"),
+        "ml": ("millilitres", "millilitre"),
+        "ha": ("hectares", "hectare"),
+        "acre": ("acres", "acre"),
+        "cent": ("cents", "cent"),
+        "m": ("metres", "metre"),
+        "cm": ("centimetres", "centimetre"),
+        "mm": ("millimetres", "millimetre"),
+        "plant": ("plants", "plant"),
+        "ppm": ("parts per million", "part per million"),
+        "°c": ("degrees Celsius", "degree Celsius"),
+        "%": ("percent", "percent"),
+    },
+    "ml": {
+        "kg": "കിലോഗ്രാം",
+        "g": "ഗ്രാം",
+        "mg": "മില്ലിഗ്രാം",
+        "t": "ടൺ",
+        "q": "ക്വിന്റൽ",
+        "l": "ലിറ്റർ",
+        "ml": "മില്ലിലിറ്റർ",
+        "ha": "ഹെക്ടർ",
+        "acre": "ഏക്കർ",
+        "cent": "സെന്റ്",
+        "m": "മീറ്റർ",
+        "cm": "സെന്റിമീറ്റർ",
+        "mm": "മില്ലിമീറ്റർ",
+        "plant": "ചെടി",
+        "ppm": "പി പി എം",
+        "°c": "ഡിഗ്രി സെൽഷ്യസ്",
+        "%": "ശതമാനം",
+    },
+    "hi": {
+        "kg": "किलोग्राम",
+        "g": "ग्राम",
+        "mg": "मिलीग्राम",
+        "t": "टन",
+        "q": "क्विंटल",
+        "l": "लीटर",
+        "ml": "मिलीलीटर",
+        "ha": "हेक्टेयर",
+        "acre": "एकड़",
+        "cent": "सेंट",
+        "m": "मीटर",
+        "cm": "सेंटीमीटर",
+        "mm": "मिलीमीटर",
+        "plant": "पौधा",
+        "ppm": "पी पी एम",
+        "°c": "डिग्री सेल्सियस",
+        "%": "प्रतिशत",
+    },
+}
+
+PER = {"en": "per", "ml": "പ്രതി", "hi": "प्रति"}
+RANGE = {"en": "{} to {}", "ml": "{} മുതൽ {} വരെ", "hi": "{} से {}"}
+FRACTIONS = {
+    "en": {"1/2": "half", "1/4": "a quarter", "3/4": "three quarters"},
+    "ml": {"1/2": "അര", "1/4": "കാൽ", "3/4": "മുക്കാൽ"},
+    "hi": {"1/2": "आधा", "1/4": "चौथाई", "3/4": "तीन चौथाई"},
+}
+
+# Characters after which a line break needs no extra sentence end
+_PUNCTUATION = ".!?।॥:;,"
+_SENTENCE_ENDS = ".!?।॥"
+
+_unit = "|".join(
+    re.escape(u) for u in sorted(UNITS["en"], key=len, reverse=True) if u != "%"
+)
+_number = r"\d+(?:[.,]\d+)?"
+
+# Headings, bullets and numbered-list markers, matched at the start of a line
+_LINE_START_RE = re.compile(r"[ \t]*(?:#{1,6}|[-*+•]|\d{1,2}[.)])[ \t]+")
+
+# Every inline token starts with one of these characters; the lookahead lets
+# the scanner skip plain text without trying each alternative
+_INLINE_RE = re.compile(
+    r"(?=[\[(h\d*_`~\U0001F000-\U0001FAFF☀-➿️‍])(?:"
+    + "|".join(
+        (
+            r"(?P<link>\[(?P<link_text>[^\]]+)\]\([^)\s]*\))",
+            r"(?P<url>\(?https?://[^\s)]*[^\s).,!?;:]\)?)",
+            r"(?P<fraction>(?<![\d/])(?:1/2|1/4|3/4)(?![\d/]))",
+            # 25 kg/ha, 10-15 kg, 6.5-7, 40%; a range never continues into a
+            # third number, so phone numbers like 1800-180-1551 are left alone
+            rf"(?P<quantity>(?<![\d.,\-–])(?P<low>{_number})"
+            rf"(?:[ \t]*[-–][ \t]*(?P<high>{_number})(?![\d.,]*[-–]\d))?"
+            rf"(?:[ \t]*(?P<unit>%|(?i:(?:{_unit})(?:/(?:{_unit}))?)(?![A-Za-z])))?)",
+            r"(?P<emphasis>\*+|`+|(?<!\w)_+|_+(?!\w)|~~)",
+            r"(?P<emoji>[\U0001F000-\U0001FAFF☀-➿️‍])",
+        )
+    )
+    + ")"
+)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?।॥])\s+")
+
+
+class _Renderer:
+    """Rewrites markdown line by line for one language"""
+
+    def __init__(self, lang):
+        self.lang = lang if lang in UNITS else "en"
+        # Last character emitted, to decide how lines and segments are joined
+        self.last = ""
+
+    def _unit(self, unit):
+        table = UNITS[self.lang]
+        parts = unit.lower().split("/")
+        if self.lang == "en":
+            spoken = table[parts[0]][0]
+            if len(parts) == 2:
+                spoken += f" per {table[parts[1]][1]}"
+            return spoken
+        spoken = table[parts[0]]
+        if len(parts) == 2:
+            spoken += f" {PER[self.lang]} {table[parts[1]]}"
+        return spoken
+
+    def _token(self, match):
+        kind = match.lastgroup
+        if kind == "quantity":
+            low, high, unit = match.group("low", "high", "unit")
+            spoken = RANGE[self.lang].format(low, high) if high else low
+            if unit:
+                spoken += " " + self._unit(unit)
+            return spoken
+        if kind == "link":
+            return match.group("link_text")
+        if kind == "fraction":
+            return FRACTIONS[self.lang][match.group()]
+        return ""
+
+    def segment(self, text, line_start):
+        """Speech text for part of one line (no newlines), joined to what came before"""
+        if line_start:
+            marker = _LINE_START_RE.match(text)
+            if marker:
+                text = text[marker.end() :]
+        spoken = " ".join(_INLINE_RE.sub(self._token, text).split())
+        if not spoken:
+            return ""
+        separator = " " if self.last else ""
+        self.last = spoken[-1]
+        return separator + spoken
+
+    def end_line(self):
+        """Every line (heading, list item) is spoken as its own sentence"""
+        if self.last and self.last not in _PUNCTUATION:
+            self.last = "."
+            return "."
+        return ""
+
+    def render(self, text):
+        out = []
+        for line in text.split("\n"):
+            out.append(self.segment(line, True))
+            out.append(self.end_line())
+        return "".join(out)
+
+
+def normalise(text, lang="en"):
+    """Speech text for a whole markdown response"""
+    return _Renderer(lang).render(text).strip()
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+class SpeechNormaliser:
+    """Incremental normaliser: feed markdown deltas, get finished sentences back"""
+
+    def __init__(self, lang="en"):
+        self._renderer = _Renderer(lang)
+        self._raw = ""
+        # Whether _raw begins at the start of a line, where list markers count
+        self._line_start = True
+        self._text = ""
+
+    def _take_sentences(self):
+        sentences = split_sentences(self._text)
+        if sentences and sentences[-1][-1] not in _SENTENCE_ENDS:
+            self._text = sentences.pop()
+        else:
+            self._text = ""
+        return sentences
+
+    def feed(self, delta):
+        """Add streamed markdown; returns the sentences completed so far"""
+        self._raw += delta
+        *lines, self._raw = self._raw.split("\n")
+        for line in lines:
+            self._text += self._renderer.segment(line, self._line_start)
+            self._text += self._renderer.end_line()
+            self._line_start = True
+
+        # Within the unfinished line, hand over text up to the last sentence end
+        end = 0
+        for match in _SENTENCE_RE.finditer(self._raw):
+            end = match.end()
+        # An unfinished "[text](url" must wait for its closing bracket
+        bracket = self._raw.rfind("[", 0, end)
+        if bracket != -1 and ")" not in self._raw[bracket:]:
+            end = bracket
+        if end:
+            self._text += self._renderer.segment(self._raw[:end], self._line_start)
+            self._raw = self._raw[end:]
+            self._line_start = False
+
+        return self._take_sentences()
+
+    def flush(self):
+        """Everything still buffered, as sentences"""
+        self._text += self._renderer.segment(self._raw, self._line_start)
+        # The last line ends here, just as it does at the end of normalise()
+        self._text += self._renderer.end_line()
+        self._raw, self._line_start = "", True
+        sentences = split_sentences(self._text)
+        self._text = ""
+        return sentences
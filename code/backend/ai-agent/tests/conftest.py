@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The bridge modules are flat scripts in ai-agent/, imported by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,116 @@
+import threading
+import time
+import unicodedata
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+import conversation
+import malayalam_api_bridge
+import single_flight
+from malayalam_api_bridge import answer_key, coalesced_answer
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = conversation.MemoryStore()
+    monkeypatch.setattr(conversation, "_store", store)
+    monkeypatch.setattr(conversation, "_store_initialised", True)
+    return store
+
+
+def inputs(text, lang="hi", session_id=None):
+    return {
+        "user_message": text,
+        "lang": lang,
+        "has_audio": False,
+        "has_image": False,
+        "image_path": None,
+        "session_id": session_id,
+    }
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("धान में कीट", "धान में काट"),
+        ("നെല്ലിന് വളം", "നെല്ല് വളം"),
+        ("How much urea?", "how much urea"),
+    ],
+)
+def test_different_questions_are_not_merged(first, second):
+    assert answer_key(inputs(first)) != answer_key(inputs(second))
+
+
+def test_same_question_shares_a_key():
+    text = "ധാന്യം  വളം"
+    decomposed = unicodedata.normalize("NFD", text)
+    assert answer_key(inputs(text)) == answer_key(inputs(decomposed + " "))
+    assert answer_key(inputs(text, "ml")) != answer_key(inputs(text, "hi"))
+
+
+def test_a_chats_first_turn_is_keyed_like_a_standalone_question():
+    assert answer_key(inputs("paddy", session_id="u:c")) == answer_key(inputs("paddy"))
+
+
+def test_follow_ups_are_not_coalesced(store):
+    history = conversation.Conversation()
+    history.add_turn("earlier question", "Title", "Earlier answer.")
+    store.put("u:c", history)
+    assert answer_key(inputs("paddy", session_id="u:c")) is None
+
+
+def test_first_turns_share_an_answer_and_each_chat_records_it(monkeypatch, store):
+    # Sessions as the AI route builds them: "<user id>:<chat id>"
+    coalescer = single_flight.SingleFlight(wait=5)
+    monkeypatch.setattr(single_flight, "get_coalescer", lambda: coalescer)
+    release = threading.Event()
+    calls = []
+
+    def answer(request_inputs):
+        calls.append(request_inputs["session_id"])
+        release.wait(5)
+        # The pipeline records the turn for the request that computed it
+        conversation.record_turn(
+            request_inputs["session_id"],
+            conversation.load(request_inputs["session_id"]),
+            request_inputs["user_message"],
+            "Title",
+            "Answer.",
+        )
+        return {
+            "title": "Title",
+            "response_text": "Answer.",
+            "audio": None,
+            "confidence": 90,
+            "fallback": False,
+        }
+
+    monkeypatch.setattr(malayalam_api_bridge, "answer", answer)
+    replies = []
+    threads = [
+        threading.Thread(
+            target=lambda s=session: replies.append(
+                coalesced_answer(inputs("धान में कीट", session_id=s))
+            )
+        )
+        for session in ("user1:chat1", "user2:chat2")
+    ]
+    threads[0].start()
+    while not calls:
+        time.sleep(0.001)
+    threads[1].start()
+    while not any(flight.waiters for flight in list(coalescer._flights.values())):
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["user1:chat1"]
+    assert [reply["response_text"] for reply in replies] == ["Answer."] * 2
+    for session in ("user1:chat1", "user2:chat2"):
+        turns = store.get(session).turns
+        assert turns == [
+            {"question": "धान में कीट", "title": "Title", "answer": "Answer."}
+        ]
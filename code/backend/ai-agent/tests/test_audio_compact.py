@@ -0,0 +1,104 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import audio_compact
+from audio_compact import SAMPLE_RATE, compact, keep_ranges, speech_frames, true_runs
+
+
+@pytest.fixture(autouse=True)
+def energy_detector(monkeypatch):
+    """Use the energy detector whether or not webrtcvad is installed"""
+
+    def unavailable(pcm, frame):
+        raise ImportError("webrtcvad")
+
+    monkeypatch.setattr(audio_compact, "_webrtc_speech_frames", unavailable)
+    monkeypatch.setenv("AUDIO_COMPACT", "1")
+
+
+def silence(seconds):
+    # Faint noise rather than digital zeros, as a phone microphone records
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 1e-4).astype(np.float32)
+
+
+def tone(seconds, hz=440):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * hz * t)).astype(np.float32)
+
+
+def voice_note(*parts):
+    """Alternating silence and tone, starting with silence, from durations"""
+    return np.concatenate(
+        [(silence if i % 2 == 0 else tone)(seconds) for i, seconds in enumerate(parts)]
+    )
+
+
+def test_true_runs():
+    mask = np.array([0, 1, 1, 0, 0, 1, 0, 1, 1, 1], dtype=bool)
+    assert true_runs(mask) == [(1, 3), (5, 6), (7, 10)]
+    assert true_runs(np.zeros(4, dtype=bool)) == []
+    assert true_runs(np.ones(3, dtype=bool)) == [(0, 3)]
+
+
+def test_speech_frames_flag_the_tone_only():
+    frame = int(SAMPLE_RATE * audio_compact.FRAME_SECONDS)
+    speech = speech_frames(voice_note(1.2, 0.9, 1.2), frame)
+
+    runs = true_runs(speech)
+    assert len(runs) == 1
+    start, end = (index * audio_compact.FRAME_SECONDS for index in runs[0])
+    assert start == pytest.approx(1.2, abs=0.06)
+    assert end == pytest.approx(2.1, abs=0.06)
+
+
+def test_edges_are_cut_and_long_pauses_shortened():
+    pcm = voice_note(1.0, 0.6, 2.0, 0.6, 1.0)
+    ranges = keep_ranges(pcm, padding=0.1, max_pause=0.4)
+
+    assert len(ranges) == 2
+    kept = sum(end - start for start, end in ranges) / SAMPLE_RATE
+    # Both tones, padding on each side of each and max_pause of the 2s pause
+    assert kept == pytest.approx(0.6 + 0.6 + 4 * 0.1 + 0.4, abs=0.1)
+    gap = (ranges[1][0] - ranges[0][1]) / SAMPLE_RATE
+    assert gap == pytest.approx(2.0 - 0.4 - 2 * 0.1, abs=0.1)
+
+
+def test_short_pauses_are_kept_whole():
+    ranges = keep_ranges(
+        voice_note(1.0, 0.6, 0.3, 0.6, 1.0), padding=0.1, max_pause=0.6
+    )
+    assert len(ranges) == 1
+
+
+def test_compact_re_encodes_the_kept_speech(monkeypatch):
+    pcm = voice_note(1.5, 0.6, 2.0, 0.6, 1.5)
+    remembered = []
+    monkeypatch.setattr(audio_compact, "decode_pcm", lambda data: pcm)
+    monkeypatch.setattr(audio_compact, "encode_opus", lambda kept: b"opus")
+    monkeypatch.setattr(
+        audio_compact, "remember_pcm", lambda data, kept: remembered.append(kept)
+    )
+
+    result = compact(b"x" * 10000)
+
+    assert result.data == b"opus"
+    assert result.original_seconds == pytest.approx(6.2)
+    assert result.removed_seconds > 3
+    assert len(remembered[0]) == pytest.approx(result.kept_seconds * SAMPLE_RATE)
+
+
+def test_silent_note_is_sent_unchanged(monkeypatch):
+    monkeypatch.setattr(audio_compact, "decode_pcm", lambda data: silence(2.0))
+    result = compact(b"note")
+    assert result == (b"note", 2.0, 2.0)
+
+
+def test_without_ffmpeg_the_original_bytes_go_to_stt(monkeypatch, tmp_path):
+    pytest.importorskip("dotenv")
+    from malayalam_api_bridge import compact_audio
+
+    # An empty PATH: neither decoding nor encoding can find ffmpeg
+    monkeypatch.setenv("PATH", str(tmp_path))
+    assert compact_audio(b"not decoded before") == b"not decoded before"
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from batch_bridge import RateLimiter, load_completed
+
+
+def write_lines(path, *results, tail=""):
+    path.write_text(
+        "".join(json.dumps(r) + "\n" for r in results) + tail, encoding="utf-8"
+    )
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_retry_failed_removes_failed_results(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(
+        output,
+        {"index": 0, "success": True},
+        {"index": 1, "success": False, "error": "timeout"},
+        {"index": 2, "success": True},
+    )
+    assert load_completed(str(output), retry_failed=True) == {0, 2}
+    assert [r["index"] for r in read_lines(output)] == [0, 2]
+
+
+def test_keeps_last_result_per_index(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(
+        output,
+        {"index": 0, "success": False},
+        {"index": 1, "success": True},
+        {"index": 0, "success": True, "title": "retried"},
+        tail='{"index": 2, "succ',
+    )
+    assert load_completed(str(output)) == {0, 1}
+    assert read_lines(output) == [
+        {"index": 1, "success": True},
+        {"index": 0, "success": True, "title": "retried"},
+    ]
+
+
+def test_failed_results_count_as_done_without_retry(tmp_path):
+    output = tmp_path / "out.jsonl"
+    write_lines(output, {"index": 3, "success": False})
+    before = output.read_bytes()
+    assert load_completed(str(output)) == {3}
+    assert output.read_bytes() == before
+
+
+def test_missing_checkpoint(tmp_path):
+    assert load_completed(str(tmp_path / "none.jsonl")) == set()
+
+
+def test_rate_limiter_without_rate_never_waits():
+    limiter = RateLimiter(0)
+    for _ in range(100):
+        limiter.acquire()
@@ -0,0 +1,79 @@
+import asyncio
+import base64
+import io
+
+import pytest
+
+from bridge_frames import encode_reply, read_reply, read_reply_async, write_reply
+
+AUDIO = bytes(range(256)) * 40
+
+
+def round_trip(result, audio_dir=None):
+    stream = io.BytesIO()
+    write_reply(stream, result, audio_dir)
+    stream.seek(0)
+    return read_reply(stream), stream
+
+
+def test_audio_travels_raw_in_an_a_frame():
+    reply, stream = round_trip({"success": True, "text": "നെല്ല്", "audio": AUDIO})
+    assert reply == {
+        "success": True,
+        "text": "നെല്ല്",
+        "audio_bytes": len(AUDIO),
+        "audio": AUDIO,
+    }
+    assert read_reply(stream) is None
+
+
+def test_base64_audio_is_decoded_once():
+    encoded = base64.b64encode(AUDIO).decode()
+    reply, _ = round_trip({"success": True, "audio_base64": encoded})
+    assert reply["audio"] == AUDIO
+    assert "audio_base64" not in reply
+
+
+def test_reply_without_audio_has_only_metadata():
+    frames = encode_reply({"success": False, "error": "busy"})
+    assert len(frames) == 2
+    reply, _ = round_trip({"success": False, "error": "busy"})
+    assert reply == {"success": False, "error": "busy", "audio_bytes": 0}
+
+
+def test_shared_audio_file_is_read_and_deleted(tmp_path):
+    reply, _ = round_trip({"success": True, "audio": AUDIO}, audio_dir=tmp_path)
+    assert reply["audio"] == AUDIO
+    assert "audio_path" not in reply
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_replies_follow_one_another():
+    stream = io.BytesIO()
+    for i in range(3):
+        write_reply(stream, {"id": str(i), "audio": AUDIO[: i * 10]})
+    stream.seek(0)
+    ids = []
+    while (reply := read_reply(stream)) is not None:
+        ids.append((reply["id"], len(reply.get("audio", b""))))
+    assert ids == [("0", 0), ("1", 10), ("2", 20)]
+
+
+def test_truncated_frame_is_an_error():
+    data = b"".join(encode_reply({"success": True, "audio": AUDIO}))
+    with pytest.raises(EOFError):
+        read_reply(io.BytesIO(data[:-1]))
+
+
+def test_async_reader_matches():
+    data = b"".join(encode_reply({"success": True, "audio": AUDIO}))
+
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_reply_async(reader)
+
+    reply = asyncio.run(read())
+    assert reply["audio"] == AUDIO
+    assert reply["audio_bytes"] == len(AUDIO)
@@ -0,0 +1,228 @@
+import asyncio
+import json
+
+import pytest
+
+import bridge_pool
+from bridge_pool import BridgePool
+
+
+class FlakyWorker:
+    """Fails its job, then fails to restart `restart_failures` times"""
+
+    def __init__(self, restart_failures):
+        self.index = 0
+        self.restart_failures = restart_failures
+        self.restarts = 0
+
+    async def run(self, request, timeout):
+        if self.restarts == 0:
+            raise ConnectionError("bridge worker exited")
+        return {"success": True, "echo": request["text"]}
+
+    async def restart(self):
+        self.restarts += 1
+        if self.restarts <= self.restart_failures:
+            raise OSError("spawn failed")
+
+
+def test_failed_restart_still_answers_and_keeps_the_worker(monkeypatch):
+    monkeypatch.setattr(bridge_pool, "RESTART_BACKOFF", 0.001)
+
+    async def scenario():
+        pool = BridgePool(workers=1, queue_depth=4, deadline=5)
+        worker = FlakyWorker(restart_failures=2)
+        task = asyncio.create_task(pool._dispatch(worker))
+
+        first = await asyncio.wait_for(pool.submit({"text": "a"}), 1)
+        second = await asyncio.wait_for(pool.submit({"text": "b"}), 1)
+        task.cancel()
+        return pool, worker, first, second
+
+    pool, worker, first, second = asyncio.run(scenario())
+    assert first["success"] is False
+    assert "bridge worker exited" in first["error"]
+    assert second == {"success": True, "echo": "b"}
+    assert worker.restarts == 3
+    assert pool.stats.restart_failures == 2
+
+
+def test_expired_job_times_out_without_running():
+    async def scenario():
+        pool = BridgePool(workers=1, queue_depth=4, deadline=-1)
+        task = asyncio.create_task(pool._dispatch(FlakyWorker(0)))
+        reply = await asyncio.wait_for(pool.submit({"text": "a"}), 1)
+        task.cancel()
+        return pool, reply
+
+    pool, reply = asyncio.run(scenario())
+    assert reply == {"success": False, "error": bridge_pool.TIMEOUT_ERROR}
+    assert pool.stats.timed_out == 1
+
+
+class SlowWorker:
+    index = 0
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    async def run(self, request, timeout):
+        await asyncio.sleep(self.seconds)
+        return {"success": True, "echo": request["text"]}
+
+    async def restart(self):
+        pass
+
+
+def test_queued_caller_gets_a_timeout_at_its_deadline():
+    async def scenario():
+        pool = BridgePool(workers=1, queue_depth=4, deadline=0.2)
+        task = asyncio.create_task(pool._dispatch(SlowWorker(0.5)))
+        started = asyncio.get_running_loop().time()
+        first, second = await asyncio.gather(
+            pool._handle_line(b'{"text": "a"}'), pool._handle_line(b'{"text": "b"}')
+        )
+        elapsed = asyncio.get_running_loop().time() - started
+        # Let the worker reach the expired second job
+        await asyncio.sleep(0.4)
+        task.cancel()
+        return pool, first, second, elapsed
+
+    pool, first, second, elapsed = asyncio.run(scenario())
+    timeout = ({"success": False, "error": bridge_pool.TIMEOUT_ERROR}, "json")
+    assert first == timeout
+    assert second == timeout
+    assert elapsed < 0.4
+    assert pool.stats.timed_out == 2
+
+
+class GatedWorker:
+    """Answers each request once `gate` is set, counting the requests it ran"""
+
+    index = 0
+
+    def __init__(self, reply=None):
+        self.gate = asyncio.Event()
+        self.ran = []
+        self.reply = reply or {}
+
+    async def run(self, request, timeout):
+        self.ran.append(request)
+        await self.gate.wait()
+        return {
+            "success": True,
+            "title": "Urea",
+            "response_text": f"answer to {request['text']}",
+            "fallback": False,
+            "id": request.get("id"),
+            **self.reply,
+        }
+
+    async def restart(self):
+        pass
+
+
+async def ask(pool, worker, *requests):
+    """Replies to requests sent together, released once all have arrived"""
+    task = asyncio.create_task(pool._dispatch(worker))
+    pending = asyncio.gather(
+        *(pool._handle_line(json.dumps(request).encode()) for request in requests)
+    )
+    # Lets every request past its coalescing check before the worker answers
+    await asyncio.sleep(0.1)
+    worker.gate.set()
+    replies = await asyncio.wait_for(pending, 1)
+    task.cancel()
+    return [reply for reply, _ in replies]
+
+
+def test_identical_requests_share_one_worker_run():
+    async def scenario():
+        pool = BridgePool(workers=1, queue_depth=4, deadline=5)
+        worker = GatedWorker()
+        replies = await ask(
+            pool,
+            worker,
+            {"id": 1, "text": "How much urea?"},
+            {"id": 2, "text": "How much  urea? "},
+            {"id": 3, "text": "When to sow?"},
+        )
+        return pool, worker, replies
+
+    pool, worker, replies = asyncio.run(scenario())
+    assert [request["id"] for request in worker.ran] == [1, 3]
+    assert [reply["id"] for reply in replies] == [1, 2, 3]
+    assert replies[0]["response_text"] == replies[1]["response_text"]
+    assert replies[2]["response_text"] == "answer to When to sow?"
+    assert pool.stats.coalesced == 1
+
+
+def test_shared_audio_file_is_inlined_for_each_caller(tmp_path):
+    audio = tmp_path / "bridge-audio-1.mp3"
+    audio.write_bytes(b"mp3")
+
+    async def scenario():
+        pool = BridgePool(workers=1, queue_depth=4, deadline=5)
+        worker = GatedWorker({"audio_bytes": 3, "audio_path": str(audio)})
+        request = {"text": "How much urea?", "output": "frames"}
+        return await ask(pool, worker, request, request)
+
+    replies = asyncio.run(scenario())
+    assert [reply["audio"] for reply in replies] == [b"mp3", b"mp3"]
+    assert not any("audio_path" in reply for reply in replies)
+    assert not audio.exists()
+
+
+def test_first_turns_are_shared_and_recorded_per_chat(tmp_path, monkeypatch):
+    pytest.importorskip("dotenv")
+    import conversation
+
+    store = conversation.SQLiteStore(str(tmp_path / "conversations.sqlite3"))
+    monkeypatch.setattr(conversation, "_store", store)
+    monkeypatch.setattr(conversation, "_store_initialised", True)
+    # The worker records its own request's turn; this chat already has one
+    history = conversation.Conversation()
+    history.add_turn("Hi", "Hello", "Hello")
+    store.put("user3:chat3", history)
+
+    async def scenario():
+        pool = BridgePool(workers=1, queue_depth=4, deadline=5)
+        worker = GatedWorker()
+        await ask(
+            pool,
+            worker,
+            {"text": "How much urea?", "session_id": "user1:chat1"},
+            {"text": "How much urea?", "session_id": "user2:chat2"},
+            {"text": "How much urea?", "session_id": "user3:chat3"},
+        )
+        return pool, worker
+
+    pool, worker = asyncio.run(scenario())
+    assert sorted(request["session_id"] for request in worker.ran) == [
+        "user1:chat1",
+        "user3:chat3",
+    ]
+    assert pool.stats.coalesced == 1
+    follower = store.get("user2:chat2")
+    assert follower.turn_count == 1
+    assert follower.turns[0]["question"] == "How much urea?"
+    assert follower.turns[0]["answer"] == ("answer to How much urea?")
+    assert store.get("user1:chat1") is None
+
+
+def test_memory_histories_are_not_coalesced(monkeypatch):
+    import conversation
+
+    monkeypatch.setattr(conversation, "_store", conversation.MemoryStore())
+    monkeypatch.setattr(conversation, "_store_initialised", True)
+
+    async def scenario():
+        pool = BridgePool(workers=1, queue_depth=4, deadline=5)
+        worker = GatedWorker()
+        request = {"text": "How much urea?", "session_id": "user1:chat1"}
+        await ask(pool, worker, request, {**request, "session_id": "user2:chat2"})
+        return pool, worker
+
+    pool, worker = asyncio.run(scenario())
+    assert len(worker.ran) == 2
+    assert pool.stats.coalesced == 0
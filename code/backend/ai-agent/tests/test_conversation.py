@@ -0,0 +1,133 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import conversation
+import llm_pipeline
+import provider_health
+from conversation import Conversation, clip, estimate_tokens
+
+
+def test_clip():
+    assert clip("  short   text ", 20) == "short text"
+    assert clip("a longer answer", 9) == "a longer…"
+    # No room for text before the ellipsis
+    assert clip("a longer answer", 1) == ""
+    assert clip("a longer answer", 0) == ""
+
+
+def test_older_turns_fold_into_the_summary():
+    history = Conversation()
+    for i in range(6):
+        history.add_turn(f"question {i}", f"Title {i}", f"Answer {i}. More.", keep=4)
+    assert [turn["question"] for turn in history.turns] == [
+        f"question {i}" for i in range(2, 6)
+    ]
+    assert history.summary == [
+        "- Q: question 0 | A: Title 0: Answer 0.",
+        "- Q: question 1 | A: Title 1: Answer 1.",
+    ]
+    assert history.turn_count == 6
+
+
+def test_history_stays_within_the_token_budget():
+    history = Conversation()
+    for i in range(20):
+        history.add_turn(
+            f"question {i} " * 10, "Title", "answer text " * 40, budget=300
+        )
+        assert history.history_tokens() <= 300
+        assert estimate_tokens(history.summary_text()) <= 300 * 0.3
+    assert history.full_tokens() > 20 * 100
+
+
+def test_latest_answer_is_clipped_to_the_budget():
+    history = Conversation()
+    history.add_turn("question", "Title", "word " * 200, budget=10_000)
+    question, answer = history.recent(budget=100)[-1]
+    assert question == "question"
+    assert answer.endswith("…")
+    assert estimate_tokens(question) + estimate_tokens(answer) <= 100
+
+
+def test_turn_is_left_out_without_room_for_its_answer():
+    history = Conversation()
+    history.add_turn("first", "Title", "short answer", budget=10_000)
+    history.add_turn("q " * 200, "Title", "answer " * 200, budget=10_000)
+    pairs = history.recent(budget=estimate_tokens("q " * 200))
+    assert pairs == [("first", "short answer")]
+
+
+class FakeStream:
+    def __init__(self, raw):
+        self.raw = raw
+
+    def stream(self, llm_input):
+        yield SimpleNamespace(content=self.raw, usage_metadata=None)
+
+
+@pytest.fixture
+def remembered(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_pipeline, "_lookup_answers", lambda *a: (None, None))
+    monkeypatch.setattr(llm_pipeline, "_store_caches", lambda *a: None)
+    monkeypatch.setattr(
+        llm_pipeline, "_remember", lambda s, h, q, response: calls.append(response)
+    )
+    provider_health.reset()
+    yield calls
+    provider_health.reset()
+
+
+def run_stream(monkeypatch, raw):
+    monkeypatch.setattr(llm_pipeline, "get_streaming_llm", lambda: FakeStream(raw))
+    events = list(
+        llm_pipeline.stream_malayalam_response(
+            "question", detected_lang="en", session_id="chat"
+        )
+    )
+    return events[-1][1]
+
+
+def test_stream_remembers_every_parsed_answer(monkeypatch, remembered):
+    raw = json.dumps({"title": "Title", "response": "Unsure.", "confidence": 0})
+    response = run_stream(monkeypatch, raw)
+    assert response.title == "Title"
+    assert [r.title for r in remembered] == ["Title"]
+
+
+def test_stream_does_not_remember_a_fallback(monkeypatch, remembered):
+    run_stream(monkeypatch, "not json")
+    assert remembered == []
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_turns_of_one_chat_are_all_kept(monkeypatch, tmp_path, backend):
+    if backend == "memory":
+        stores = [conversation.MemoryStore()] * 2
+    else:
+        # Two connections stand in for two bridge processes
+        path = tmp_path / "conversations.sqlite3"
+        stores = [conversation.SQLiteStore(path), conversation.SQLiteStore(path)]
+    local = threading.local()
+    monkeypatch.setattr(conversation, "get_conversation_store", lambda: local.store)
+
+    def turns(store, name):
+        local.store = store
+        for i in range(20):
+            # Loaded before the other writer saves, as a request in flight does
+            history = store.get("chat") or Conversation()
+            conversation.record_turn("chat", history, f"{name} {i}", "T", "A.")
+
+    threads = [
+        threading.Thread(target=turns, args=(store, name))
+        for store, name in zip(stores, "ab")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stores[0].get("chat").turn_count == 40
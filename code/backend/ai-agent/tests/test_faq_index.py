@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+import faq_index
+
+KB_PATH = Path(faq_index.__file__).resolve().parent / "knowledge_base" / "faq.json"
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    index = faq_index.open_index(KB_PATH, tmp_path_factory.mktemp("faq"))
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize(
+    "query, lang, entry_id",
+    [
+        ("dolomite or lime for acidic soil", "en", "soil_acidity_lime"),
+        ("hopper burn in rice field", "en", "brown_planthopper"),
+        ("മണ്ണ് പരിശോധന എവിടെ ചെയ്യാം", "ml", "soil_testing"),
+        ("किसान कॉल सेंटर का नंबर क्या है", "hi", "kisan_helpline"),
+    ],
+)
+def test_answers_questions_the_knowledge_base_covers(index, query, lang, entry_id):
+    match = faq_index.choose(index, query, lang)
+    assert match is not None and match.entry_id == entry_id
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "what fertilizer for banana",
+        "soil pH for tea",
+        "paddy",
+        "pH",
+        "paddy pest",
+        "stem borer in sugarcane",
+        "price of urea fertilizer",
+    ],
+)
+def test_near_misses_fall_through(index, query):
+    assert faq_index.choose(index, query) is None
+
+
+def test_confidence_needs_both_sides(index):
+    # Every query term is in the entry, but the entry is about much more
+    crop_only = index.search("banana", limit=1)[0]
+    # Every term of a question variant is in the query
+    exact = index.search("pseudostem weevil in banana", limit=1)[0]
+    assert crop_only.entry_id == exact.entry_id == "banana_pseudostem_weevil"
+    assert crop_only.confidence < faq_index.min_confidence()
+    assert exact.confidence == 1.0
+
+
+def test_unknown_words_lower_confidence(index):
+    known = index.search("stem borer in paddy", limit=1)[0]
+    unknown = index.search("stem borer in sugarcane", limit=1)[0]
+    assert unknown.confidence < known.confidence
+
+
+def test_short_queries_are_not_answered(index, monkeypatch):
+    assert faq_index.choose(index, "brown planthopper") is not None
+    monkeypatch.setenv("FAQ_MIN_TERMS", "3")
+    assert faq_index.choose(index, "brown planthopper") is None
+
+
+def test_a_close_runner_up_is_not_answered(index):
+    best, runner_up = index.search("paddy pest", limit=2)
+    margin = best.confidence - runner_up.confidence
+    assert faq_index.choose(index, "paddy pest", threshold=0, margin=margin) is not None
+    assert (
+        faq_index.choose(index, "paddy pest", threshold=0, margin=margin + 0.01) is None
+    )
@@ -0,0 +1,33 @@
+import pytest
+
+gtts = pytest.importorskip("gtts")
+
+import http_clients
+
+
+def test_pooled_gtts_falls_back_to_stock_stream(monkeypatch):
+    pooled = http_clients.pooled_gtts_class()
+
+    def missing_internals(self):
+        raise AttributeError("'gTTS' object has no attribute '_prepare_requests'")
+
+    monkeypatch.setattr(pooled, "_prepare_requests", missing_internals)
+    monkeypatch.setattr(gtts.gTTS, "stream", lambda self: iter([b"stock"]))
+
+    tts = pooled(text="നെല്ല്", lang="ml")
+    assert list(tts.stream()) == [b"stock"]
+
+
+def test_pooled_gtts_reports_http_errors_without_fallback(monkeypatch):
+    pooled = http_clients.pooled_gtts_class()
+    monkeypatch.setattr(gtts.gTTS, "stream", lambda self: iter([b"stock"]))
+
+    class Failing:
+        def send(self, *args, **kwargs):
+            import requests
+
+            raise requests.exceptions.ConnectionError("down")
+
+    monkeypatch.setattr(http_clients, "get_session", lambda: Failing())
+    with pytest.raises(gtts.gTTSError):
+        list(pooled(text="paddy", lang="en").stream())
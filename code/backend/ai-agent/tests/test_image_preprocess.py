@@ -0,0 +1,40 @@
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from image_preprocess import image_hash, prepare_image
+
+
+def leaf_photo(path, spot=None):
+    # Horizontal gradient, optionally with a small lesion-like dark spot
+    image = Image.new("RGB", (400, 300))
+    image.putdata([(x * 255 // 400, 160, 60) for y in range(300) for x in range(400)])
+    if spot:
+        for x in range(spot[0], spot[0] + 12):
+            for y in range(spot[1], spot[1] + 12):
+                image.putpixel((x, y), (40, 30, 20))
+    image.save(path, format="PNG")
+    return str(path)
+
+
+def test_similar_photos_get_different_keys(tmp_path):
+    healthy = prepare_image(leaf_photo(tmp_path / "healthy.png"))
+    spotted = prepare_image(leaf_photo(tmp_path / "spotted.png", spot=(200, 150)))
+
+    assert healthy.image_hash != spotted.image_hash
+    assert healthy.image_hash.startswith("sha256:")
+
+
+def test_same_picture_gets_the_same_key(tmp_path):
+    first = leaf_photo(tmp_path / "a.png")
+    second = leaf_photo(tmp_path / "b.png")
+    assert image_hash(first) == image_hash(second)
+    assert image_hash(None) == ""
+
+
+def test_undecodable_upload_is_sent_untouched(tmp_path):
+    path = tmp_path / "broken.jpg"
+    path.write_bytes(b"\xff\xd8\xff not really a jpeg")
+    prepared = prepare_image(str(path))
+    assert prepared.data == path.read_bytes()
+    assert prepared.image_hash.startswith("sha256:")
@@ -0,0 +1,117 @@
+import json
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+import load_test
+from stub_providers import QUESTIONS, Profile, StubProviders
+
+INSTANT = Profile(0, 0, 0)
+
+
+@pytest.fixture
+def stub():
+    stub = StubProviders(
+        {"gemini": INSTANT, "openai": INSTANT, "gtts": Profile(0, 0, 1.0)},
+        answer_chars=100,
+    ).start()
+    yield stub
+    stub.stop()
+
+
+def post(url, body=b"{}"):
+    request = urllib.request.Request(url, data=body, method="POST")
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def test_profile_parse_and_draws():
+    profile = Profile.parse("400,0.3,0.5")
+    assert profile.as_dict() == {"median_ms": 400, "sigma": 0.3, "error_rate": 0.5}
+    assert 0.1 < profile.delay() < 2.0
+    assert INSTANT.delay() == 0.0
+    assert not INSTANT.fails()
+    assert Profile(0, 0, 1.0).fails()
+
+
+def test_stubs_answer_like_the_providers_and_count_calls(stub):
+    gemini = post(f"{stub.url}/v1beta/models/gemini:generateContent")
+    args = gemini["candidates"][0]["content"]["parts"][0]["functionCall"]["args"]
+    assert len(args["response"]) == 100
+    assert args["confidence"] == 85
+
+    assert post(f"{stub.url}/v1/audio/transcriptions")["text"] in QUESTIONS
+
+    with pytest.raises(urllib.error.HTTPError) as outage:
+        post(f"{stub.url}/_/TranslateWebserverUi/data/batchexecute")
+    assert outage.value.code == 503
+
+    assert stub.take_counts() == {
+        "gemini_calls": 1,
+        "openai_calls": 1,
+        "gtts_calls": 1,
+        "gtts_errors": 1,
+    }
+    assert stub.take_counts() == {}
+    assert stub.env()["GEMINI_BASE_URL"] == stub.url
+
+
+def test_make_requests_is_reproducible_and_never_repeats_a_question():
+    requests = load_test.make_requests(50, audio_fraction=0.3, seed=7)
+    assert requests == load_test.make_requests(50, audio_fraction=0.3, seed=7)
+    texts = [request["text"] for request in requests if "text" in request]
+    assert len(set(texts)) == len(texts)
+    assert 0 < len(requests) - len(texts) < 50
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert load_test.percentile(values, 0.50) == 51
+    assert load_test.percentile(values, 0.99) == 100
+    assert load_test.percentile([], 0.95) == 0.0
+
+
+def test_run_level_reports_errors_fallbacks_and_latency(stub, monkeypatch):
+    def driver(request):
+        if request["text"] == "fail":
+            raise RuntimeError("boom")
+        return True, request["text"] == "fallback", None
+
+    monkeypatch.setitem(load_test.DRIVERS, "fake", driver)
+    requests = [{"text": text} for text in ("ok", "ok", "fallback", "fail")]
+    level = load_test.run_level("fake", requests, 2, stub, {})
+
+    assert level["concurrency"] == 2
+    assert level["requests"] == 4
+    assert level["errors"] == 1
+    assert level["fallbacks"] == 1
+    assert level["latency_ms"]["p50"] <= level["latency_ms"]["max"]
+    assert level["stub_calls"] == {}
+
+
+def level(concurrency, throughput, p95):
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": throughput,
+        "latency_ms": {"p95": p95},
+    }
+
+
+def test_compare_flags_regressions_beyond_the_tolerance():
+    baseline = {"levels": [level(1, 10.0, 100.0), level(4, 30.0, 200.0)]}
+    report = {
+        "levels": [level(1, 9.5, 104.0), level(4, 20.0, 300.0), level(16, 1.0, 9e3)]
+    }
+
+    regressions = load_test.compare(report, baseline, tolerance=0.1)
+
+    assert regressions == [
+        "c=4: throughput 30.0 -> 20.0 req/s",
+        "c=4: p95 200.0 -> 300.0 ms",
+    ]
+    assert load_test.compare(baseline, baseline, tolerance=0.0) == []
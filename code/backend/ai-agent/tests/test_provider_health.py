@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+import provider_health
+from provider_health import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    ProviderUnavailable,
+    hedged,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_providers(monkeypatch):
+    provider_health.reset()
+    monkeypatch.setattr(provider_health, "_executors", {})
+    yield
+    provider_health.reset()
+
+
+def fail():
+    raise ConnectionError("down")
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("stt", failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+    with pytest.raises(ProviderUnavailable):
+        breaker.call(lambda: "never called")
+    assert breaker.rejected == 1
+    assert breaker.trips == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("stt", failure_threshold=2)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_admits_one_probe_and_closes_on_success(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(provider_health.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    clock[0] += 31
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(provider_health.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 31
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_hedge_returns_the_backup_when_the_primary_is_slow(monkeypatch):
+    monkeypatch.setattr(provider_health, "HEDGE_DEFAULT_DELAY", 0.01)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "primary"
+
+    try:
+        assert hedged("openai", slow, "local", lambda: "backup") == ("local", "backup")
+    finally:
+        release.set()
+
+
+def test_hung_calls_of_one_provider_do_not_delay_another(monkeypatch):
+    monkeypatch.setattr(provider_health, "HEDGE_WORKERS", 2)
+    monkeypatch.setattr(provider_health, "HEDGE_DEFAULT_DELAY", 0.01)
+    hang = threading.Event()
+
+    def hung():
+        hang.wait(5)
+        return "late"
+
+    def give_up():
+        with pytest.raises(TimeoutError):
+            hedged("gemini", hung, "gemini", hung, deadline=0.05)
+
+    try:
+        # Fill the primary's threads with hung calls
+        for _ in range(2):
+            threading.Thread(target=give_up).start()
+        time.sleep(0.05)
+        started = time.perf_counter()
+        provider, result = hedged("gemini", hung, "local", lambda: "backup")
+        assert (provider, result) == ("local", "backup")
+        assert time.perf_counter() - started < 1
+    finally:
+        hang.set()
+
+
+def test_deadline_gives_up_and_counts_failures(monkeypatch):
+    monkeypatch.setattr(provider_health, "HEDGE_DEFAULT_DELAY", 0.01)
+    release = threading.Event()
+
+    def hung():
+        release.wait(5)
+        return "late"
+
+    try:
+        with pytest.raises(TimeoutError):
+            hedged("openai", hung, "local", hung, deadline=0.05)
+        assert provider_health.get_breaker("openai").failures == 1
+        assert provider_health.get_breaker("local").failures == 1
+    finally:
+        release.set()
+    time.sleep(0.05)
+    # The late answer does not count a second time
+    assert provider_health.get_breaker("openai").failures == 1
+
+
+def test_both_failing_raises_the_last_error():
+    with pytest.raises(ConnectionError):
+        hedged("openai", fail, "local", fail)
@@ -0,0 +1,78 @@
+import pytest
+
+import response_cache
+from response_cache import MemoryCache, SQLiteCache, make_cache_key, normalise_query
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("धान में कीट", "धान में काट"),
+        ("नीम का तेल", "नीम की तेल"),
+        ("നെല്ലിന് വളം", "നെല്ല് വളം"),
+        ("തെങ്ങിന് കീടം", "തെങ്ങിന് കടം"),
+    ],
+)
+def test_indic_minimal_pairs_get_different_keys(first, second):
+    assert normalise_query(first) != normalise_query(second)
+    assert make_cache_key(first, "hi") != make_cache_key(second, "hi")
+
+
+def test_vowel_signs_and_virama_are_kept():
+    assert normalise_query("धान में कीट?") == "धान में कीट"
+    assert normalise_query("നെല്ലിന് വളം!") == "നെല്ലിന് വളം"
+
+
+def test_trivial_variants_share_a_key():
+    assert normalise_query("  How much UREA for paddy?? ") == "how much urea for paddy"
+    assert make_cache_key("How much urea, for paddy?", "en") == make_cache_key(
+        "how much urea for paddy", "en"
+    )
+    assert normalise_query("price: ₹20 / kg") == "price 20 kg"
+
+
+def test_key_depends_on_language_and_image():
+    assert make_cache_key("paddy", "en") != make_cache_key("paddy", "ml")
+    assert make_cache_key("paddy", "en", "a") != make_cache_key("paddy", "en", "b")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(max_entries=1000, ttl=86400):
+        if request.param == "memory":
+            return MemoryCache(max_entries=max_entries, ttl=ttl)
+        return SQLiteCache(tmp_path / "cache.sqlite3", max_entries, ttl)
+
+    return make
+
+
+def test_entries_expire_after_the_ttl(make_cache, clock):
+    cache = make_cache(ttl=60)
+    cache.set("key", {"title": "t"})
+    clock[0] += 59
+    assert cache.get("key") == {"title": "t"}
+    clock[0] += 2
+    assert cache.get("key") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    for key in ("a", "b"):
+        cache.set(key, key)
+        clock[0] += 1
+    cache.get("a")
+    clock[0] += 1
+    cache.set("c", "c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.get("c") == "c"
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
@@ -0,0 +1,55 @@
+import pytest
+
+import script_classifier
+from script_classifier import classify, script_counts, supported_language
+
+
+@pytest.mark.parametrize(
+    "text, lang",
+    [
+        ("നെല്ലിന് എത്ര വളം ഇടണം?", "ml"),
+        ("धान में कितना यूरिया डालें?", "hi"),
+        ("How much urea for paddy?", "en"),
+    ],
+)
+def test_single_script_text_is_decided_by_its_script(text, lang):
+    result = classify(text)
+    assert result == (lang, 1.0, "script")
+
+
+def test_counts_letters_of_each_script():
+    # Codepoints per block, vowel signs included; digits and punctuation count for none
+    assert script_counts("വളം 10 kg, यूरिया!") == (3, 6, 2)
+
+
+def test_mostly_one_script_keeps_the_dominant_language():
+    result = classify("നെല്ലിന് urea എത്ര ഇടണം", statistical=False)
+    assert result.lang == "ml"
+    assert result.source == "script"
+    assert 0.6 <= result.confidence < 1.0
+
+
+def test_ambiguous_mixed_script_goes_to_the_statistical_detector(monkeypatch):
+    monkeypatch.setattr(script_classifier, "_statistical", lambda text: ("ta", 0.71))
+    result = classify("paddy നെല്ല് धान rice")
+    assert result == ("ta", 0.71, "statistical")
+
+
+def test_statistical_failure_keeps_the_script_guess(monkeypatch):
+    def fail(text):
+        raise ImportError("langdetect")
+
+    monkeypatch.setattr(script_classifier, "_statistical", fail)
+    result = classify("paddy നെല്ല് धान rice")
+    assert result.source == "script"
+    assert result.confidence < script_classifier.AMBIGUOUS_BELOW
+
+
+@pytest.mark.parametrize("text", ["", None, "  12 ? ", "🌾"])
+def test_text_without_letters_defaults_to_english(text):
+    assert classify(text) == ("en", 0.0, "default")
+
+
+def test_unsupported_languages_fall_back_to_the_script():
+    assert supported_language("ta", "धान में कीट") == "hi"
+    assert supported_language("ml", "anything") == "ml"
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from semantic_cache import SemanticCache
+
+DIM = 4
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def make_cache(directory, **kwargs):
+    return SemanticCache(directory, embedder=None, dim=DIM, **kwargs)
+
+
+def test_nearer_vector_in_another_language_does_not_hide_a_hit(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.9)
+    cache.insert(unit(1, 0, 0, 0), "paddy urea", "ml", {"response": "ml answer"})
+    cache.insert(unit(1, 0.3, 0, 0), "paddy urea", "en", {"response": "en answer"})
+
+    # Closer to the English entry, but still a hit for Malayalam
+    query = unit(1, 0.25, 0, 0)
+    assert cache.lookup(query, "ml") == {"response": "ml answer"}
+    assert cache.lookup(query, "en") == {"response": "en answer"}
+    assert cache.lookup(query, "hi") is None
+
+
+def test_expired_entries_are_not_served(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, threshold=0.9, ttl=60)
+    cache.insert(unit(1, 0, 0, 0), "old", "en", {"response": "old"})
+    later = cache.indexes["en"].records[0]["ts"] + 61
+    monkeypatch.setattr("semantic_cache.time.time", lambda: later)
+    assert cache.lookup(unit(1, 0, 0, 0), "en") is None
+
+
+def test_size_bound_compacts_and_other_workers_reload(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.9, max_entries=4)
+    other = make_cache(tmp_path, threshold=0.9, max_entries=4)
+    for i in range(6):
+        cache.insert(unit(1, i, i * i, 1), f"q{i}", "en", {"response": f"a{i}"})
+
+    assert cache.compactions == 1
+    assert len(cache) == 4
+    # Oldest entries were dropped, newest kept
+    assert [r["query"] for r in cache.indexes["en"].records] == ["q2", "q3", "q4", "q5"]
+    assert cache.lookup(unit(1, 5, 25, 1), "en") == {"response": "a5"}
+
+    # A worker that loaded the old log picks up the rewritten one
+    assert other.lookup(unit(1, 4, 16, 1), "en") == {"response": "a4"}
+    assert len(other) == 4
+
+
+def test_entries_persist_across_instances(tmp_path):
+    make_cache(tmp_path).insert(unit(0, 1, 0, 0), "q", "hi", {"response": "a"})
+    reopened = make_cache(tmp_path, threshold=0.99)
+    assert reopened.lookup(unit(0, 1, 0, 0), "hi") == {"response": "a"}
+    assert reopened.stats()["languages"] == {"hi": 1}
+
+
+@pytest.mark.parametrize("lang", ["en", "ml"])
+def test_below_threshold_is_a_miss(tmp_path, lang):
+    cache = make_cache(tmp_path, threshold=0.99)
+    cache.insert(unit(1, 0, 0, 0), "q", lang, {"response": "a"})
+    assert cache.lookup(unit(1, 1, 0, 0), lang) is None
+    assert cache.misses == 1
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def run_concurrently(coalescer, key, fn, count):
+    """Start `count` callers of coalescer.do(key, fn); returns their threads and outcomes"""
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(("ok", coalescer.do(key, fn)))
+        except Exception as e:
+            outcomes.append(("error", e))
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_for_waiters(coalescer, key, count):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with coalescer._lock:
+            flight = coalescer._flights.get(key)
+            if flight is not None and flight.waiters == count:
+                return
+        time.sleep(0.001)
+    raise AssertionError("waiters did not arrive")
+
+
+def test_identical_calls_share_one_computation():
+    coalescer = SingleFlight(wait=5)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads, outcomes = run_concurrently(coalescer, "key", compute, 4)
+    wait_for_waiters(coalescer, "key", 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert outcomes == [("ok", "answer")] * 4
+    assert coalescer.stats.as_dict()["upstream_calls_saved"] == 3
+    assert coalescer.in_flight() == 0
+
+
+def test_the_leaders_error_is_shared():
+    coalescer = SingleFlight(wait=5)
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ConnectionError("down")
+
+    threads, outcomes = run_concurrently(coalescer, "key", compute, 3)
+    wait_for_waiters(coalescer, "key", 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [kind for kind, _ in outcomes] == ["error"] * 3
+    assert coalescer.stats.shared_errors == 2
+
+
+def test_a_waiter_gives_up_on_a_stuck_leader():
+    coalescer = SingleFlight(wait=0.05)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+        return len(calls)
+
+    threads, outcomes = run_concurrently(coalescer, "key", compute, 1)
+    wait_for_waiters(coalescer, "key", 0)
+    assert coalescer.do("key", compute) == 2
+    assert coalescer.stats.wait_timeouts == 1
+    release.set()
+    threads[0].join()
+
+
+def test_different_keys_and_later_calls_run_separately():
+    coalescer = SingleFlight()
+    assert coalescer.do("a", lambda: 1) == 1
+    assert coalescer.do("b", lambda: 2) == 2
+    assert coalescer.do("a", lambda: 3) == 3
+    assert coalescer.stats.leaders == 3
+    with pytest.raises(ValueError):
+        coalescer.do("a", lambda: int("x"))
+    assert coalescer.in_flight() == 0
@@ -0,0 +1,47 @@
+import pytest
+
+from speech_text import SpeechNormaliser, normalise, split_sentences
+
+SAMPLES = [
+    ("en", "Done"),
+    (
+        "en",
+        "## Paddy fertiliser\n- Apply **50 kg/ha** urea\n- Split in 2-3 doses\nDone",
+    ),
+    (
+        "en",
+        "Great question! Use [neem oil](https://example.com/neem) at 5 ml/L.\n\n"
+        "1. Spray in the evening\n2. Repeat after 1/2 week",
+    ),
+    (
+        "ml",
+        "നെല്ലിന് **അടിവളമായി** 45 കിലോ ഫോസ്ഫറസ് ചേർക്കുക\n* വെള്ളം കെട്ടി നിർത്തുക",
+    ),
+    ("hi", "धान में कीट लगने पर नीम का तेल 5 ml/L छिड़कें।\n- शाम को छिड़काव करें"),
+]
+
+
+def streamed(text, lang, size):
+    normaliser = SpeechNormaliser(lang)
+    sentences = []
+    for i in range(0, len(text), size):
+        sentences += normaliser.feed(text[i : i + size])
+    return sentences + normaliser.flush()
+
+
+@pytest.mark.parametrize("lang, text", SAMPLES)
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_streaming_matches_batch(lang, text, size):
+    assert streamed(text, lang, size) == split_sentences(normalise(text, lang))
+
+
+def test_final_line_gets_its_full_stop():
+    assert normalise("Done") == "Done."
+    assert streamed("Done", "en", 2) == ["Done."]
+
+
+def test_flush_resets_for_the_next_answer():
+    normaliser = SpeechNormaliser("en")
+    normaliser.feed("First")
+    assert normaliser.flush() == ["First."]
+    assert normaliser.flush() == []
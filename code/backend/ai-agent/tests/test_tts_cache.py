@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import metrics
+from tts_cache import TTSCache, audio_key
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    metrics.reset()
+    yield lambda: metrics.snapshot()["counters"]
+    metrics.reset()
+
+
+def synth(calls):
+    def fn(sentence):
+        calls.append(sentence)
+        return f"<{sentence}>".encode("utf-8")
+
+    return fn
+
+
+def test_only_missing_sentences_are_synthesised(tmp_path, counters):
+    cache = TTSCache(tmp_path, max_bytes=1024 * 1024)
+    calls = []
+
+    first = cache.synthesize("Water daily. Add urea.", "en", "com", synth(calls))
+    second = cache.synthesize("Add urea. Spray neem!", "en", "com", synth(calls))
+
+    assert first == b"<Water daily.><Add urea.>"
+    assert second == b"<Add urea.><Spray neem!>"
+    assert calls == ["Water daily.", "Add urea.", "Spray neem!"]
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.bytes_saved == len(b"<Add urea.>")
+    assert counters()["tts_cache{outcome=hit}"] == 1
+    assert counters()["tts_cache{outcome=miss}"] == 3
+    assert counters()["tts_cache_bytes_saved"] == len(b"<Add urea.>")
+    assert counters()["tts_cache_seconds_saved"] == pytest.approx(cache.seconds_saved)
+
+
+def test_language_and_accent_are_part_of_the_key():
+    assert audio_key("Namaste", "hi", "co.in") != audio_key("Namaste", "hi", "com")
+    assert audio_key("Namaste", "hi", "co.in") != audio_key("Namaste", "en", "co.in")
+
+
+def test_overwriting_a_key_does_not_grow_the_stored_size(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=1024 * 1024)
+
+    cache.put("a", b"x" * 100)
+    cache.put("a", b"x" * 60)
+    cache.put("a", b"x" * 80)
+
+    assert cache.stats()["bytes_stored"] == 80
+    assert TTSCache(tmp_path, max_bytes=1024 * 1024).stats()["bytes_stored"] == 80
+
+
+def test_least_recently_used_files_are_evicted(tmp_path, counters):
+    cache = TTSCache(tmp_path, max_bytes=250)
+    for i, key in enumerate("abc"):
+        cache.put(key, b"x" * 100)
+        # Distinct mtimes, oldest first, so LRU order does not depend on timing
+        os.utime(tmp_path / f"{key}.mp3", (1000 + i, 1000 + i))
+    assert cache.get("a") is None
+
+    cache.get("b")
+    cache.put("d", b"x" * 100)
+
+    assert cache.get("b") is not None
+    assert cache.get("c") is None
+    assert cache.get("d") is not None
+    assert cache.stats()["bytes_stored"] == 200
+    assert cache.evictions == 2
+    assert counters()["tts_cache_evictions"] == 2
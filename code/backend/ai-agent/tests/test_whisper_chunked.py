@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+import whisper_chunked
+import whisper_models
+from audio_decode import SAMPLE_RATE
+
+
+@pytest.fixture(autouse=True)
+def no_pool(monkeypatch):
+    monkeypatch.setattr(whisper_chunked, "_pool", None)
+
+
+def test_stitch_drops_words_repeated_across_a_cut():
+    assert (
+        whisper_chunked.stitch(["one two three", "Three, four five", "five six"])
+        == "one two three four five six"
+    )
+
+
+def test_default_workers_share_cpus_with_the_bridge_pool(monkeypatch):
+    monkeypatch.delenv("WHISPER_WORKERS", raising=False)
+    monkeypatch.setattr(whisper_chunked.os, "cpu_count", lambda: 8)
+    monkeypatch.setenv("BRIDGE_POOL_WORKERS", "1")
+    assert whisper_chunked.workers() == 4
+    monkeypatch.setenv("BRIDGE_POOL_WORKERS", "4")
+    assert whisper_chunked.workers() == 2
+    monkeypatch.setenv("BRIDGE_POOL_WORKERS", "16")
+    assert whisper_chunked.workers() == 1
+
+
+def test_transcribes_in_process_without_a_started_pool(monkeypatch):
+    monkeypatch.setenv("WHISPER_WORKERS", "4")
+    calls = []
+
+    def transcribe(pcm, language=None, size=None):
+        calls.append(len(pcm))
+        return {"text": "ok", "language": language}
+
+    monkeypatch.setattr(whisper_models, "transcribe", transcribe)
+    pcm = np.zeros(60 * SAMPLE_RATE, dtype=np.float32)
+    assert whisper_chunked.transcribe(pcm, language="ml")["text"] == "ok"
+    # One call on the whole note, and no pool was started for it
+    assert calls == [len(pcm)]
+    assert whisper_chunked.get_pool() is None
+
+
+class HungPool:
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+def test_gives_up_on_a_hung_pool(monkeypatch):
+    pool = HungPool()
+    monkeypatch.setattr(whisper_chunked, "_pool", pool)
+    monkeypatch.setenv("WHISPER_TIMEOUT", "0.05")
+    pcm = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    with pytest.raises(TimeoutError):
+        whisper_chunked.transcribe(pcm, language="ml")
+    assert all(future.cancelled() for future in pool.futures)
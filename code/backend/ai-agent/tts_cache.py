@@ -0,0 +1,190 @@
+"""
+Content-addressed audio cache for text_to_speech.
+
+Responses are split into sentences and each sentence's MP3 is stored on disk
+under a hash of (cleaned text, lang, tld). Only sentences that are not cached
+yet go to gTTS; the MP3 segments are then concatenated, which is also how
+gTTS joins its own chunks. The low-confidence suffix, fallback messages and
+common advice lines therefore get synthesised once per host. Hits, misses,
+evictions and the bytes and estimated seconds hits saved are exported as
+"tts_cache*" counters (see metrics).
+
+Environment:
+    TTS_CACHE          set to 0 to disable (default: on)
+    TTS_CACHE_DIR      cache directory (default: .cache/tts)
+    TTS_CACHE_MAX_MB   size bound before the least recently used files go (default: 200)
+"""
+
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import metrics
+
+script_dir = Path(__file__).resolve().parent
+
+# Sentence ends for English/Malayalam ('.', '!', '?') and Hindi (danda)
+_sentence_end_re = re.compile(r"(?<=[.!?।॥])\s+")
+
+
+def split_sentences(text):
+    return [s.strip() for s in _sentence_end_re.split(text) if s.strip()]
+
+
+def audio_key(text, lang, tld):
+    return hashlib.sha256(f"{lang}\x1f{tld}\x1f{text}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.seconds_saved = 0.0
+        self.evictions = 0
+        # Observed gTTS speed, used to estimate the time a cache hit saved
+        self._synth_seconds = 0.0
+        self._synth_chars = 0
+
+        self._total_bytes = sum(
+            p.stat().st_size for p in self.directory.glob("*.mp3") if p.is_file()
+        )
+
+    def _path(self, key):
+        return self.directory / f"{key}.mp3"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Refresh mtime so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            # Overwriting a key replaces its file, so only the difference counts
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+            self._total_bytes += len(data) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used files until the cache is back under 90% of its bound"""
+        files = []
+        for p in self.directory.glob("*.mp3"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _, size, p in files:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+                evicted += 1
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+        self.evictions += evicted
+        metrics.inc("tts_cache_evictions", evicted)
+
+    def synthesize(self, text, lang, tld, synth_fn):
+        """
+        Return MP3 bytes for `text`, reusing cached sentences and calling
+        synth_fn(sentence) only for the missing ones.
+        """
+        segments = []
+        reused = 0
+        sentences = split_sentences(text)
+        for sentence in sentences:
+            key = audio_key(sentence, lang, tld)
+            data = self.get(key)
+            if data is not None:
+                reused += 1
+                self.hits += 1
+                self.bytes_saved += len(data)
+                metrics.inc("tts_cache", outcome="hit")
+                metrics.inc("tts_cache_bytes_saved", len(data))
+                if self._synth_chars:
+                    seconds = len(sentence) * self._synth_seconds / self._synth_chars
+                    self.seconds_saved += seconds
+                    metrics.inc("tts_cache_seconds_saved", seconds)
+            else:
+                self.misses += 1
+                metrics.inc("tts_cache", outcome="miss")
+                start = time.perf_counter()
+                data = synth_fn(sentence)
+                self._synth_seconds += time.perf_counter() - start
+                self._synth_chars += len(sentence)
+                self.put(key, data)
+            segments.append(data)
+
+        print(
+            f"🔊 TTS cache: {reused}/{len(sentences)} sentences reused "
+            f"({self.bytes_saved // 1024} KB, ~{self.seconds_saved:.1f}s saved so far)",
+            file=sys.stderr,
+        )
+        return b"".join(segments)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "seconds_saved": round(self.seconds_saved, 3),
+            "bytes_stored": self._total_bytes,
+            "evictions": self.evictions,
+        }
+
+
+_cache = None
+_cache_initialised = False
+
+
+def get_tts_cache():
+    """Return the process-wide TTS cache, or None when disabled"""
+    global _cache, _cache_initialised
+    if _cache_initialised:
+        return _cache
+    _cache_initialised = True
+
+    if os.getenv("TTS_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    try:
+        _cache = TTSCache(
+            os.getenv("TTS_CACHE_DIR", str(script_dir / ".cache" / "tts")),
+            int(float(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024),
+        )
+    except Exception as e:
+        print(f"TTS cache disabled: {e}", file=sys.stderr)
+        _cache = None
+    return _cache
@@ -0,0 +1,274 @@
+"""
+Parallel chunked transcription for the local Whisper fallback.
+
+Whisper decodes a long voice note one 30 s window at a time on a single
+worker. Here a note longer than WHISPER_CHUNK_MIN is instead split into
+chunks of about WHISPER_CHUNK_SECONDS. Each cut is placed in the longest
+pause near the target length, and every chunk after the first starts
+WHISPER_CHUNK_OVERLAP seconds early, so a word clipped at a cut is still
+heard whole. Chunks are transcribed in parallel in a process pool, then the
+texts are stitched in order, dropping the words each chunk repeats from the
+end of the previous one.
+
+The pool is only started by the resident worker's warm-up (with
+WHISPER_PRELOAD=1), before it starts serving; without a started pool, as in
+the one-shot CLI, transcription runs in-process without chunking. Its
+processes are forked after the model is loaded, so they all share one copy
+of the weights (copy-on-write) rather than loading their own. Forking is
+only done while the process has a single thread; otherwise, or where fork is
+unavailable, the processes come from a forkserver (or spawn) and each loads
+the model once. While the pool is in use every local transcription runs in
+it, short ones included, so the parent never runs inference (torch's thread
+pools do not survive a fork). A transcription that takes longer than
+WHISPER_TIMEOUT raises TimeoutError.
+
+When the language is not given (WHISPER_LANGUAGE), it is detected once from
+the first chunk and used for all of them, so chunks cannot disagree.
+
+Environment:
+    WHISPER_WORKERS        transcription processes (default: min(4, CPU count /
+                           BRIDGE_POOL_WORKERS); 1 transcribes in-process
+                           without chunking)
+    WHISPER_TIMEOUT        seconds one pooled transcription may take (default: 120)
+    WHISPER_CHUNK_SECONDS  target chunk length (default: 30)
+    WHISPER_CHUNK_OVERLAP  seconds each chunk repeats of the previous one (default: 1.0)
+    WHISPER_CHUNK_MIN      notes shorter than this are not split (default: 45)
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+import whisper_models
+from audio_decode import SAMPLE_RATE
+
+# Cuts are placed in the longest pause within this many seconds before the target
+SEARCH_SECONDS = 5.0
+# Longest run of repeated words looked for where two chunks meet
+MAX_OVERLAP_WORDS = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def workers():
+    # Every bridge_pool worker starts its own pool, so share the CPUs out
+    siblings = max(1, int(os.getenv("BRIDGE_POOL_WORKERS", "1")))
+    default = min(4, (os.cpu_count() or 1) // siblings)
+    return max(1, int(os.getenv("WHISPER_WORKERS", str(default))))
+
+
+def timeout():
+    return float(os.getenv("WHISPER_TIMEOUT", "120"))
+
+
+def _settings():
+    return (
+        float(os.getenv("WHISPER_CHUNK_SECONDS", "30")),
+        float(os.getenv("WHISPER_CHUNK_OVERLAP", "1.0")),
+        float(os.getenv("WHISPER_CHUNK_MIN", "45")),
+    )
+
+
+def plan_chunks(pcm, chunk_seconds=30.0, overlap=1.0):
+    """(start, end) sample ranges covering `pcm`, cut at pauses and overlapping"""
+    from audio_compact import FRAME_SECONDS, speech_frames, true_runs
+
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    silent = ~speech_frames(pcm, frame)
+    chunk = int(chunk_seconds / FRAME_SECONDS)
+    search = int(SEARCH_SECONDS / FRAME_SECONDS)
+    frames = len(silent)
+
+    cuts = []
+    position = 0
+    while frames - position > chunk:
+        target = position + chunk
+        low = max(position + chunk - search, position + 1)
+        runs = true_runs(silent[low:target])
+        if runs:
+            start, end = max(runs, key=lambda run: (run[1] - run[0], run[1]))
+            cut = low + (start + end) // 2
+        else:
+            # Unbroken speech: cut at the target and let the overlap cover it
+            cut = target
+        cuts.append(cut)
+        position = cut
+
+    overlap_samples = int(overlap * SAMPLE_RATE)
+    bounds = [0] + [cut * frame for cut in cuts] + [len(pcm)]
+    return [
+        (max(0, start - overlap_samples) if i else 0, end)
+        for i, (start, end) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+def _normalise_word(word):
+    word = unicodedata.normalize("NFKC", word).casefold()
+    return "".join(
+        ch for ch in word if ch.isalnum() or unicodedata.category(ch).startswith("M")
+    )
+
+
+def _overlap_length(previous, following):
+    """Number of leading words of `following` that repeat the end of `previous`"""
+    tail = [_normalise_word(w) for w in previous[-MAX_OVERLAP_WORDS:]]
+    head = [_normalise_word(w) for w in following[:MAX_OVERLAP_WORDS]]
+    for length in range(min(len(tail), len(head)), 0, -1):
+        if tail[-length:] == head[:length]:
+            return length
+    return 0
+
+
+def stitch(texts):
+    """Join chunk transcripts in order, dropping words repeated across a cut"""
+    words = []
+    for text in texts:
+        following = text.split()
+        words.extend(following[_overlap_length(words, following) :])
+    return " ".join(words)
+
+
+def _init_worker(threads, size):
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    # Already loaded when the pool was forked; loaded here under spawn
+    whisper_models.get_model(size)
+
+
+def _ping(_):
+    return os.getpid()
+
+
+def _detect_language(audio, size):
+    return whisper_models.detect_language(audio, size=size)
+
+
+def _transcribe_chunk(audio, language, size):
+    result = whisper_models.transcribe(audio, language=language, size=size)
+    return result.get("text", ""), result.get("language")
+
+
+def _start_method():
+    """fork while it is safe (one thread), else forkserver or spawn"""
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        return "fork"
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+def get_pool():
+    """The started transcription process pool, or None"""
+    return _pool
+
+
+def start_pool(size=None):
+    """
+    Start the pool, unless WHISPER_WORKERS is 1. Call before serving: the
+    worker's warm-up does, with WHISPER_PRELOAD=1.
+    """
+    global _pool
+    count = workers()
+    if count < 2 or _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            size = size or whisper_models.default_model_size()
+            method = _start_method()
+            if method == "fork":
+                # Load before forking so every process shares these weights
+                whisper_models.get_model(size)
+            context = multiprocessing.get_context(method)
+            threads = max(1, (os.cpu_count() or 1) // count)
+            pool = ProcessPoolExecutor(
+                max_workers=count,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(threads, size),
+            )
+            # Start every process now, while this process has run no inference
+            list(pool.map(_ping, range(count)))
+            print(
+                f"🧩 Local Whisper pool: {count} processes x {threads} threads "
+                f"({method})",
+                file=sys.stderr,
+            )
+            _pool = pool
+    return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def transcribe(pcm, language=None, size=None):
+    """
+    Whisper-style {"text", "language"} result for 16 kHz float32 PCM, split
+    into parallel chunks when the note is long enough and a pool is started.
+    """
+    pool = get_pool()
+    if pool is None:
+        return whisper_models.transcribe(pcm, language=language, size=size)
+
+    chunk_seconds, overlap, min_seconds = _settings()
+    if len(pcm) < min_seconds * SAMPLE_RATE:
+        chunks = [(0, len(pcm))]
+    else:
+        chunks = plan_chunks(pcm, chunk_seconds, overlap)
+
+    start = time.perf_counter()
+    give_up_at = time.monotonic() + timeout()
+    futures = []
+    try:
+        if language is None and len(chunks) > 1:
+            a, b = chunks[0]
+            futures = [pool.submit(_detect_language, pcm[a:b], size)]
+            language = futures[0].result(timeout=give_up_at - time.monotonic())
+        futures = [
+            pool.submit(_transcribe_chunk, pcm[a:b], language, size) for a, b in chunks
+        ]
+        wait(futures, timeout=max(0.0, give_up_at - time.monotonic()))
+        results = [future.result(timeout=0) for future in futures]
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    except TimeoutError:
+        # Queued chunks are dropped; a chunk already running finishes in its process
+        for future in futures:
+            future.cancel()
+        metrics.inc("whisper_timeouts")
+        print(
+            f"⏱️ Local Whisper gave up on {len(pcm) / SAMPLE_RATE:.0f}s of audio "
+            f"after {timeout():.0f}s",
+            file=sys.stderr,
+        )
+        raise
+
+    elapsed = time.perf_counter() - start
+    metrics.observe("whisper_chunked", elapsed)
+    metrics.inc("whisper_chunks", len(chunks))
+    if len(chunks) > 1:
+        print(
+            f"🧩 Local Whisper transcribed {len(pcm) / SAMPLE_RATE:.0f}s "
+            f"in {len(chunks)} chunks in {elapsed:.2f}s",
+            file=sys.stderr,
+        )
+    return {
+        "text": stitch(text for text, _ in results),
+        "language": language or results[0][1],
+    }
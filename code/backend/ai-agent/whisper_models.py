@@ -0,0 +1,118 @@
+"""
+Registry of local Whisper models for the speech_to_text fallback.
+
+Each model size is loaded once per process and reused across requests, so
+the fallback path no longer reads the weights from disk on every call.
+
+Environment:
+    WHISPER_MODEL_SIZE  model size to load (default: base)
+    WHISPER_THREADS     torch CPU threads used for inference (default: torch's choice)
+    WHISPER_LANGUAGE    language code to transcribe in (default: detected per note)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import metrics
+
+_models = {}
+_lock = threading.Lock()
+_threads_configured = False
+
+# Cumulative timings so model load and transcription can be told apart
+_timings = {"load_s": 0.0, "loads": 0, "transcribe_s": 0.0, "transcriptions": 0}
+
+
+def default_model_size():
+    return os.getenv("WHISPER_MODEL_SIZE", "base")
+
+
+def default_language():
+    return os.getenv("WHISPER_LANGUAGE") or None
+
+
+def _configure_threads():
+    global _threads_configured
+    if _threads_configured:
+        return
+    _threads_configured = True
+
+    threads = os.getenv("WHISPER_THREADS")
+    if not threads:
+        return
+    try:
+        import torch
+
+        torch.set_num_threads(int(threads))
+        print(f"🧵 Local Whisper using {threads} CPU threads", file=sys.stderr)
+    except Exception as e:
+        print(f"Could not set Whisper thread count: {e}", file=sys.stderr)
+
+
+def get_model(size=None):
+    """Return the local Whisper model for `size`, loading it on first use"""
+    size = size or default_model_size()
+    model = _models.get(size)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(size)
+        if model is None:
+            import whisper
+
+            _configure_threads()
+            start = time.perf_counter()
+            model = whisper.load_model(size, device="cpu")
+            elapsed = time.perf_counter() - start
+            _timings["load_s"] += elapsed
+            _timings["loads"] += 1
+            metrics.observe("whisper_load", elapsed, size=size)
+            print(
+                f"📦 Loaded local Whisper '{size}' in {elapsed:.2f}s", file=sys.stderr
+            )
+            _models[size] = model
+    return model
+
+
+def transcribe(audio, language=None, size=None, **options):
+    """
+    Transcribe `audio` (a file path or a 16 kHz float32 array) with the
+    resident model. fp16 is disabled since inference runs on CPU.
+    """
+    model = get_model(size)
+    options.setdefault("fp16", False)
+
+    start = time.perf_counter()
+    result = model.transcribe(audio, language=language, **options)
+    elapsed = time.perf_counter() - start
+    _timings["transcribe_s"] += elapsed
+    _timings["transcriptions"] += 1
+    metrics.observe("whisper_transcribe", elapsed)
+    print(f"📝 Local Whisper transcribed in {elapsed:.2f}s", file=sys.stderr)
+    return result
+
+
+def detect_language(audio, size=None):
+    """Most likely language code for the first 30 s of a 16 kHz float32 array"""
+    import whisper
+
+    model = get_model(size)
+    audio = whisper.pad_or_trim(audio)
+    mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels).to(model.device)
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+
+def preload(size=None):
+    """Load a model ahead of the first request, e.g. when a worker starts"""
+    try:
+        get_model(size)
+    except Exception as e:
+        print(f"Local Whisper preload failed: {e}", file=sys.stderr)
+
+
+def stats():
+    return {"loaded": sorted(_models), **_timings}
@@ -1,6 +1,37 @@
 import Chat from "../models/chat.model.js";
 import { v4 as uuidv4 } from "uuid";
 
+// Creates an empty chat so its id exists before the first AI call: the AI
+// route keys the conversation history on it, so it must not change later.
+export const createChat = async (req, res) => {
+  try {
+    const userId = req.user._id.toString();
+    const { title } = req.body || {};
+    const chat = new Chat({
+      title: title ? title : "New Conversation",
+      chatId: uuidv4(),
+      userId,
+      messages: [],
+    });
+    await chat.save();
+    res.status(201).json({
+      message: "Chat created successfully",
+      chat: {
+        _id: chat._id,
+        chatId: chat.chatId,
+        title: chat.title,
+        userId: chat.userId,
+        messages: chat.messages,
+        createdAt: chat.createdAt,
+        updatedAt: chat.updatedAt,
+      },
+    });
+  } catch (error) {
+    console.error("Error creating chat:", error);
+    res.status(500).json({ error: "Failed to create chat" });
+  }
+};
+
 export const sendMessage = async (req, res) => {
   try {
     console.log("chatting");
@@ -2,8 +2,10 @@ import { spawn } from 'child_process';
 import express from 'express';
 import fs from 'fs';
 import multer from 'multer';
+import net from 'net';
 import path from 'path';
 import { fileURLToPath } from 'url';
+import { parseBridgeFrames, toJsonReply } from '../utils/bridgeFrames.js';
 import verifySession from '../utils/verifyUser.js';
 const router = express.Router();
 
@@ -27,6 +29,60 @@ const upload = multer({
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
+// 'frames' has the bridge reply with length-prefixed binary frames and raw
+// audio instead of one JSON line with base64 audio (see ai-agent/bridge_frames.py)
+const bridgeOutput = process.env.AI_BRIDGE_OUTPUT === 'frames' ? 'frames' : 'json';
+
+// Sends one request to a resident bridge worker (malayalam_api_bridge.py --worker --socket ...)
+// and resolves with its reply in JSON form.
+const requestBridgeWorker = (socketPath, payload, timeoutMs) =>
+	new Promise((resolve, reject) => {
+		const socket = net.createConnection(socketPath);
+		const chunks = [];
+		let received = 0;
+		let needed = 0;
+
+		// A total deadline, like the spawn path's; socket.setTimeout only fires when idle
+		const timer = setTimeout(() => {
+			socket.destroy(new Error('AI processing timed out'));
+		}, timeoutMs);
+		socket.on('close', () => clearTimeout(timer));
+
+		socket.on('connect', () => {
+			socket.write(JSON.stringify({ ...payload, output: bridgeOutput }) + '\n');
+		});
+
+		socket.on('data', (chunk) => {
+			chunks.push(chunk);
+			received += chunk.length;
+			try {
+				if (bridgeOutput === 'frames') {
+					// Only join the chunks once the next frame can have arrived
+					if (received < needed) return;
+					const buffer = Buffer.concat(chunks, received);
+					chunks.splice(0, chunks.length, buffer);
+					const reply = parseBridgeFrames(buffer);
+					if (!reply.complete) {
+						needed = reply.needed;
+						return;
+					}
+					socket.end();
+					resolve(toJsonReply(reply));
+					return;
+				}
+				if (chunk.indexOf(0x0a) === -1) return;
+				const buffer = Buffer.concat(chunks, received);
+				socket.end();
+				resolve(JSON.parse(buffer.subarray(0, buffer.indexOf(0x0a)).toString('utf8')));
+			} catch (parseError) {
+				socket.end();
+				reject(parseError);
+			}
+		});
+
+		socket.on('error', reject);
+	});
+
 router.post(
 	'/chat',
 	verifySession,
@@ -35,7 +91,6 @@ router.post(
 		{ name: 'image_file', maxCount: 1 },
 	]),
 	async (req, res) => {
-		let tempAudioPath = null;
 		let tempImagePath = null;
 
 		try {
@@ -68,17 +123,28 @@ router.post(
 				throw new Error(`Python script not found: ${pythonScriptPath}`);
 			}
 
-			const pythonArgs = [pythonScriptPath];
+			const pythonArgs = [pythonScriptPath, '--output', bridgeOutput];
+			const bridgeRequest = {};
+
+			// Earlier turns of the same chat are sent to the model as context.
+			// Scoped to the user so one account cannot read another's history.
+			const chatId = req.body.chat_id?.trim();
+			if (chatId) {
+				const sessionId = `${req.user._id}:${chatId}`;
+				pythonArgs.push('--session-id', sessionId);
+				bridgeRequest.session_id = sessionId;
+			}
 
 			if (audioFile) {
-				tempAudioPath = path.join('/tmp', `audio_${Date.now()}.webm`);
-				fs.writeFileSync(tempAudioPath, audioFile.buffer);
-				pythonArgs.push('--audio-file', tempAudioPath);
-				console.log('🎵 Audio saved to:', tempAudioPath);
+				// Audio stays in memory: piped to the bridge's stdin, or inlined for the worker
+				pythonArgs.push('--audio-stdin');
+				bridgeRequest.audio_base64 = audioFile.buffer.toString('base64');
+				console.log('🎵 Audio passed in memory:', audioFile.size, 'bytes');
 			}
 
 			if (textInput) {
 				pythonArgs.push('--text', textInput);
+				bridgeRequest.text = textInput;
 				console.log('📝 Text input:', textInput.substring(0, 50) + '...');
 			}
 
@@ -86,9 +152,28 @@ router.post(
 				tempImagePath = path.join('/tmp', `image_${Date.now()}.jpg`);
 				fs.writeFileSync(tempImagePath, imageFile.buffer);
 				pythonArgs.push('--image-file', tempImagePath);
+				bridgeRequest.image_file = tempImagePath;
 				console.log('🖼️ Image saved to:', tempImagePath);
 			} else if (hasImageFlag) {
 				pythonArgs.push('--has_image');
+				bridgeRequest.has_image = true;
+			}
+
+			const bridgeSocket = process.env.AI_BRIDGE_SOCKET;
+			if (bridgeSocket) {
+				console.log('🐍 Sending request to bridge worker:', bridgeSocket);
+				const result = await requestBridgeWorker(
+					bridgeSocket,
+					bridgeRequest,
+					60000
+				);
+
+				if (tempImagePath && fs.existsSync(tempImagePath)) {
+					fs.unlinkSync(tempImagePath);
+				}
+
+				console.log('✅ AI processing successful');
+				return res.json(result);
 			}
 
 			console.log('🐍 Launching Python with args:', pythonArgs.slice(1));
@@ -101,13 +186,16 @@ router.post(
 				env: { ...process.env, PYTHONIOENCODING: 'utf-8' },
 			});
 
-			pyProcess.stdin.end();
+			pyProcess.stdin.on('error', (error) => {
+				console.error('Python stdin error:', error.message);
+			});
+			pyProcess.stdin.end(audioFile ? audioFile.buffer : undefined);
 
-			let stdout = '';
+			const stdoutChunks = [];
 			let stderr = '';
 
 			pyProcess.stdout.on('data', (data) => {
-				stdout += data.toString();
+				stdoutChunks.push(data);
 			});
 
 			pyProcess.stderr.on('data', (data) => {
@@ -116,10 +204,6 @@ router.post(
 			});
 
 			pyProcess.on('close', (code) => {
-				if (tempAudioPath && fs.existsSync(tempAudioPath)) {
-					fs.unlinkSync(tempAudioPath);
-					console.log('🗑️ Cleaned audio temp file');
-				}
 				if (tempImagePath && fs.existsSync(tempImagePath)) {
 					fs.unlinkSync(tempImagePath);
 					console.log('🗑️ Cleaned image temp file');
@@ -135,8 +219,16 @@ router.post(
 					});
 				}
 
+				const stdout = Buffer.concat(stdoutChunks);
 				try {
-					const result = JSON.parse(stdout.trim());
+					let result;
+					if (bridgeOutput === 'frames') {
+						const reply = parseBridgeFrames(stdout);
+						if (!reply.complete) throw new Error('Incomplete bridge frames');
+						result = toJsonReply(reply);
+					} else {
+						result = JSON.parse(stdout.toString('utf8').trim());
+					}
 					console.log('✅ AI processing successful');
 
 					console.log('📤 Response summary:', {
@@ -151,12 +243,13 @@ router.post(
 					return res.json(result);
 				} catch (parseError) {
 					console.error('❌ JSON parse error:', parseError.message);
-					console.error('Raw Python output:', stdout.substring(0, 500));
+					const rawOutput = stdout.subarray(0, 500).toString('utf8');
+					console.error('Raw Python output:', rawOutput);
 					return res.status(500).json({
 						success: false,
 						error: 'Invalid AI response format',
 						details: parseError.message,
-						raw_output: stdout.trim().substring(0, 200),
+						raw_output: rawOutput.trim().substring(0, 200),
 					});
 				}
 			});
@@ -164,9 +257,6 @@ router.post(
 			pyProcess.on('error', (error) => {
 				console.error('❌ Python spawn error:', error.message);
 
-				if (tempAudioPath && fs.existsSync(tempAudioPath)) {
-					fs.unlinkSync(tempAudioPath);
-				}
 				if (tempImagePath && fs.existsSync(tempImagePath)) {
 					fs.unlinkSync(tempImagePath);
 				}
@@ -194,9 +284,6 @@ router.post(
 		} catch (error) {
 			console.error('❌ Route error:', error.message);
 
-			if (tempAudioPath && fs.existsSync(tempAudioPath)) {
-				fs.unlinkSync(tempAudioPath);
-			}
 			if (tempImagePath && fs.existsSync(tempImagePath)) {
 				fs.unlinkSync(tempImagePath);
 			}
@@ -1,6 +1,6 @@
 import express from 'express';
 import { 
-    // createChat, 
+    createChat, 
          sendMessage, 
          getChatList,        
          getChatById,        
@@ -11,7 +11,7 @@ import verifySession from '../utils/verifyUser.js';
 
 const router = express.Router();
 
-// router.post('/newChat', verifySession, createChat);  
+router.post('/newChat', verifySession, createChat);  
 router.post('/sendMessage', verifySession, sendMessage);  
 router.get('/getAllChats', verifySession, getChatList);  // list for side bar
 router.get('/get/:chatId', verifySession, getChatById);  // complete chat
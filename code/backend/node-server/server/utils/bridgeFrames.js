@@ -0,0 +1,48 @@
+import fs from 'fs';
+
+// Reader for the bridge's binary frame output (ai-agent/bridge_frames.py).
+// Each frame is a 1-byte kind ('M' metadata JSON, 'A' raw audio) and a
+// little-endian uint32 payload length, followed by the payload.
+const HEADER_SIZE = 5;
+
+// The frame at `offset`, or { needed } with the buffer length it takes to read it
+const readFrame = (buffer, offset, expected) => {
+	if (buffer.length < offset + HEADER_SIZE) return { needed: offset + HEADER_SIZE };
+	const kind = String.fromCharCode(buffer[offset]);
+	if (kind !== expected) {
+		throw new Error(`Expected a '${expected}' frame, got '${kind}'`);
+	}
+	const start = offset + HEADER_SIZE;
+	const end = start + buffer.readUInt32LE(offset + 1);
+	if (buffer.length < end) return { needed: end };
+	return { payload: buffer.subarray(start, end), end };
+};
+
+// Parses one reply from the start of `buffer`: { complete: true, result, audio }
+// with audio a Buffer (or null), or { complete: false, needed } with the buffer
+// length to wait for. Audio written to a shared file (BRIDGE_AUDIO_DIR) is
+// read and the file removed.
+export const parseBridgeFrames = (buffer) => {
+	const metadata = readFrame(buffer, 0, 'M');
+	if (!metadata.payload) return { complete: false, needed: metadata.needed };
+	const result = JSON.parse(metadata.payload.toString('utf8'));
+
+	let audio = null;
+	if (result.audio_path) {
+		audio = fs.readFileSync(result.audio_path);
+		fs.unlink(result.audio_path, () => {});
+		delete result.audio_path;
+	} else if (result.audio_bytes) {
+		const frame = readFrame(buffer, metadata.end, 'A');
+		if (!frame.payload) return { complete: false, needed: frame.needed };
+		audio = frame.payload;
+	}
+	return { complete: true, result, audio };
+};
+
+// The reply in the JSON shape clients expect, with the audio as base64.
+export const toJsonReply = ({ result, audio }) => {
+	delete result.audio_bytes;
+	result.audio_base64 = audio ? audio.toString('base64') : null;
+	return result;
+};
@@ -928,9 +928,27 @@ const Agent: React.FC = () => {
 
       let chatId = activeChat;
       console.log(chatId);
-      // Create new chat if none active
+      let createError: unknown = null;
+      // Create new chat if none active. It is created on the server first:
+      // the AI route keys the conversation history on this id, so the first
+      // turn must already use the id every later turn will send.
       if (!chatId) {
-        chatId = Date.now().toString();
+        try {
+          const created = await fetch(`${API_BASE}/api/chat/newChat`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ title: "New Conversation" }),
+            credentials: "include",
+          });
+          if (!created.ok) {
+            throw new Error(`HTTP error! status: ${created.status}`);
+          }
+          chatId = (await created.json()).chat.chatId as string;
+        } catch (error) {
+          // Shown in the chat by the error handling below
+          createError = error;
+          chatId = Date.now().toString();
+        }
         const newChat: Chat = {
           id: chatId,
           title: "New Conversation",
@@ -964,8 +982,10 @@ const Agent: React.FC = () => {
       // Call Malayalam API
       setIsLoading(true);
       try {
+        if (createError) throw createError;
         console.log("🔄 Calling Malayalam API...");
         const formData = new FormData();
+        formData.append("chat_id", chatId);
 
         if (content.audio) {
           formData.append("audio_file", content.audio, "audio.webm");
@@ -1034,7 +1054,7 @@ const Agent: React.FC = () => {
           // update chat state in the backend
           const updatePayload = {
             title: newTitle,
-            chatId: activeChat,
+            chatId,
             usercontent: userMessage.content,
             aicontent: aiResponse.content,
             images: null,